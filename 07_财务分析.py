@@ -9,7 +9,7 @@ import pandas as pd
 import os
 import time
 from datetime import datetime
-from typing import Optional, Dict
+from typing import IO, Optional, Dict, Union
 
 def get_symbol_name(symbol):
     """
@@ -1263,19 +1263,19 @@ def calculate_fixed_asset_metrics(symbol, start_year, end_year):
     
     return result_df
 
-def load_employee_count_from_csv(csv_path: str) -> Dict[int, int]:
+def load_employee_count_from_csv(csv_path: Union[str, IO]) -> Dict[int, int]:
     """
     从CSV文件中加载员工数量数据
     
     参数:
-        csv_path: CSV文件路径（格式：xxxx_员工数量.csv）
+        csv_path: CSV文件路径（格式：xxxx_员工数量.csv），也可以是已打开的文件对象（如上传文件的内存缓冲区）
     
     返回:
         字典，键为年份，值为员工数量
     """
     employee_data = {}
     
-    if not os.path.exists(csv_path):
+    if isinstance(csv_path, str) and not os.path.exists(csv_path):
         print(f"  ⚠ CSV文件不存在: {csv_path}")
         return employee_data
     
@@ -1287,6 +1287,9 @@ def load_employee_count_from_csv(csv_path: str) -> Dict[int, int]:
         
         for encoding in encodings:
             try:
+                if not isinstance(csv_path, str):
+                    # 文件对象在换编码重试前需要回到开头
+                    csv_path.seek(0)
                 df = pd.read_csv(csv_path, encoding=encoding)
                 encoding_used = encoding
                 break
@@ -1424,7 +1427,7 @@ def get_employee_count(symbol):
         traceback.print_exc()
         return None
 
-def calculate_per_capita_metrics(symbol, start_year, end_year, employee_csv_path: Optional[str] = None):
+def calculate_per_capita_metrics(symbol, start_year, end_year, employee_csv_path: Optional[Union[str, IO]] = None):
     """
     计算人均数据指标
     
@@ -1432,7 +1435,7 @@ def calculate_per_capita_metrics(symbol, start_year, end_year, employee_csv_path
         symbol: 股票代码
         start_year: 起始年份
         end_year: 结束年份
-        employee_csv_path: 员工数量CSV文件路径（格式：xxxx_员工数量.csv），如果提供则从CSV读取，否则使用接口
+        employee_csv_path: 员工数量CSV文件路径（格式：xxxx_员工数量.csv）或文件对象，如果提供则从CSV读取，否则使用接口
     
     返回:
         包含所有人均指标数据的DataFrame
@@ -2143,6 +2146,93 @@ def save_to_excel(df, symbol, company_name, start_year, end_year, sheet_name, ou
         traceback.print_exc()
         return None
 
+def write_analysis_sheets(writer, sheets, start_year, end_year):
+    """
+    将多个Sheet写入已打开的 ExcelWriter，每个Sheet添加公式说明区域并设置列宽
+    
+    参数:
+        writer: openpyxl 引擎的 pd.ExcelWriter
+        sheets: 字典，格式为 {Sheet名称: 数据框}，按字典顺序写入
+        start_year: 起始年份
+        end_year: 结束年份
+    """
+    for sheet_name, df in sheets.items():
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        ws = writer.sheets[sheet_name]
+        # 添加公式说明区域
+        add_worksheet_formula_notes(ws, sheet_name, start_year, end_year)
+        # 设置列宽自适应
+        adjust_worksheet_column_width(ws)
+
+def save_all_to_excel(sheets, symbol, company_name, start_year, end_year, output_dir="output", timestamp=None, output=None):
+    """
+    一次性保存多个Sheet到Excel文件，并在每个Sheet的数据表格下方添加公式说明区域
+    
+    与逐个调用 save_to_excel 生成的文件内容相同，但所有Sheet在内存中写入和排版，只保存一次文件，
+    不需要每个Sheet重新读写整个工作簿
+    
+    参数:
+        sheets: 字典，格式为 {Sheet名称: 数据框}，按字典顺序写入
+        symbol: 股票代码
+        company_name: 公司名称
+        start_year: 起始年份
+        end_year: 结束年份
+        output_dir: 输出目录
+        timestamp: 时间戳（格式：YYYYMMDDHHmmss），如果为None则自动生成
+        output: 可写入的文件对象（如 io.BytesIO），提供时直接写入该对象，不写磁盘文件
+    
+    返回:
+        文件路径（提供 output 时返回 output），没有数据或保存失败时返回None
+    """
+    sheets = {name: df for name, df in sheets.items() if df is not None and not df.empty}
+    if not sheets:
+        print("✗ 没有数据可保存")
+        return None
+    
+    if output is not None:
+        try:
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                write_analysis_sheets(writer, sheets, start_year, end_year)
+            print(f"✓ 已生成 {len(sheets)} 个Sheet的Excel数据")
+            return output
+        except Exception as e:
+            print(f"\n✗ 生成Excel数据失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    # 创建输出目录
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    # 生成时间戳（如果未提供）
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    
+    # 生成文件名（与 save_to_excel 相同）
+    filename = f"{company_name}_{start_year}-{end_year}_财务分析_{timestamp}.xlsx"
+    filepath = os.path.join(output_dir, filename)
+    
+    try:
+        # 如果文件已存在，追加/替换sheet；否则创建新文件
+        if os.path.exists(filepath):
+            writer = pd.ExcelWriter(filepath, engine='openpyxl', mode='a', if_sheet_exists='replace')
+        else:
+            writer = pd.ExcelWriter(filepath, engine='openpyxl')
+        
+        with writer:
+            write_analysis_sheets(writer, sheets, start_year, end_year)
+        
+        print(f"✓ 已保存 {len(sheets)} 个Sheet到Excel文件")
+        print(f"  文件路径: {filepath}")
+        return filepath
+        
+    except Exception as e:
+        print(f"\n✗ 保存Excel文件失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
 def auto_adjust_column_width(filepath, sheet_name):
     """
     自动调整Excel sheet的列宽以适应内容
@@ -2153,7 +2243,6 @@ def auto_adjust_column_width(filepath, sheet_name):
     """
     try:
         from openpyxl import load_workbook
-        from openpyxl.utils import get_column_letter
         
         # 加载工作簿
         wb = load_workbook(filepath)
@@ -2162,40 +2251,7 @@ def auto_adjust_column_width(filepath, sheet_name):
             wb.close()
             return
         
-        ws = wb[sheet_name]
-        
-        # 遍历每一列，计算最大内容长度
-        for col_idx, col in enumerate(ws.iter_cols(min_row=1, max_row=ws.max_row, values_only=False), start=1):
-            max_length = 0
-            column_letter = get_column_letter(col_idx)
-            
-            # 遍历该列的所有单元格
-            for cell in col:
-                if cell.value is not None:
-                    # 计算单元格内容的字符串长度
-                    # 对于数字，转换为字符串；对于其他类型，直接转换为字符串
-                    try:
-                        cell_value = str(cell.value)
-                        # 中文字符通常需要更多宽度，粗略估算：中文字符按2个字符宽度计算
-                        length = 0
-                        for char in cell_value:
-                            if ord(char) > 127:  # 非ASCII字符（包括中文）
-                                length += 2
-                            else:
-                                length += 1
-                        if length > max_length:
-                            max_length = length
-                    except:
-                        pass
-            
-            # 设置列宽（最小宽度8，最大宽度50，并添加一些padding）
-            if max_length > 0:
-                # 添加2个字符的padding，并限制在合理范围内
-                adjusted_width = min(max(max_length + 2, 8), 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            else:
-                # 如果列是空的，设置默认宽度
-                ws.column_dimensions[column_letter].width = 10
+        adjust_worksheet_column_width(wb[sheet_name])
         
         # 保存工作簿
         wb.save(filepath)
@@ -2206,6 +2262,48 @@ def auto_adjust_column_width(filepath, sheet_name):
         import traceback
         traceback.print_exc()
 
+def adjust_worksheet_column_width(ws):
+    """
+    自动调整工作表的列宽以适应内容（直接修改内存中的工作表，不读写文件）
+    
+    参数:
+        ws: openpyxl 工作表
+    """
+    from openpyxl.utils import get_column_letter
+    
+    # 遍历每一列，计算最大内容长度
+    for col_idx, col in enumerate(ws.iter_cols(min_row=1, max_row=ws.max_row, values_only=False), start=1):
+        max_length = 0
+        column_letter = get_column_letter(col_idx)
+        
+        # 遍历该列的所有单元格
+        for cell in col:
+            if cell.value is not None:
+                # 计算单元格内容的字符串长度
+                # 对于数字，转换为字符串；对于其他类型，直接转换为字符串
+                try:
+                    cell_value = str(cell.value)
+                    # 中文字符通常需要更多宽度，粗略估算：中文字符按2个字符宽度计算
+                    length = 0
+                    for char in cell_value:
+                        if ord(char) > 127:  # 非ASCII字符（包括中文）
+                            length += 2
+                        else:
+                            length += 1
+                    if length > max_length:
+                        max_length = length
+                except:
+                    pass
+        
+        # 设置列宽（最小宽度8，最大宽度50，并添加一些padding）
+        if max_length > 0:
+            # 添加2个字符的padding，并限制在合理范围内
+            adjusted_width = min(max(max_length + 2, 8), 50)
+            ws.column_dimensions[column_letter].width = adjusted_width
+        else:
+            # 如果列是空的，设置默认宽度
+            ws.column_dimensions[column_letter].width = 10
+
 def add_formula_notes(filepath, sheet_name, start_year, end_year):
     """
     在Excel sheet的数据表格下方添加公式说明区域
@@ -2218,8 +2316,6 @@ def add_formula_notes(filepath, sheet_name, start_year, end_year):
     """
     try:
         from openpyxl import load_workbook
-        from openpyxl.styles import PatternFill, Font, Alignment
-        from openpyxl.utils import get_column_letter
         
         # 加载工作簿
         wb = load_workbook(filepath)
@@ -2228,78 +2324,11 @@ def add_formula_notes(filepath, sheet_name, start_year, end_year):
             wb.close()
             return
         
-        ws = wb[sheet_name]
-        
-        # 找到数据表格的最后一行
-        # 从最后一行向上查找，跳过可能存在的空行或公式说明行
-        max_row = ws.max_row
-        # 检查最后几行，如果包含"公式说明"字样，则向上查找
-        for row in range(max_row, max(1, max_row - 5), -1):
-            cell_value = ws.cell(row=row, column=1).value
-            if cell_value and '公式说明' in str(cell_value):
-                max_row = row - 1
-                break
-        
-        # 定义各sheet的公式说明
-        formula_notes = {}
-        
-        if sheet_name == '营收基本数据':
-            formula_notes = {
-                '金融利润（亿元）': '金融利润 = 公允价值变动收益 + 投资收益',
-                '经营利润（亿元）': '经营利润 = 归母净利润 - 金融利润',
-                'CAPEX（亿元）': 'CAPEX = 购建固定资产、无形资产和其他长期资产支付的现金（来自现金流量表）'
-            }
-        elif sheet_name == '资产负债':
-            formula_notes = {
-                '狭义无息债务（亿元）': '狭义无息债务 = 应付账款 + 预收账款 + 合同负债',
-                '广义无息债务（亿元）': '广义无息债务 = 应付账款 + 应付票据 + 预收账款 + 合同负债'
-            }
-        elif sheet_name == 'WC分析':
-            formula_notes = {
-                'WC（亿元）': 'WC = (应收账款 + 预付账款 + 存货 + 合同资产) - (应付账款 + 预收账款 + 合同负债)'
-            }
-        elif sheet_name == '固定资产投入分析':
-            formula_notes = {
-                '固定资产（亿元）': '固定资产 = 固定资产 + 在建工程 + 工程物资 - 固定资产清理',
-                '长期资产（亿元）': '长期资产 = 固定资产 + 无形资产 + 开发支出 + 使用权资产 + 商誉 + 长期待摊费用'
-            }
-        elif sheet_name == '收益率和杜邦分析':
-            formula_notes = {
-                'ROIC(%)': 'ROIC = EBIT / 投入资本 × 100，其中EBIT = 营业利润 + 利息支出，投入资本 = 总资产 - 狭义无息债务（应付账款 + 预收账款 + 合同负债）'
-            }
-        
-        # 如果没有公式说明，直接返回
-        if not formula_notes:
+        # 没有公式说明时不需要重新保存
+        if not add_worksheet_formula_notes(wb[sheet_name], sheet_name, start_year, end_year):
             wb.close()
             return
         
-        # 计算列数（科目列 + 年份列）
-        num_cols = 1 + (end_year - start_year + 1)
-        
-        # 在数据表格下方留2行空白
-        start_row = max_row + 3
-        
-        # 添加标题行
-        title_row = start_row
-        ws.merge_cells(start_row=title_row, start_column=1, end_row=title_row, end_column=num_cols)
-        title_cell = ws.cell(row=title_row, column=1)
-        title_cell.value = '公式说明'
-        title_cell.font = Font(bold=True, size=11)
-        title_cell.fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
-        title_cell.alignment = Alignment(horizontal='left', vertical='center')
-        
-        # 添加公式说明行
-        current_row = start_row + 1
-        for metric_name, formula in formula_notes.items():
-            # 合并第一列（科目列）和所有年份列
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=num_cols)
-            formula_cell = ws.cell(row=current_row, column=1)
-            formula_cell.value = f'{metric_name}: {formula}'
-            formula_cell.font = Font(size=10)
-            formula_cell.fill = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
-            formula_cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-            current_row += 1
-        
         # 保存工作簿
         wb.save(filepath)
         wb.close()
@@ -2309,6 +2338,92 @@ def add_formula_notes(filepath, sheet_name, start_year, end_year):
         import traceback
         traceback.print_exc()
 
+def add_worksheet_formula_notes(ws, sheet_name, start_year, end_year):
+    """
+    在工作表的数据表格下方添加公式说明区域（直接修改内存中的工作表，不读写文件）
+    
+    参数:
+        ws: openpyxl 工作表
+        sheet_name: Sheet名称
+        start_year: 起始年份
+        end_year: 结束年份
+    
+    返回:
+        添加了公式说明返回True，该Sheet没有公式说明返回False
+    """
+    from openpyxl.styles import PatternFill, Font, Alignment
+    
+    # 找到数据表格的最后一行
+    # 从最后一行向上查找，跳过可能存在的空行或公式说明行
+    max_row = ws.max_row
+    # 检查最后几行，如果包含"公式说明"字样，则向上查找
+    for row in range(max_row, max(1, max_row - 5), -1):
+        cell_value = ws.cell(row=row, column=1).value
+        if cell_value and '公式说明' in str(cell_value):
+            max_row = row - 1
+            break
+    
+    # 定义各sheet的公式说明
+    formula_notes = {}
+    
+    if sheet_name == '营收基本数据':
+        formula_notes = {
+            '金融利润（亿元）': '金融利润 = 公允价值变动收益 + 投资收益',
+            '经营利润（亿元）': '经营利润 = 归母净利润 - 金融利润',
+            'CAPEX（亿元）': 'CAPEX = 购建固定资产、无形资产和其他长期资产支付的现金（来自现金流量表）'
+        }
+    elif sheet_name == '资产负债':
+        formula_notes = {
+            '狭义无息债务（亿元）': '狭义无息债务 = 应付账款 + 预收账款 + 合同负债',
+            '广义无息债务（亿元）': '广义无息债务 = 应付账款 + 应付票据 + 预收账款 + 合同负债'
+        }
+    elif sheet_name == 'WC分析':
+        formula_notes = {
+            'WC（亿元）': 'WC = (应收账款 + 预付账款 + 存货 + 合同资产) - (应付账款 + 预收账款 + 合同负债)'
+        }
+    elif sheet_name == '固定资产投入分析':
+        formula_notes = {
+            '固定资产（亿元）': '固定资产 = 固定资产 + 在建工程 + 工程物资 - 固定资产清理',
+            '长期资产（亿元）': '长期资产 = 固定资产 + 无形资产 + 开发支出 + 使用权资产 + 商誉 + 长期待摊费用'
+        }
+    elif sheet_name == '收益率和杜邦分析':
+        formula_notes = {
+            'ROIC(%)': 'ROIC = EBIT / 投入资本 × 100，其中EBIT = 营业利润 + 利息支出，投入资本 = 总资产 - 狭义无息债务（应付账款 + 预收账款 + 合同负债）'
+        }
+    
+    # 如果没有公式说明，直接返回
+    if not formula_notes:
+        return False
+    
+    # 计算列数（科目列 + 年份列）
+    num_cols = 1 + (end_year - start_year + 1)
+    
+    # 在数据表格下方留2行空白
+    start_row = max_row + 3
+    
+    # 添加标题行
+    title_row = start_row
+    ws.merge_cells(start_row=title_row, start_column=1, end_row=title_row, end_column=num_cols)
+    title_cell = ws.cell(row=title_row, column=1)
+    title_cell.value = '公式说明'
+    title_cell.font = Font(bold=True, size=11)
+    title_cell.fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
+    title_cell.alignment = Alignment(horizontal='left', vertical='center')
+    
+    # 添加公式说明行
+    current_row = start_row + 1
+    for metric_name, formula in formula_notes.items():
+        # 合并第一列（科目列）和所有年份列
+        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=num_cols)
+        formula_cell = ws.cell(row=current_row, column=1)
+        formula_cell.value = f'{metric_name}: {formula}'
+        formula_cell.font = Font(size=10)
+        formula_cell.fill = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
+        formula_cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+        current_row += 1
+    
+    return True
+
 def main():
     # 指定股票代码和年份范围
     symbol = "603486"  # 可以修改为其他股票代码
@@ -18,6 +18,7 @@ import os
 import re
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, List, Dict
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
@@ -34,6 +35,12 @@ except ImportError:
     SELENIUM_AVAILABLE = False
     print("Warning: Selenium not installed. To use browser automation, run: pip install selenium")
 
+# 模块内共用的HTTP会话：对同一站点的多次请求复用TCP/TLS连接，
+# 连接池是线程安全的，并行下载时各线程共用
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
 def get_stock_market(symbol: str) -> str:
     """
     判断股票所属交易所
@@ -53,7 +60,8 @@ def get_stock_market(symbol: str) -> str:
     else:
         return 'SZ'  # 默认深交所
 
-def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announcement_type: str = "年度报告") -> List[Dict]:
+def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announcement_type: str = "年度报告",
+                                search_status: Optional[Dict] = None) -> List[Dict]:
     """
     从巨潮资讯网搜索公告(使用巨潮资讯网的公告查询API)
     
@@ -61,10 +69,17 @@ def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announc
         symbol: 股票代码
         year: 年份(可选，如果为None则搜索所有年份)
         announcement_type: 公告类型，默认为"年度报告"
+        search_status: 可选的字典，搜索结束后写入 'no_report'：
+            所有搜索策略都正常返回但没有匹配的年报时为 True；
+            找到年报或有请求失败（超时、网络错误、非200状态码、返回格式异常）时为 False
     
     返回:
         公告列表，每个元素包含公告信息(包括announcementId)
     """
+    if search_status is not None:
+        search_status['no_report'] = False
+    # 是否有搜索策略因请求失败而没有拿到结果（此时不能确定年报不存在）
+    request_failed = False
     symbol_clean = symbol.replace('.SZ', '').replace('.SH', '')
     
     # 判断交易所
@@ -180,13 +195,14 @@ def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announc
     # 尝试多种搜索策略
     for strategy_idx, data in enumerate(search_strategies, 1):
         try:
-            response = requests.post(search_url, headers=headers, data=data, timeout=30)
+            response = HTTP_SESSION.post(search_url, headers=headers, data=data, timeout=30)
             
             if response.status_code == 200:
                 try:
                     result = response.json()
                 except Exception as json_error:
                     print(f"  WARNING JSON解析失败: {json_error}")
+                    request_failed = True
                     continue
                 
                 announcements = []
@@ -205,6 +221,8 @@ def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announc
                             continue
                         else:
                             print(f"  WARNING 公告列表为空")
+                            if search_status is not None:
+                                search_status['no_report'] = not request_failed
                             return []
                     
                     # 筛选年度报告(排除摘要、英文版等)
@@ -269,14 +287,17 @@ def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announc
                             continue
                 else:
                     print(f"  WARNING 返回数据格式异常: {type(result)}")
+                    request_failed = True
                     continue
             else:
                 print(f"  WARNING HTTP状态码: {response.status_code}")
+                request_failed = True
                 if strategy_idx < len(search_strategies):
                     continue
                     
         except Exception as e:
             print(f"  [ERROR] 策略{strategy_idx}搜索失败: {str(e)}")
+            request_failed = True
             if strategy_idx < len(search_strategies):
                 continue
             import traceback
@@ -284,6 +305,8 @@ def search_announcements_cninfo(symbol: str, year: Optional[int] = None, announc
     
     # 所有策略都失败
     print(f"  WARNING 所有搜索策略都未找到匹配的年报")
+    if search_status is not None:
+        search_status['no_report'] = not request_failed
     return []
 
 def download_pdf_from_cninfo_url(url: str, save_dir: str = "年报PDF", filename: Optional[str] = None) -> Optional[str]:
@@ -338,7 +361,7 @@ def download_pdf_from_cninfo_url(url: str, save_dir: str = "年报PDF", filename
         for idx, download_url in enumerate(download_urls, 1):
             try:
                 print(f"[尝试下载 {idx}/{len(download_urls)}] {download_url}")
-                test_response = requests.get(download_url, headers=headers, timeout=60, stream=True, allow_redirects=True)
+                test_response = HTTP_SESSION.get(download_url, headers=headers, timeout=60, stream=True, allow_redirects=True)
                 
                 print(f"  -> 状态码: {test_response.status_code}, Content-Type: {test_response.headers.get('Content-Type', 'N/A')}, Content-Length: {test_response.headers.get('Content-Length', 'N/A')}")
                 
@@ -359,7 +382,7 @@ def download_pdf_from_cninfo_url(url: str, save_dir: str = "年报PDF", filename
                     redirect_url = test_response.headers.get('Location')
                     if redirect_url:
                         print(f"[重定向URL] {redirect_url}")
-                        redirect_response = requests.get(redirect_url, headers=headers, timeout=60, stream=True)
+                        redirect_response = HTTP_SESSION.get(redirect_url, headers=headers, timeout=60, stream=True)
                         if redirect_response.status_code == 200:
                             response = redirect_response
                             success_url = redirect_url
@@ -432,7 +455,8 @@ def download_from_cninfo_with_id(symbol: str, announcement_id: str, announcement
     
     return download_pdf_from_cninfo_url(detail_url, save_dir, filename)
 
-def download_from_cninfo(symbol: str, year: int, save_dir: str = "年报PDF") -> Optional[str]:
+def download_from_cninfo(symbol: str, year: int, save_dir: str = "年报PDF",
+                         search_status: Optional[Dict] = None) -> Optional[str]:
     """
     从巨潮资讯网下载年报PDF
     
@@ -440,6 +464,7 @@ def download_from_cninfo(symbol: str, year: int, save_dir: str = "年报PDF") ->
         symbol: 股票代码
         year: 年份
         save_dir: 保存目录
+        search_status: 可选的字典，传给 search_announcements_cninfo，用于区分"确实没有年报"和请求失败
     
     返回:
         下载的文件路径，如果失败返回None
@@ -448,7 +473,7 @@ def download_from_cninfo(symbol: str, year: int, save_dir: str = "年报PDF") ->
         os.makedirs(save_dir, exist_ok=True)
         
         # 搜索年报公告
-        announcements = search_announcements_cninfo(symbol, year)
+        announcements = search_announcements_cninfo(symbol, year, search_status=search_status)
         
         if not announcements:
             print(f"  WARNING 未找到 {year} 年的年报公告")
@@ -517,7 +542,7 @@ def download_from_cninfo(symbol: str, year: int, save_dir: str = "年报PDF") ->
         for idx, url in enumerate(download_urls, 1):
             try:
                 print(f"  [尝试下载 {idx}/{len(download_urls)}] {url[:80]}...")
-                response = requests.get(url, headers=headers, timeout=120, stream=True, allow_redirects=True)
+                response = HTTP_SESSION.get(url, headers=headers, timeout=120, stream=True, allow_redirects=True)
                 
                 if response.status_code == 200:
                     content_type = response.headers.get('Content-Type', '')
@@ -623,7 +648,8 @@ def download_from_cninfo_url(url: str, save_dir: str = "年报PDF") -> Optional[
     
     return download_pdf_from_cninfo_url(url, save_dir, filename)
 
-def download_annual_report(symbol: str, year: int, save_dir: str = "年报PDF", source: str = "auto") -> Optional[str]:
+def download_annual_report(symbol: str, year: int, save_dir: str = "年报PDF", source: str = "auto",
+                           search_status: Optional[Dict] = None) -> Optional[str]:
     """
     下载年报PDF
     
@@ -632,6 +658,7 @@ def download_annual_report(symbol: str, year: int, save_dir: str = "年报PDF",
         year: 年份
         save_dir: 保存目录
         source: 数据源，可选 'cninfo', 'sse', 'szse', 'auto'(自动选择)
+        search_status: 可选的字典，使用巨潮资讯网时写入 'no_report'（见 search_announcements_cninfo）
     
     返回:
         下载的文件路径，如果失败返回None
@@ -644,7 +671,7 @@ def download_annual_report(symbol: str, year: int, save_dir: str = "年报PDF",
     
     # 根据数据源下载
     if source == 'cninfo':
-        return download_from_cninfo(symbol_clean, year, save_dir)
+        return download_from_cninfo(symbol_clean, year, save_dir, search_status=search_status)
     elif source == 'sse':
         return download_from_sse(symbol_clean, year, save_dir)
     elif source == 'szse':
@@ -26,11 +26,17 @@ import os
 import re
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, List, Dict
 from datetime import datetime
 import argparse
 import webbrowser
 
+# 共用HTTP会话：连续下载多份披露易PDF时复用与 hkexnews.hk 的连接
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
 
 def parse_html_for_annual_reports(html_path: str) -> List[Dict]:
     """
@@ -263,7 +269,7 @@ def search_hkex_annual_reports(symbol: str, start_year: int, end_year: int) -> L
     print(f"  [搜索] 港交所披露易...")
     
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=30)
+        resp = HTTP_SESSION.get(url, params=params, headers=headers, timeout=30)
         
         if resp.status_code != 200:
             print(f"  [X] HTTP状态码: {resp.status_code}")
@@ -376,7 +382,7 @@ def download_pdf_from_url(pdf_url: str, save_path: str) -> bool:
     print(f"  [下载] {pdf_url}")
     
     try:
-        response = requests.get(pdf_url, headers=headers, timeout=300, stream=True)
+        response = HTTP_SESSION.get(pdf_url, headers=headers, timeout=300, stream=True)
         
         if response.status_code == 200:
             content_type = response.headers.get('Content-Type', '')
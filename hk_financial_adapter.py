@@ -5,14 +5,18 @@
 将港股财务数据接口适配到现有的A股财务分析框架
 """
 
+import re
 import akshare as ak
 import pandas as pd
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterable, Tuple
 from datetime import datetime
 
 # 缓存年结日信息，避免重复查询
 _fiscal_year_end_cache = {}
 
+# 报告期中的4位数字片段（前瞻匹配，相邻片段可以重叠）
+YEAR_WINDOWS_RE = re.compile(r'(?=(\d{4}))')
+
 def get_fiscal_year_end(symbol: str) -> Tuple[int, int]:
     """
     获取港股公司的年结日（财年结束日期）
@@ -412,20 +416,19 @@ def extract_profit_from_hk_indicator(analysis_indicator: pd.DataFrame) -> Option
         'REPORT_DATE': 'REPORT_DATE',  # 报告期
     }
     
-    # 创建利润表DataFrame
-    profit_data = pd.DataFrame()
-    
-    # 复制映射的字段
-    for hk_field, a_field in field_mapping.items():
-        if hk_field in analysis_indicator.columns:
-            profit_data[a_field] = analysis_indicator[hk_field]
+    # 收集映射的字段（报告期已包含在映射中）
+    columns = {
+        a_field: analysis_indicator[hk_field]
+        for hk_field, a_field in field_mapping.items()
+        if hk_field in analysis_indicator.columns
+    }
     
-    # 添加报告期字段（如果存在）
-    if 'REPORT_DATE' in analysis_indicator.columns:
-        profit_data['REPORT_DATE'] = analysis_indicator['REPORT_DATE']
-    elif 'FISCAL_YEAR' in analysis_indicator.columns:
+    if 'REPORT_DATE' not in analysis_indicator.columns and 'FISCAL_YEAR' in analysis_indicator.columns:
         # 如果没有REPORT_DATE，尝试从FISCAL_YEAR构造
-        profit_data['REPORT_DATE'] = analysis_indicator['FISCAL_YEAR']
+        columns['REPORT_DATE'] = analysis_indicator['FISCAL_YEAR']
+    
+    # 一次性创建利润表DataFrame，避免逐列插入
+    profit_data = pd.DataFrame(columns)
     
     return profit_data if not profit_data.empty else None
 
@@ -507,6 +510,70 @@ def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPO
     
     return None
 
+def extract_years_data_hk(df: pd.DataFrame, years: Iterable[int], date_col_name: str = 'REPORT_DATE',
+                          fiscal_year_end: Tuple[int, int] = None, symbol: str = None) -> Dict[int, pd.Series]:
+    """
+    从港股数据框中一次性提取多个年份的数据
+    
+    结果与对每个年份调用 extract_year_data_hk 相同，但只遍历一次报告期列，
+    不需要每个年份都对整列做字符串匹配
+    
+    参数:
+        df: 数据框（宽格式，每行一个报告期）
+        years: 年份列表（用户想要查询的自然年）
+        date_col_name: 报告期列名
+        fiscal_year_end: 年结日 (月, 日)，如果为None则尝试自动获取
+        symbol: 股票代码，用于获取年结日（如果fiscal_year_end为None）
+    
+    返回:
+        字典，格式为 {年份: 该年份的数据行（Series）}，按 years 的顺序排列；没有数据的年份不包含在内
+    """
+    if df is None or df.empty:
+        return {}
+    
+    # 查找报告期列
+    date_col = None
+    for col in df.columns:
+        if date_col_name in col or 'REPORT_DATE' in col:
+            date_col = col
+            break
+    
+    if date_col is None:
+        return {}
+    
+    # 如果没有提供年结日，尝试从symbol获取
+    if fiscal_year_end is None:
+        if symbol:
+            fiscal_year_end = get_fiscal_year_end(symbol)
+        else:
+            fiscal_year_end = (12, 31)  # 默认12月31日
+    
+    month_end, day_end = fiscal_year_end
+    date_pattern = f"{month_end:02d}-{day_end:02d}"
+    
+    # 非12月年结的公司，报告日期在下一年（规则同 extract_year_data_hk）
+    offset = 0 if month_end == 12 else 1
+    wanted = {str(year + offset): year for year in years}
+    
+    # 每个报告年份：匹配年结日的最后一行，以及只匹配年份的最后一行（宽松匹配的回退）
+    matched = {}
+    year_only = {}
+    for pos, value in enumerate(df[date_col].astype(str)):
+        if not isinstance(value, str):
+            continue
+        for year_str in set(YEAR_WINDOWS_RE.findall(value)):
+            if year_str in wanted:
+                year_only[year_str] = pos
+                if date_pattern in value:
+                    matched[year_str] = pos
+    
+    result = {}
+    for year_str, year in wanted.items():
+        pos = matched.get(year_str, year_only.get(year_str))
+        if pos is not None:
+            result[year] = df.iloc[pos]
+    return result
+
 def get_value_from_row_hk(row: pd.Series, column_name: str, default: str = "-", return_numeric: bool = True, is_percentage: bool = False):
     """
     从港股数据行中获取指定列的值
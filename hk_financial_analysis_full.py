@@ -63,6 +63,7 @@ calculate_roi_metrics = financial_analysis.calculate_roi_metrics
 calculate_asset_turnover_metrics = financial_analysis.calculate_asset_turnover_metrics
 calculate_per_capita_metrics = financial_analysis.calculate_per_capita_metrics
 save_to_excel = financial_analysis.save_to_excel
+save_all_to_excel = financial_analysis.save_all_to_excel
 
 # 但是需要替换数据获取函数
 def get_annual_data_hk_wrapper(symbol, start_year=2015, end_year=2024):
@@ -19,6 +19,7 @@ import io
 import re
 import importlib.util
 import sys
+from pathlib import Path
 
 # 动态导入财务分析模块（因为文件名以数字开头）
 spec = importlib.util.spec_from_file_location("financial_analysis", "07_财务分析.py")
@@ -836,13 +837,14 @@ elif analyze_button or ('analysis_results' in st.session_state and st.session_st
         st.info(f"📅 分析年份范围：{start_year} - {end_year}")
         
         # 提供下载按钮（如果文件存在）
-        if filepath and os.path.exists(filepath):
-            file_content = st.session_state.get('analysis_file_content')
-            if not file_content:
-                with open(filepath, "rb") as f:
-                    file_content = f.read()
-                    st.session_state['analysis_file_content'] = file_content
-            
+        file_content = st.session_state.get('analysis_file_content')
+        if filepath and not file_content:
+            try:
+                file_content = Path(filepath).read_bytes()
+                st.session_state['analysis_file_content'] = file_content
+            except FileNotFoundError:
+                file_content = None
+        if filepath and file_content:
             filename = os.path.basename(filepath)
             st.download_button(
                 label="📥 下载完整Excel报告",
@@ -1045,17 +1047,21 @@ elif analyze_button or ('analysis_results' in st.session_state and st.session_st
                 st.success(f"✅ 所有分析完成！共生成 {len(results)} 个分析模块")
                 
                 # 提供下载按钮
-                if os.path.exists(filepath):
-                    with open(filepath, "rb") as f:
-                        file_content = f.read()
-                        st.session_state['analysis_file_content'] = file_content
-                        st.download_button(
-                            label="📥 下载完整Excel报告",
-                            data=file_content,
-                            file_name=filename,
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
+                try:
+                    file_content = Path(filepath).read_bytes()
+                except FileNotFoundError:
+                    # 文件未生成时清除上一次分析的文件内容，避免下载到旧报告
+                    file_content = None
+                    st.session_state.pop('analysis_file_content', None)
+                if file_content is not None:
+                    st.session_state['analysis_file_content'] = file_content
+                    st.download_button(
+                        label="📥 下载完整Excel报告",
+                        data=file_content,
+                        file_name=filename,
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
             
             # 清除进度条
             progress_bar.empty()
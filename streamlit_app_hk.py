@@ -21,6 +21,7 @@ import io
 import re
 import importlib.util
 import sys
+from pathlib import Path
 
 # 动态导入港股财务分析模块
 spec = importlib.util.spec_from_file_location("hk_financial_analysis", "hk_financial_analysis_full.py")
@@ -705,10 +706,12 @@ if 'analysis_results' in st.session_state:
     filename = f"{company_name}_{start_year}-{end_year}_港股财务分析_{st.session_state.get('analysis_timestamp', '')}.xlsx"
     filepath = os.path.join("output", filename)
     
-    if os.path.exists(filepath):
-        with open(filepath, 'rb') as f:
-            excel_data = f.read()
-        
+    try:
+        excel_data = Path(filepath).read_bytes()
+    except FileNotFoundError:
+        excel_data = None
+    
+    if excel_data is not None:
         st.download_button(
             label="📥 下载Excel文件",
             data=excel_data,
@@ -21,13 +21,96 @@ import json
 import pdfplumber
 import pandas as pd
 from typing import Optional, Dict, List, Tuple, Any
-from pathlib import Path
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from enum import Enum
 
+# 可选：pyahocorasick 多模式匹配，一次扫描即可统计所有命中的关键词
+# 安装：pip install pyahocorasick；未安装时回退到逐个关键词查找
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # ==================== 智能算法部分 ====================
 
+# 员工数量：带千分位的数字或4-6位数字
+_EMPLOYEE_NUM = r'(?P<num>\d{1,3}(?:[,，]\d{3})+|\d{4,6})'
+
+# 高精度的文字描述模式及其置信度，按优先级排列
+# 前缀相同结构的描述合并为一个正则，每页只需一次 finditer
+EXPLICIT_TEXT_PATTERNS = [
+    # 完整的时间+员工数量描述
+    (re.compile(r'(?:截止|截至|至)\s*\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日[，,]?\s*(?:公司)?(?:在职)?员工(?:总数)?[：:]?\s*'
+                + _EMPLOYEE_NUM + r'\s*人', re.IGNORECASE | re.MULTILINE), 0.98),
+
+    # 简化但精确的员工数量描述
+    (re.compile(r'(?:公司在职员工|在职员工|员工总数|全职员工)\s*(?:总数|人数)?[：:]?\s*'
+                + _EMPLOYEE_NUM + r'\s*人', re.IGNORECASE | re.MULTILINE), 0.95),
+
+    # 更灵活的匹配：员工 XX,XXX 人 / 在职...XX,XXX人
+    (re.compile(r'(?:员工\s*|在职.*?)(?P<num>\d{1,3}[,，]\d{3})\s*人', re.IGNORECASE | re.MULTILINE), 0.92),
+
+    # 英文模式（同时覆盖 "number of employees: ..."）
+    (re.compile(r'(?:total\s+)?(?:full-time\s+)?employees?[:\s]+(?P<num>\d{1,3}(?:,\d{3})+|\d{4,6})',
+                re.IGNORECASE | re.MULTILINE), 0.90),
+]
+
+# 单元格数字提取前的清理：去掉千分位、空格和人员单位字符
+CELL_CLEANUP_RE = re.compile(r'[,， 人名位个员persons]')
+HAS_DIGIT_RE = re.compile(r'\d')
+
+# 候选结果来源文本中的明确描述特征词（时间点、合计）
+SOURCE_POSITIVE_TERMS_RE = re.compile('截止|年末|期末|合计|总数')
+
+# 候选结果来源文本中的财务数据特征词
+SOURCE_FINANCIAL_TERMS_RE = re.compile('薪酬|支付给员工|员工薪酬|职工薪酬|万元|亿|收入|利润')
+
+# 员工相关行判断的基本员工词汇（均为小写）
+BASIC_EMPLOYEE_TERMS = ('员工', '雇员', '人员', '职工', 'employee', 'staff', 'workforce')
+
+# 页面级预检：包含这些词的页面才可能含有员工数量
+EMPLOYEE_PAGE_TERMS = ('员工', '雇员', '人员', 'employee', 'staff')
+
+# 表格表头行关键词
+TABLE_HEADER_KEYWORDS = ('项目', '类别', '人数', '数量', 'Category', 'Number')
+
+# 表格行中的财务数据特征词
+TABLE_FINANCIAL_INDICATORS = (
+    '薪酬', '支付给员工', '员工薪酬', '职工薪酬', '万元', '亿', '收入', '利润',
+    '成本', '费用', '报酬', '工资', '奖金', '津贴'
+)
+
+# 模式识别时排除的财务数据上下文
+PATTERN_FINANCIAL_INDICATORS = (
+    '营业收入', '净利润', '总资产', '营收', '利润', '收入',
+    '万元', '千万', '亿元', '资产', '负债', '现金',
+    'revenue', 'profit', 'asset', 'cash',
+    # 薪酬相关排除词
+    '薪酬', '工资', '报酬', '奖金', '津贴', '补贴',
+    '社保', '公积金', '福利', '保险',
+    '成本', '费用', '支出', '开支',
+    # 添加更多财务关键词
+    '支付给员工', '员工薪酬', '职工薪酬', '人工成本'
+)
+
+
+def _company_size_bonus(count: int) -> float:
+    """按员工规模给出的评分加成"""
+    if 50000 <= count <= 200000:
+        return 0.3  # 大型企业规模
+    elif 10000 <= count <= 50000:
+        return 0.2  # 中大型企业
+    elif 5000 <= count <= 10000:
+        return 0.1  # 中型企业
+    elif 1000 <= count <= 5000:
+        return 0.05  # 小公司，轻微加分而非惩罚
+    # 移除对小公司的惩罚
+    return 0.0
+
+
 class ExtractionStrategy(Enum):
     """提取策略枚举"""
     AI_SEMANTIC = "ai_semantic"  # AI语义理解
@@ -118,25 +201,87 @@ class SmartEmployeeExtractor:
         }
 
         # 改进的数字模式 - 更精确的员工数量匹配
-        self.number_patterns = [
-            # 优先匹配带逗号的大数字(员工数量常见格式)
+        # 优先匹配带逗号的大数字(员工数量常见格式)
+        separator_number_patterns = [
             r'(?:员工|雇员|人员|职工|employees?|staff)\s*(?:总数|数量|人数|count)?\s*[：:]\s*(\d{1,3}(?:[,，]\d{3})+)\s*[人位名个]?',
             r'(\d{1,3}(?:[,，]\d{3})+)\s*[人位名个]',  # 带逗号的数字 + 人员单位
+        ]
 
-            # 明确的员工数量描述模式
+        # 明确的员工数量描述模式
+        described_number_patterns = [
             r'在职员工\s*(\d{1,6})\s*人',
             r'员工总数\s*[：:]?\s*(\d{1,6})\s*人',
             r'公司.*?在职员工\s*(\d{1,6})\s*人',
             r'截止.*?在职员工\s*(\d{1,6})\s*人',
+        ]
 
-            # 带逗号分隔符的数字
-            r'(\d{1,3}(?:[,，]\d{3})*)',
+        # 纯数字模式
+        plain_number_patterns = [
+            r'(\d{1,3}(?:[,，]\d{3})*)',  # 带逗号分隔符的数字
             r'(\d{4,6})',  # 4-6位数字(常见员工数量范围)
             r'(\d+)',  # 最后才匹配普通数字
         ]
 
+        self.number_patterns = separator_number_patterns + described_number_patterns + plain_number_patterns
+
+        # 提取前会先去掉千分位和空格，带逗号的模式不可能再命中；
+        # 单元格还会去掉"人/员"等单位字符，描述模式也不可能命中。
+        # 因此只编译清理后仍可能匹配的模式，避免无效扫描
+        self.text_number_regexes = [re.compile(pattern)
+                                    for pattern in described_number_patterns + plain_number_patterns]
+        self.cell_number_regexes = [re.compile(pattern) for pattern in plain_number_patterns]
+
+        # 员工相关行判断用的关键词自动机（pyahocorasick 可用时）
+        self.keyword_automaton = self._build_keyword_automaton() if AHOCORASICK_AVAILABLE else None
+
+        # 预先转为小写的关键词（自动机不可用时逐个查找）
+        # 中文关键词没有大小写，"keyword in text" 与 "keyword.lower() in text_lower" 等价，只需查一次
+        self.keywords_lower = {
+            category: [keyword.lower() for keyword in self.employee_keywords[category]]
+            for category in ('high_priority_keywords', 'medium_priority_keywords', 'total_indicators')
+        }
+
         self.logger.info("SmartEmployeeExtractor 初始化完成")
 
+    def _build_keyword_automaton(self):
+        """
+        将高/中优先级关键词、合计指示词和基本员工词汇合并为一个 Aho-Corasick 自动机
+
+        关键词统一转为小写后加入，值为 (类别, 该小写关键词在类别中出现的次数)，
+        以保持与逐个关键词检查完全一致的计分（如 "Total" 和 "total"）。
+        """
+        # {小写关键词: {类别: 次数}}，同一个词可能属于多个类别
+        weights = {}
+        keyword_groups = [(category, self.employee_keywords[category])
+                          for category in ('high_priority_keywords', 'medium_priority_keywords', 'total_indicators')]
+        keyword_groups.append(('basic_terms', BASIC_EMPLOYEE_TERMS))
+
+        for category, keywords in keyword_groups:
+            for keyword in keywords:
+                category_weights = weights.setdefault(keyword.lower(), {})
+                category_weights[category] = category_weights.get(category, 0) + 1
+
+        automaton = ahocorasick.Automaton()
+        for keyword_lower, category_weights in weights.items():
+            automaton.add_word(keyword_lower, (keyword_lower, tuple(category_weights.items())))
+
+        automaton.make_automaton()
+        return automaton
+
+    def _count_keyword_matches(self, text_lower: str) -> Dict[str, int]:
+        """一次扫描统计各类别命中的关键词数量（每个关键词最多计一次）"""
+        counts = {'high_priority_keywords': 0, 'medium_priority_keywords': 0, 'total_indicators': 0, 'basic_terms': 0}
+        seen = set()
+
+        for _, (keyword_lower, entries) in self.keyword_automaton.iter(text_lower):
+            if keyword_lower in seen:
+                continue
+            seen.add(keyword_lower)
+            for category, weight in entries:
+                counts[category] += weight
+
+        return counts
+
     def setup_logging(self):
         """设置日志系统"""
         self.logger = logging.getLogger(__name__)
@@ -202,13 +347,36 @@ class SmartEmployeeExtractor:
             if verbose:
                 print(f"PDF总页数: {total_pages}")
 
-            # 多策略提取
-            strategies_results = self._apply_multiple_strategies(pdf, verbose)
+            # 每页只解析一次，各策略共享解析结果
+            pages_cache = self._load_pages(pdf)
 
-            # 合并和验证结果
-            final_result = self._validate_and_merge_results(strategies_results)
+        # 多策略提取
+        strategies_results = self._apply_multiple_strategies(pages_cache, verbose)
 
-            return final_result
+        # 合并和验证结果
+        final_result = self._validate_and_merge_results(strategies_results)
+
+        return final_result
+
+    def _load_pages(self, pdf) -> List[Tuple[int, str, List]]:
+        """
+        逐页提取文本和表格
+
+        每页提取完毕后立即释放 pdfminer 的页面对象缓存，
+        峰值内存只保留单页的解析状态，避免数百页的年报占用过多内存。
+
+        返回:
+            [(页码, 文本, 表格列表), ...]，页码从1开始
+        """
+        pages_cache = []
+
+        for page_num, page in enumerate(pdf.pages, 1):
+            text = page.extract_text() or ''
+            tables = page.extract_tables()
+            pages_cache.append((page_num, text, tables))
+            page.flush_cache()
+
+        return pages_cache
 
     def _extract_with_legacy_algorithm(self, pdf_path: str, verbose: bool = False) -> Optional[EmployeeData]:
         """使用传统算法提取（兼容原有代码）"""
@@ -231,112 +399,72 @@ class SmartEmployeeExtractor:
 
     # ==================== 智能算法核心方法 ====================
 
-    def _apply_multiple_strategies(self, pdf, verbose: bool = False) -> List[EmployeeData]:
-        """应用多种提取策略"""
+    def _apply_multiple_strategies(self, pages_cache: List[Tuple[int, str, List]],
+                                   verbose: bool = False) -> List[EmployeeData]:
+        """应用多种提取策略，pages_cache 为 _load_pages 的返回结果"""
         results = []
 
         # 策略0: 优先处理明确的文字描述
-        text_description_result = self._extract_from_explicit_text_description(pdf, verbose)
+        text_description_result = self._extract_from_explicit_text_description(pages_cache, verbose)
         if text_description_result:
             results.append(text_description_result)
 
         # 策略1: AI语义理解（如果可用）
-        ai_result = self._extract_with_ai_semantic(pdf, verbose)
+        ai_result = self._extract_with_ai_semantic(pages_cache, verbose)
         if ai_result:
             results.append(ai_result)
 
         # 策略2: 增强的关键词匹配
-        keyword_result = self._extract_with_enhanced_keywords(pdf, verbose)
+        keyword_result = self._extract_with_enhanced_keywords(pages_cache, verbose)
         if keyword_result:
             results.append(keyword_result)
 
         # 策略3: 智能表格分析
-        table_result = self._extract_with_smart_table_analysis(pdf, verbose)
+        table_result = self._extract_with_smart_table_analysis(pages_cache, verbose)
         if table_result:
             results.append(table_result)
 
         # 策略4: 模式识别
-        pattern_result = self._extract_with_pattern_recognition(pdf, verbose)
+        pattern_result = self._extract_with_pattern_recognition(pages_cache, verbose)
         if pattern_result:
             results.append(pattern_result)
 
         return results
 
-    def _extract_from_explicit_text_description(self, pdf, verbose: bool = False) -> Optional[EmployeeData]:
+    def _extract_from_explicit_text_description(self, pages_cache, verbose: bool = False) -> Optional[EmployeeData]:
         """从明确的文字描述中提取员工数量"""
         if verbose:
             print("  [文字描述] 寻找明确的员工数量文字描述...")
 
-        # 高精度的文字描述模式
-        text_patterns = [
-            # 完整的时间+员工数量描述
-            r'截止\s*(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日[，,]?\s*(?:公司)?在职员工\s*(\d{1,3}(?:[,，]\d{3})+|\d{4,6})\s*人',
-            r'(?:至|截至)\s*(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日[，,]?\s*(?:公司)?(?:在职)?员工(?:总数)?[：:]?\s*(\d{1,3}(?:[,，]\d{3})+|\d{4,6})\s*人',
-
-            # 简化但精确的员工数量描述
-            r'公司在职员工\s*(\d{1,3}(?:[,，]\d{3})+|\d{4,6})\s*人',
-            r'在职员工\s*(?:总数|人数)?[：:]?\s*(\d{1,3}(?:[,，]\d{3})+|\d{4,6})\s*人',
-            r'员工总数\s*[：:]?\s*(\d{1,3}(?:[,，]\d{3})+|\d{4,6})\s*人',
-            r'全职员工\s*(?:总数)?[：:]?\s*(\d{1,3}(?:[,，]\d{3})+|\d{4,6})\s*人',
-
-            # 更灵活的匹配
-            r'员工\s*(\d{1,3}[,，]\d{3})\s*人',  # 专门匹配 XX,XXX 格式
-            r'在职.*?(\d{1,3}[,，]\d{3})\s*人', # 在职...XX,XXX人
-
-            # 英文模式
-            r'(?:total\s+)?(?:full-time\s+)?employees?[:\s]+(\d{1,3}(?:,\d{3})+|\d{4,6})',
-            r'number\s+of\s+employees?[:\s]+(\d{1,3}(?:,\d{3})+|\d{4,6})',
-        ]
-
         best_candidate = None
 
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
+        for page_num, text, tables in pages_cache:
             if not text:
                 continue
 
             # 检查是否包含员工相关内容
-            if not any(keyword in text for keyword in ['员工', '雇员', '人员', 'employee', 'staff']):
+            if not any(keyword in text for keyword in EMPLOYEE_PAGE_TERMS):
                 continue
 
             if verbose:
                 print(f"    第{page_num}页检查明确文字描述...")
 
-            # 逐个匹配高精度模式
-            for pattern_idx, pattern in enumerate(text_patterns):
-                matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
+            # 同一页的合理范围只需计算一次
+            bounds = self._employee_count_bounds(text)
 
-                for match in matches:
+            # 逐个匹配高精度模式，置信度由模式类型决定
+            for pattern_idx, (pattern, confidence) in enumerate(EXPLICIT_TEXT_PATTERNS):
+                for match in pattern.finditer(text):
                     try:
                         # 提取并清理数字
-                        groups = match.groups()
-                        if len(groups) > 1:
-                            # 对于时间+员工数的模式，最后一个组是员工数
-                            num_str = groups[-1]
-                        else:
-                            # 对于简单模式，第一个组是员工数
-                            num_str = groups[0]
-
+                        num_str = match.group('num')
                         num_str = num_str.replace(',', '').replace('，', '').replace(' ', '')
                         num = int(num_str)
 
                         # 验证数值合理性
-                        if not self._is_reasonable_employee_count(num, text):
+                        if not self._is_reasonable_employee_count(num, bounds=bounds):
                             continue
 
-                        # 计算置信度
-                        confidence = 0.95  # 基础高置信度
-
-                        # 根据模式类型调整置信度
-                        if pattern_idx <= 1:  # 完整的时间+描述
-                            confidence = 0.98
-                        elif pattern_idx <= 5:  # 标准员工描述
-                            confidence = 0.95
-                        elif pattern_idx <= 7:  # 灵活匹配
-                            confidence = 0.92
-                        else:  # 英文模式
-                            confidence = 0.90
-
                         # 提取匹配的上下文
                         match_start = max(0, match.start() - 50)
                         match_end = min(len(text), match.end() + 50)
@@ -365,22 +493,21 @@ class SmartEmployeeExtractor:
 
         return best_candidate
 
-    def _extract_with_ai_semantic(self, pdf, verbose: bool = False) -> Optional[EmployeeData]:
+    def _extract_with_ai_semantic(self, pages_cache, verbose: bool = False) -> Optional[EmployeeData]:
         """使用AI语义理解提取员工数量（占位符）"""
         if verbose:
             print("  [AI] 尝试AI语义理解...")
         # 这里可以接入大语言模型API
         return None
 
-    def _extract_with_enhanced_keywords(self, pdf, verbose: bool = False) -> Optional[EmployeeData]:
+    def _extract_with_enhanced_keywords(self, pages_cache, verbose: bool = False) -> Optional[EmployeeData]:
         """使用增强的关键词匹配提取员工数量"""
         if verbose:
             print("  [关键词] 使用增强关键词匹配...")
 
         best_candidate = None
 
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
+        for page_num, text, tables in pages_cache:
             if not text:
                 continue
 
@@ -392,9 +519,6 @@ class SmartEmployeeExtractor:
             if verbose:
                 print(f"    第{page_num}页发现员工相关内容")
 
-            # 提取表格
-            tables = page.extract_tables()
-
             for table_idx, table in enumerate(tables):
                 candidate = self._analyze_table_with_enhanced_logic(
                     table, page_num, f"表格{table_idx+1}", verbose
@@ -414,15 +538,14 @@ class SmartEmployeeExtractor:
 
         return best_candidate
 
-    def _extract_with_smart_table_analysis(self, pdf, verbose: bool = False) -> Optional[EmployeeData]:
+    def _extract_with_smart_table_analysis(self, pages_cache, verbose: bool = False) -> Optional[EmployeeData]:
         """使用智能表格分析提取员工数量"""
         if verbose:
             print("  [表格] 使用智能表格分析...")
 
         best_candidate = None
 
-        for page_num, page in enumerate(pdf.pages, 1):
-            tables = page.extract_tables()
+        for page_num, _, tables in pages_cache:
 
             for table_idx, table in enumerate(tables):
                 # 分析表格结构和内容
@@ -438,7 +561,7 @@ class SmartEmployeeExtractor:
 
         return best_candidate
 
-    def _extract_with_pattern_recognition(self, pdf, verbose: bool = False) -> Optional[EmployeeData]:
+    def _extract_with_pattern_recognition(self, pages_cache, verbose: bool = False) -> Optional[EmployeeData]:
         """使用模式识别提取员工数量"""
         if verbose:
             print("  [模式] 使用模式识别...")
@@ -455,15 +578,17 @@ class SmartEmployeeExtractor:
 
         best_candidate = None
 
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text()
+        for page_num, text, tables in pages_cache:
             if not text:
                 continue
 
             # 必须包含员工相关内容才进行模式匹配
-            if not any(keyword in text for keyword in ['员工', '雇员', '人员', 'employee', 'staff']):
+            if not any(keyword in text for keyword in EMPLOYEE_PAGE_TERMS):
                 continue
 
+            bounds = self._employee_count_bounds(text)
+            has_section_context = '员工情况' in text or '人员构成' in text
+
             for pattern in patterns:
                 matches = re.finditer(pattern, text, re.IGNORECASE)
 
@@ -473,7 +598,7 @@ class SmartEmployeeExtractor:
                         num = int(num_str)
 
                         # 验证数值合理性
-                        if not self._is_reasonable_employee_count(num, text):
+                        if not self._is_reasonable_employee_count(num, bounds=bounds):
                             if verbose:
                                 print(f"    跳过不合理数值: {num:,}")
                             continue
@@ -481,30 +606,17 @@ class SmartEmployeeExtractor:
                         # 检查上下文，避免财务数据
                         match_context = text[max(0, match.start()-150):match.end()+150]
 
-                        # 排除明显的财务数据上下文
-                        financial_indicators = [
-                            '营业收入', '净利润', '总资产', '营收', '利润', '收入',
-                            '万元', '千万', '亿元', '资产', '负债', '现金',
-                            'revenue', 'profit', 'asset', 'cash',
-                            # 薪酬相关排除词
-                            '薪酬', '工资', '报酬', '奖金', '津贴', '补贴',
-                            '社保', '公积金', '福利', '保险',
-                            '成本', '费用', '支出', '开支',
-                            # 添加更多财务关键词
-                            '支付给员工', '员工薪酬', '职工薪酬', '人工成本'
-                        ]
-
                         # 检查是否包含小数点（通常表示金额）
                         has_decimal = '.' in match.group(0) or '，' in match.group(0)
 
                         # 如果上下文包含财务关键词或数值包含小数点，跳过
-                        if any(indicator in match_context for indicator in financial_indicators) or has_decimal:
+                        if has_decimal or any(indicator in match_context for indicator in PATTERN_FINANCIAL_INDICATORS):
                             if verbose:
                                 reason = "包含小数点" if has_decimal else "上下文包含财务关键词"
                                 print(f"    跳过财务数据: {num:,} ({reason})")
                             continue
 
-                        confidence = self._calculate_pattern_confidence(match.group(0), text)
+                        confidence = self._calculate_pattern_confidence(match.group(0), has_section_context)
 
                         candidate = EmployeeData(
                             count=num,
@@ -524,8 +636,16 @@ class SmartEmployeeExtractor:
 
     # ==================== 辅助方法 ====================
 
-    def _is_reasonable_employee_count(self, num: int, context: str = None) -> bool:
-        """判断数字是否是合理的员工数量"""
+    def _is_reasonable_employee_count(self, num: int, context: str = None,
+                                      bounds: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        判断数字是否是合理的员工数量
+
+        参数:
+            num: 待判断的数字
+            context: 上下文文本，用于确定合理范围
+            bounds: 预先计算好的 (最小值, 最大值)，同一上下文批量判断时传入可避免重复扫描上下文
+        """
         # 排除明显的年份数字（年报常见年份 1990-2030），避免误把年份当员工数
         if 1990 <= num <= 2030:
             return False
@@ -533,25 +653,23 @@ class SmartEmployeeExtractor:
         if num in (0, 9999, 99999, 999999, 9999999):
             return False
 
-        # 根据上下文调整合理范围
+        min_count, max_count = bounds or self._employee_count_bounds(context)
+        return min_count <= num <= max_count
+
+    def _employee_count_bounds(self, context: str = None) -> Tuple[int, int]:
+        """根据上下文确定员工数量的合理范围 (最小值, 最大值)"""
         if context:
             # 检查是否为超大型公司(比亚迪等)
             if any(company in context for company in ['比亚迪', 'BYD']):
-                min_count = 150000
-                max_count = 200000
+                return 150000, 200000
             # 检查是否为大型上市公司
             elif any(keyword in context for keyword in ['上市', '股份', '集团', '有限公司']):
-                min_count = 1000  # 降低到1000以包含小公司
-                max_count = 200000
+                return 1000, 200000  # 降低到1000以包含小公司
             else:
-                min_count = 500   # 进一步降低到500
-                max_count = 100000
-        else:
-            # 默认范围，包含小公司
-            min_count = 500
-            max_count = 200000
+                return 500, 100000   # 进一步降低到500
 
-        return min_count <= num <= max_count
+        # 默认范围，包含小公司
+        return 500, 200000
 
     def _check_employee_content(self, text: str) -> bool:
         """检查文本是否包含员工相关内容"""
@@ -569,7 +687,7 @@ class SmartEmployeeExtractor:
         if not table or len(table) < 2:
             return None
 
-        candidates = []
+        best_candidate = None
 
         # 遍历每一行，寻找员工数量信息
         for row_idx, row in enumerate(table):
@@ -586,17 +704,16 @@ class SmartEmployeeExtractor:
 
                 # 提取行中的数字
                 numbers = self._extract_numbers_from_row(row)
+                bounds = self._employee_count_bounds(row_text)
 
-                for num in numbers:
-                    # 检查是否为财务数据 - 增强检测
-                    financial_indicators = ['薪酬', '支付给员工', '员工薪酬', '职工薪酬', '万元', '亿', '收入', '利润', '成本', '费用', '报酬', '工资', '奖金', '津贴']
-                    has_financial_keyword = any(indicator in row_text for indicator in financial_indicators)
-
-                    # 检查是否包含小数点（在原始单元格中）- 更严格的检测
-                    has_decimal = any('.' in str(cell) for cell in row if cell and str(cell).replace(',', '').replace(' ', '').replace(str(num), '').count('.') > 0)
+                # 行级别的财务特征与数字无关，每行只检查一次
+                has_financial_keyword = any(indicator in row_text for indicator in TABLE_FINANCIAL_INDICATORS)
+                is_salary_row = '薪酬' in row_text or '支付给员工' in row_text
+                is_headcount_row = '员工人数' in row_text or '在职员工' in row_text
 
+                for num in numbers:
                     # 如果行文本包含 "薪酬" 或 "支付给员工"，强制跳过
-                    if '薪酬' in row_text or '支付给员工' in row_text:
+                    if is_salary_row:
                         if verbose:
                             print(f"        跳过薪酬数据: {num:,} (行包含薪酬关键词)")
                         continue
@@ -613,29 +730,28 @@ class SmartEmployeeExtractor:
                             print(f"        跳过财务数据: {num:,} (原始单元格包含小数)")
                         continue
 
-                    if has_financial_keyword and not ('员工人数' in row_text or '在职员工' in row_text):
+                    if has_financial_keyword and not is_headcount_row:
                         if verbose:
                             print(f"        跳过财务数据: {num:,} (包含财务关键词)")
                         continue
 
-                    if self._is_reasonable_employee_count(num, row_text):
+                    if self._is_reasonable_employee_count(num, bounds=bounds):
                         # 计算置信度，考虑匹配强度
                         base_confidence = self._calculate_table_confidence(row_text, row_idx, len(table))
                         confidence = min(base_confidence * (1 + match_strength), 1.0)
 
-                        candidates.append(EmployeeData(
-                            count=num,
-                            page_number=page_num,
-                            source_text=f"{source}: {row_text[:50]}...",
-                            confidence=confidence,
-                            extraction_strategy=ExtractionStrategy.KEYWORD_MATCHING
-                        ))
-
-        # 返回置信度最高的候选，置信度相同时选择更大的数值
-        if candidates:
-            return max(candidates, key=lambda x: (x.confidence, x.count))
+                        # 只保留置信度最高的候选，置信度相同时选择更大的数值
+                        if best_candidate is None or \
+                           (confidence, num) > (best_candidate.confidence, best_candidate.count):
+                            best_candidate = EmployeeData(
+                                count=num,
+                                page_number=page_num,
+                                source_text=f"{source}: {row_text[:50]}...",
+                                confidence=confidence,
+                                extraction_strategy=ExtractionStrategy.KEYWORD_MATCHING
+                            )
 
-        return None
+        return best_candidate
 
     def _deep_analyze_table_structure(self, table: List[List], page_num: int,
                                     source: str, verbose: bool = False) -> Optional[EmployeeData]:
@@ -672,16 +788,19 @@ class SmartEmployeeExtractor:
             row_text = ' '.join([str(cell) if cell else '' for cell in row])
 
             # 检查是否为表头行
-            if any(keyword in row_text for keyword in ['项目', '类别', '人数', '数量', 'Category', 'Number']):
+            if any(keyword in row_text for keyword in TABLE_HEADER_KEYWORDS):
                 features['header_row_idx'] = row_idx
 
+            # 小写文本每行只计算一次，员工行判断和合计行判断共用
+            row_lower = row_text.lower()
+
             # 检查是否为员工数据相关行
-            is_employee_related, _ = self._is_employee_related_row(row_text)
+            is_employee_related, _ = self._is_employee_related_row(row_text, row_lower)
             if is_employee_related:
                 features['has_employee_data'] = True
 
-            # 检查是否为合计行
-            if '合计' in row_text or 'Total' in row_text or 'total' in row_text.lower():
+            # 检查是否为合计行（"Total" 已被小写后的 "total" 覆盖）
+            if '合计' in row_text or 'total' in row_lower:
                 features['total_row_idx'] = row_idx
 
             # 分析数字列
@@ -701,6 +820,7 @@ class SmartEmployeeExtractor:
         if structure_info['total_row_idx'] >= 0:
             total_row = table[structure_info['total_row_idx']]
             numbers = self._extract_numbers_from_row(total_row)
+            bounds = self._employee_count_bounds(f"{source}: 合计行")
 
             for num in numbers:
                 # 检查合计行是否为财务数据
@@ -715,17 +835,15 @@ class SmartEmployeeExtractor:
                 if has_decimal:
                     continue
 
-                if self._is_reasonable_employee_count(num, f"{source}: 合计行"):
-                    candidate = EmployeeData(
-                        count=num,
-                        page_number=page_num,
-                        source_text=f"{source}: 合计行",
-                        confidence=0.9,  # 合计行置信度较高
-                        extraction_strategy=ExtractionStrategy.TABLE_ANALYSIS
-                    )
-
+                if self._is_reasonable_employee_count(num, bounds=bounds):
                     if not best_candidate or num > best_candidate.count:
-                        best_candidate = candidate
+                        best_candidate = EmployeeData(
+                            count=num,
+                            page_number=page_num,
+                            source_text=f"{source}: 合计行",
+                            confidence=0.9,  # 合计行置信度较高
+                            extraction_strategy=ExtractionStrategy.TABLE_ANALYSIS
+                        )
 
         # 如果合计行没找到，从其他员工相关行提取
         if not best_candidate:
@@ -738,21 +856,18 @@ class SmartEmployeeExtractor:
                 is_employee_related, match_strength = self._is_employee_related_row(row_text)
                 if is_employee_related:
                     numbers = self._extract_numbers_from_row(row)
+                    bounds = self._employee_count_bounds(row_text)
 
                     for num in numbers:
-                        if self._is_reasonable_employee_count(num, row_text):
-                            confidence = 0.7 * (1 + match_strength * 0.5)  # 非合计行置信度稍低
-
-                            candidate = EmployeeData(
-                                count=num,
-                                page_number=page_num,
-                                source_text=f"{source}: {row_text[:30]}...",
-                                confidence=confidence,
-                                extraction_strategy=ExtractionStrategy.TABLE_ANALYSIS
-                            )
-
+                        if self._is_reasonable_employee_count(num, bounds=bounds):
                             if not best_candidate or num > best_candidate.count:
-                                best_candidate = candidate
+                                best_candidate = EmployeeData(
+                                    count=num,
+                                    page_number=page_num,
+                                    source_text=f"{source}: {row_text[:30]}...",
+                                    confidence=0.7 * (1 + match_strength * 0.5),  # 非合计行置信度稍低
+                                    extraction_strategy=ExtractionStrategy.TABLE_ANALYSIS
+                                )
 
         return best_candidate
 
@@ -766,8 +881,9 @@ class SmartEmployeeExtractor:
             if not line:
                 continue
 
-            # 检查是否包含员工相关信息
-            is_employee_related, match_strength = self._is_employee_related_row(line)
+            # 检查是否包含员工相关信息（小写文本在本行的各项检查中共用）
+            line_lower = line.lower()
+            is_employee_related, match_strength = self._is_employee_related_row(line, line_lower)
             if is_employee_related:
                 if verbose:
                     print(f"      文本行 (强度: {match_strength:.2f}): {line[:50]}...")
@@ -777,54 +893,61 @@ class SmartEmployeeExtractor:
                 search_text = ' '.join(search_lines)
 
                 numbers = self._extract_numbers_from_text(search_text)
+                bounds = self._employee_count_bounds(line)
 
-                for num in numbers:
-                    if self._is_reasonable_employee_count(num, line):
-                        confidence = self._calculate_text_confidence(line, search_text, match_strength)
-
-                        candidate = EmployeeData(
-                            count=num,
-                            page_number=page_num,
-                            source_text=line[:50] + "...",
-                            confidence=confidence,
-                            extraction_strategy=ExtractionStrategy.KEYWORD_MATCHING
-                        )
+                # 置信度只与行文本和上下文有关，每行计算一次
+                confidence = self._calculate_text_confidence(line, search_text, match_strength, line_lower)
 
+                for num in numbers:
+                    if self._is_reasonable_employee_count(num, bounds=bounds):
                         if not best_candidate or confidence > best_candidate.confidence or \
                            (confidence == best_candidate.confidence and num > best_candidate.count):
-                            best_candidate = candidate
+                            best_candidate = EmployeeData(
+                                count=num,
+                                page_number=page_num,
+                                source_text=line[:50] + "...",
+                                confidence=confidence,
+                                extraction_strategy=ExtractionStrategy.KEYWORD_MATCHING
+                            )
 
         return best_candidate
 
-    def _is_employee_related_row(self, text: str) -> Tuple[bool, float]:
-        """判断是否为员工相关行，并返回匹配强度"""
-        text_lower = text.lower()
+    def _is_employee_related_row(self, text: str, text_lower: Optional[str] = None) -> Tuple[bool, float]:
+        """判断是否为员工相关行，并返回匹配强度（text_lower 为调用方已算好的小写文本）"""
+        if text_lower is None:
+            text_lower = text.lower()
         match_score = 0.0
 
-        # 检查高优先级关键词
-        high_priority_matches = 0
-        for keyword in self.employee_keywords['high_priority_keywords']:
-            if keyword in text or keyword.lower() in text_lower:
-                high_priority_matches += 1
-                match_score += 0.4
-
-        # 检查中等优先级关键词
-        medium_priority_matches = 0
-        for keyword in self.employee_keywords['medium_priority_keywords']:
-            if keyword in text or keyword.lower() in text_lower:
-                medium_priority_matches += 1
-                match_score += 0.2
-
-        # 检查合计指示词（大幅加分）
-        total_indicator_matches = 0
-        for indicator in self.employee_keywords['total_indicators']:
-            if indicator in text or indicator.lower() in text_lower:
-                total_indicator_matches += 1
-                match_score += 0.3
-
-        # 基本员工相关词汇
-        basic_employee_terms = ['员工', '雇员', '人员', '职工', 'employee', 'staff', 'workforce']
-        basic_matches = sum(1 for term in basic_employee_terms if term in text or term in text_lower)
+        if self.keyword_automaton is not None:
+            # 一次扫描统计四类关键词的命中数
+            counts = self._count_keyword_matches(text_lower)
+            high_priority_matches = counts['high_priority_keywords']
+            medium_priority_matches = counts['medium_priority_keywords']
+            total_indicator_matches = counts['total_indicators']
+            basic_matches = counts['basic_terms']
+        else:
+            # 检查高优先级关键词
+            high_priority_matches = sum(
+                1 for keyword in self.keywords_lower['high_priority_keywords'] if keyword in text_lower
+            )
+
+            # 检查中等优先级关键词
+            medium_priority_matches = sum(
+                1 for keyword in self.keywords_lower['medium_priority_keywords'] if keyword in text_lower
+            )
+
+            # 检查合计指示词
+            total_indicator_matches = sum(
+                1 for indicator in self.keywords_lower['total_indicators'] if indicator in text_lower
+            )
+
+            # 基本员工相关词汇（均为小写，只需在小写文本中查找）
+            basic_matches = sum(1 for term in BASIC_EMPLOYEE_TERMS if term in text_lower)
+
+        # 高优先级 0.4、中等优先级 0.2、合计指示词 0.3（大幅加分）
+        match_score += 0.4 * high_priority_matches
+        match_score += 0.2 * medium_priority_matches
+        match_score += 0.3 * total_indicator_matches
 
         if basic_matches > 0:
             match_score += 0.1 * basic_matches
@@ -846,21 +969,12 @@ class SmartEmployeeExtractor:
             if cell is None:
                 continue
 
-            cell_str = str(cell).strip()
-
-            # 清理文本
-            cell_str = cell_str.replace(',', '').replace('，', '').replace(' ', '')
-            cell_str = re.sub(r'[人名位个员persons]', '', cell_str)
+            # 清理文本：一次去掉千分位、空格和人员单位字符
+            cell_str = CELL_CLEANUP_RE.sub('', str(cell))
 
-            # 提取数字
-            for pattern in self.number_patterns:
-                matches = re.findall(pattern, cell_str)
-                for match in matches:
-                    try:
-                        num = int(match.replace(',', '').replace('，', ''))
-                        numbers.append(num)
-                    except ValueError:
-                        continue
+            # 提取数字：清理后匹配结果只含数字，int() 不会失败
+            for regex in self.cell_number_regexes:
+                numbers.extend(map(int, regex.findall(cell_str)))
 
         return numbers
 
@@ -868,17 +982,12 @@ class SmartEmployeeExtractor:
         """从文本中提取数字"""
         numbers = []
 
-        # 清理文本
+        # 清理文本（只删3个字符时，连续 replace 比正则和 str.translate 都快）
         text = text.replace(',', '').replace('，', '').replace(' ', '')
 
-        for pattern in self.number_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                try:
-                    num = int(match.replace(',', '').replace('，', ''))
-                    numbers.append(num)
-                except ValueError:
-                    continue
+        # 千分位已去掉，所有模式的捕获组都只含数字，int() 不会失败
+        for regex in self.text_number_regexes:
+            numbers.extend(map(int, regex.findall(text)))
 
         return numbers
 
@@ -887,13 +996,8 @@ class SmartEmployeeExtractor:
         if cell is None:
             return False
 
-        cell_str = str(cell).strip().replace(',', '').replace('，', '')
-
-        try:
-            int(cell_str)
-            return True
-        except ValueError:
-            return bool(re.search(r'\d+', cell_str))
+        # 能被 int() 解析的单元格必然含有数字，直接检查是否含数字即可，省去异常开销
+        return HAS_DIGIT_RE.search(str(cell)) is not None
 
     def _calculate_table_confidence(self, row_text: str, row_idx: int, total_rows: int) -> float:
         """计算表格提取的置信度"""
@@ -917,14 +1021,15 @@ class SmartEmployeeExtractor:
 
         return min(confidence, 1.0)
 
-    def _calculate_text_confidence(self, line: str, context: str, match_strength: float = 0.0) -> float:
-        """计算文本提取的置信度"""
+    def _calculate_text_confidence(self, line: str, context: str, match_strength: float = 0.0,
+                                   line_lower: Optional[str] = None) -> float:
+        """计算文本提取的置信度（line_lower 为调用方已算好的小写行文本）"""
         confidence = 0.4  # 文本提取基础置信度稍低
 
         # 关键词匹配加分
         if any(indicator in line for indicator in self.employee_keywords['total_indicators']):
             confidence += 0.4
-        elif '总数' in line or 'total' in line.lower():
+        elif '总数' in line or 'total' in (line_lower if line_lower is not None else line.lower()):
             confidence += 0.2
 
         # 上下文相关性
@@ -936,8 +1041,14 @@ class SmartEmployeeExtractor:
 
         return min(confidence, 1.0)
 
-    def _calculate_pattern_confidence(self, matched_text: str, full_text: str) -> float:
-        """计算模式识别的置信度"""
+    def _calculate_pattern_confidence(self, matched_text: str, has_section_context: bool) -> float:
+        """
+        计算模式识别的置信度
+
+        参数:
+            matched_text: 匹配到的文本
+            has_section_context: 所在页面是否包含"员工情况"/"人员构成"，由调用方按页计算一次
+        """
         confidence = 0.6  # 模式匹配基础置信度
 
         # 匹配文本质量
@@ -945,7 +1056,7 @@ class SmartEmployeeExtractor:
             confidence += 0.2
 
         # 上下文质量
-        if '员工情况' in full_text or '人员构成' in full_text:
+        if has_section_context:
             confidence += 0.1
 
         return min(confidence, 1.0)
@@ -955,59 +1066,51 @@ class SmartEmployeeExtractor:
         if not results:
             return None
 
-        # 第一级过滤：移除明显不合理的结果
-        reasonable_results = []
+        # 第一级过滤 + 第二级分层，一次遍历完成：
+        #   层0 明确文字描述（关键词匹配且置信度>=0.9）
+        #   层1 高置信度（>=0.8）
+        #   层2 中等置信度（0.6~0.8）
+        #   层3 其他合理结果
+        # 优先使用层级最高的非空层；前面的层都为空时，后面的层就等于原来的整组结果
+        # 只保留目前最高层的结果，出现更高层时丢弃已收集的低层结果
+        candidate_results = []
+        best_tier = 4
         for result in results:
-            # 严格的数值验证
-            if result.count < 500:  # 调整为500以支持小公司
+            # 严格的数值验证：500以上以支持小公司，300000以下避免异常大的财务数据
+            if not 500 <= result.count <= 300000:
                 continue
-            if result.count > 300000:  # 避免异常大的财务数据
-                continue
-            reasonable_results.append(result)
 
-        if not reasonable_results:
+            if result.extraction_strategy == ExtractionStrategy.KEYWORD_MATCHING and result.confidence >= 0.9:
+                tier = 0
+            elif result.confidence >= 0.8:
+                tier = 1
+            elif result.confidence >= 0.6:
+                tier = 2
+            else:
+                tier = 3
+
+            if tier < best_tier:
+                best_tier = tier
+                candidate_results = [result]
+            elif tier == best_tier:
+                candidate_results.append(result)
+
+        if not candidate_results:
             # 如果都被过滤掉了，选择原始结果中最大的合理值
             valid_results = [r for r in results if 200 <= r.count <= 300000]
             if valid_results:
                 return max(valid_results, key=lambda x: x.count)
             return max(results, key=lambda x: x.confidence) if results else None
 
-        # 第二级筛选：按策略和置信度分层
-        explicit_text_results = [r for r in reasonable_results
-                               if r.extraction_strategy == ExtractionStrategy.KEYWORD_MATCHING
-                               and r.confidence >= 0.9]
-
-        high_confidence_results = [r for r in reasonable_results if r.confidence >= 0.8]
-        medium_confidence_results = [r for r in reasonable_results if 0.6 <= r.confidence < 0.8]
-
-        # 优先使用明确文字描述的结果
-        if explicit_text_results:
-            candidate_results = explicit_text_results
-        elif high_confidence_results:
-            candidate_results = high_confidence_results
-        elif medium_confidence_results:
-            candidate_results = medium_confidence_results
-        else:
-            candidate_results = reasonable_results
-
         # 第三级筛选：在候选结果中选择最合理的
         def enhanced_scoring_function(result):
             score = result.confidence
 
             # 数值大小加分（但不歧视小公司）
-            if 50000 <= result.count <= 200000:
-                score += 0.3  # 大型企业规模
-            elif 10000 <= result.count <= 50000:
-                score += 0.2  # 中大型企业
-            elif 5000 <= result.count <= 10000:
-                score += 0.1  # 中型企业
-            elif 1000 <= result.count <= 5000:
-                score += 0.05  # 小公司，轻微加分而非惩罚
-            # 移除对小公司的惩罚
+            score += _company_size_bonus(result.count)
 
             # 明确文字描述额外加分
-            if (result.source_text and
-                any(keyword in result.source_text for keyword in ['截止', '年末', '期末', '合计', '总数'])):
+            if result.source_text and SOURCE_POSITIVE_TERMS_RE.search(result.source_text):
                 score += 0.2
 
             # 避免可疑的财务数据特征 - 加强检测
@@ -1016,28 +1119,29 @@ class SmartEmployeeExtractor:
                 if '.' in result.source_text or '，' in result.source_text:
                     score -= 0.4  # 大幅降低包含小数的结果
 
-                # 检查财务关键词
-                financial_terms = ['薪酬', '支付给员工', '员工薪酬', '职工薪酬', '万元', '亿', '收入', '利润']
-                if any(term in result.source_text for term in financial_terms):
+                # 检查财务关键词（一次扫描，命中任意一个即返回）
+                if SOURCE_FINANCIAL_TERMS_RE.search(result.source_text):
                     score -= 0.3
 
             return score
 
-        # 按综合分数排序
-        candidate_results.sort(key=enhanced_scoring_function, reverse=True)
-        best_result = candidate_results[0]
+        # 每个候选只计算一次综合分数，取分数最高者（同分时取先出现的，与稳定排序一致）
+        scores = [enhanced_scoring_function(result) for result in candidate_results]
+        best_idx = max(range(len(candidate_results)), key=scores.__getitem__)
+        best_result = candidate_results[best_idx]
 
         # 第四级验证：检查一致性和合理性
         if len(candidate_results) > 1:
-            similar_results = []
-            for result in candidate_results[1:]:
-                # 如果数值相近（差异小于15%），认为是相互验证的
-                if abs(best_result.count - result.count) / max(best_result.count, result.count) < 0.15:
-                    similar_results.append(result)
-
-            if similar_results:
+            # 如果数值相近（差异小于15%），认为是相互验证的；用整数比较代替除法
+            best_count = best_result.count
+            similar_count = sum(
+                1 for idx, result in enumerate(candidate_results)
+                if idx != best_idx and abs(best_count - result.count) * 100 < 15 * max(best_count, result.count)
+            )
+
+            if similar_count:
                 best_result.confidence = min(best_result.confidence + 0.1, 1.0)
-                best_result.verification_notes = f"与{len(similar_results)}个结果相互验证"
+                best_result.verification_notes = f"与{similar_count}个结果相互验证"
 
         # 最终合理性检查
         if best_result.count < 1000:
@@ -1082,8 +1186,31 @@ def extract_employee_count_from_pdf_smart(pdf_path: str, verbose: bool = False,
         return None
 
 
+# 子进程内复用的提取器实例（每个进程创建一次）
+_worker_extractor: Optional[SmartEmployeeExtractor] = None
+
+
+def _extract_employee_count_worker(pdf_path: str) -> Tuple[str, Optional[int], float]:
+    """
+    批量提取的子进程任务
+
+    返回:
+        (文件名, 员工数量, 置信度)，提取失败时员工数量为None
+    """
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = SmartEmployeeExtractor()
+
+    result = _worker_extractor.extract_from_pdf(pdf_path, verbose=False, use_smart=True)
+
+    if result.success:
+        return os.path.basename(pdf_path), result.employee_data.count, result.employee_data.confidence
+    return os.path.basename(pdf_path), None, 0.0
+
+
 def batch_extract_employee_count_smart(pdf_dir: str, output_csv: Optional[str] = None,
-                                     stock_code: Optional[str] = None, use_smart: bool = True) -> Dict[str, Optional[int]]:
+                                     stock_code: Optional[str] = None, use_smart: bool = True,
+                                     max_workers: Optional[int] = None) -> Dict[str, Optional[int]]:
     """
     批量智能员工数量提取
 
@@ -1092,6 +1219,7 @@ def batch_extract_employee_count_smart(pdf_dir: str, output_csv: Optional[str] =
         output_csv: 输出CSV文件路径（可选）
         stock_code: 股票代码（可选）
         use_smart: 是否使用智能算法
+        max_workers: 并行进程数（可选，默认为CPU核数；为1时在当前进程中逐个处理）
 
     返回:
         字典，格式为 {文件名: 员工数量}
@@ -1102,26 +1230,46 @@ def batch_extract_employee_count_smart(pdf_dir: str, output_csv: Optional[str] =
     if use_smart:
         print("使用智能员工数量提取算法...")
 
-        # 使用智能算法
-        extractor = SmartEmployeeExtractor()
+        # 使用智能算法，每个PDF的解析互相独立，按文件并行处理
         result_dict = {}
 
-        pdf_files = Path(pdf_dir).glob("*.pdf")
+        # os.scandir 直接给出文件大小，无需为每个文件构造 Path 再 stat
+        pdf_entries = []
+        if os.path.isdir(pdf_dir):
+            with os.scandir(pdf_dir) as entries:
+                pdf_entries = [(entry.path, entry.stat().st_size) for entry in entries
+                               if entry.is_file() and entry.name.lower().endswith('.pdf')]
 
-        for pdf_file in pdf_files:
-            filename = pdf_file.name
-            print(f"处理: {filename}")
+        # 大文件优先派发，避免耗时最长的文件最后才开始处理
+        pdf_entries.sort(key=lambda item: item[1], reverse=True)
+        pdf_files = [path for path, _ in pdf_entries]
+        workers = min(max_workers or os.cpu_count() or 1, len(pdf_files))
 
-            result = extractor.extract_from_pdf(str(pdf_file), verbose=False, use_smart=True)
+        def record(filename: str, count: Optional[int], confidence: float):
+            print(f"处理: {filename}")
 
-            if result.success:
-                result_dict[filename] = result.employee_data.count
-                print(f"  [OK] 提取成功: {result.employee_data.count:,}人 (置信度: {result.employee_data.confidence:.3f})")
+            result_dict[filename] = count
+            if count is not None:
+                print(f"  [OK] 提取成功: {count:,}人 (置信度: {confidence:.3f})")
             else:
-                result_dict[filename] = None
                 print(f"  [FAIL] 提取失败")
 
-        return result_dict
+        if workers > 1:
+            # 按模块名重新导入任务函数：本文件常通过 importlib 以别名加载，
+            # 子进程只能按真实模块名反序列化任务函数
+            from 智能_从年报提取员工数量 import _extract_employee_count_worker as worker
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(worker, pdf_file) for pdf_file in pdf_files]
+                # 按完成顺序输出进度
+                for future in as_completed(futures):
+                    record(*future.result())
+        else:
+            for pdf_file in pdf_files:
+                record(*_extract_employee_count_worker(pdf_file))
+
+        # 返回结果按文件名排序，与处理顺序无关
+        return dict(sorted(result_dict.items()))
     else:
         print("使用传统员工数量提取算法...")
         # 使用原有方法
@@ -11,10 +11,101 @@
 import os
 import re
 import csv
+import io
+import logging
+import contextlib
 import pdfplumber
-from typing import Optional, Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Dict, Iterable, List, Tuple
 from pathlib import Path
 
+# pdfminer 在解析不规范的年报时会逐页输出警告（如缺少 CropBox），
+# 批量处理时这些日志的格式化和输出占用可观的时间，只保留错误级别
+logging.getLogger("pdfminer").setLevel(logging.ERROR)
+logging.getLogger("pdfplumber").setLevel(logging.ERROR)
+
+# 可选：PyMuPDF（fitz）基于 MuPDF 的 C 实现，文本提取比 pdfminer 快一个数量级
+# 安装：pip install pymupdf；未安装时回退到 pdfplumber
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# 可选：pyahocorasick 多模式匹配，一次扫描整页文本即可判断是否命中任一关键词
+# 安装：pip install pyahocorasick；未安装时回退到逐个关键词查找
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 搜索关键词（都包含"员工"，has_employee_info 据此快速排除无关页面）
+EMPLOYEE_COUNT_KEYWORDS = [
+    "在职员工的数量合计",
+    "在职员工数量合计",
+    "员工数量合计",
+    "员工总数",
+    "在职员工总数",
+    "员工人数合计"
+]
+
+def _build_keyword_automaton(keywords: List[str]):
+    """
+    构建关键词的 Aho-Corasick 自动机
+    
+    参数:
+        keywords: 关键词列表
+    
+    返回:
+        自动机对象，pyahocorasick 不可用时返回None
+    """
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+# 整页文本较长，扫描耗时与关键词数量无关的自动机更合适；
+# 表格行文本很短，逐个关键词查找反而更快，仍使用 in
+EMPLOYEE_KEYWORD_AUTOMATON = _build_keyword_automaton(EMPLOYEE_COUNT_KEYWORDS)
+
+# 预编译的正则表达式，避免在逐行、逐单元格的调用中反复查找模式缓存
+# 单元格中的整数（可能包含千位分隔符）
+CELL_NUMBER_RE = re.compile(r'[\d,，]+')
+# 文本中的数字
+TEXT_NUMBER_RE = re.compile(r'\d+[,\d]*')
+# 文件名中的4位数字年份（2000-2099）
+YEAR_RE = re.compile(r'20\d{2}')
+# 文件名中的6位股票代码
+STOCK_CODE_RE = re.compile(r'\b\d{6}\b')
+STOCK_CODE_PREFIX_RE = re.compile(r'(\d{6})_')
+
+# 员工数量通常在 10 到 1000000 之间
+# 小于10可能是其他数据，大于100万通常不合理
+MIN_EMPLOYEE_COUNT = 10
+MAX_EMPLOYEE_COUNT = 1000000
+
+# 员工情况章节通常位于年报中部，优先扫描该页码区间（按总页数比例）
+PRIORITY_PAGE_RANGE = (0.25, 0.85)
+
+def page_scan_order(total_pages: int) -> List[int]:
+    """
+    生成页面扫描顺序：先扫描年报中部区间，再扫描其余页面
+    
+    参数:
+        total_pages: PDF总页数
+    
+    返回:
+        页面索引列表（从0开始）
+    """
+    start = int(total_pages * PRIORITY_PAGE_RANGE[0])
+    end = int(total_pages * PRIORITY_PAGE_RANGE[1])
+    return list(range(start, end)) + list(range(0, start)) + list(range(end, total_pages))
+
 def extract_employee_count_from_pdf(pdf_path: str, verbose: bool = True) -> Optional[int]:
     """
     从PDF年报中提取员工数量
@@ -29,77 +120,206 @@ def extract_employee_count_from_pdf(pdf_path: str, verbose: bool = True) -> Opti
         print(f"✗ 文件不存在: {pdf_path}")
         return None
     
+    return _parse_employee_count_from_pdf(pdf_path, verbose=verbose)
+
+def _parse_employee_count_from_pdf(pdf_path: str, verbose: bool = True) -> Optional[int]:
+    """
+    打开并解析PDF，提取员工数量
+    
+    参数:
+        pdf_path: PDF文件路径
+        verbose: 是否显示详细信息
+    
+    返回:
+        员工数量（整数），如果未找到返回None
+    """
     if verbose:
         print(f"正在打开PDF文件: {pdf_path}")
     
+    if PYMUPDF_AVAILABLE:
+        return _extract_employee_count_with_pymupdf(pdf_path, verbose=verbose)
+    
     try:
         with pdfplumber.open(pdf_path) as pdf:
             total_pages = len(pdf.pages)
             if verbose:
                 print(f"✓ PDF文件打开成功，共 {total_pages} 页")
             
-            # 搜索关键词
-            keywords = [
-                "在职员工的数量合计",
-                "在职员工数量合计",
-                "员工数量合计",
-                "员工总数",
-                "在职员工总数",
-                "员工人数合计"
-            ]
-            
-            employee_count = None
-            
-            # 遍历每一页
-            for page_num, page in enumerate(pdf.pages, 1):
+            # 按优先顺序遍历页面，只对包含员工信息的页面提取表格
+            for page_index in page_scan_order(total_pages):
+                page = pdf.pages[page_index]
+                page_num = page_index + 1
                 # 提取文本
                 text = page.extract_text()
+                tables = None
+                if text and has_employee_info(text):
+                    tables = page.extract_tables() if may_contain_employee_table(text) else []
+                
+                # 每页处理完立即释放页面缓存，批量处理时内存不随页数增长
+                page.close()
                 
-                if not text:
+                if tables is None:
                     continue
                 
-                # 检查是否包含员工相关关键词
-                has_employee_keyword = any(keyword in text for keyword in keywords)
-                has_employee_section = "员工" in text and ("情况" in text or "构成" in text)
+                employee_count = extract_employee_count_from_page(
+                    page_num, text, tables, verbose=verbose
+                )
+                if employee_count is not None:
+                    return employee_count
+            
+            if verbose:
+                print("\n⚠ 未找到员工数量信息")
+                print("提示：可以尝试查看PDF中的'员工情况'或'员工构成'章节")
+            
+            return None
+            
+    except Exception as e:
+        print(f"✗ 处理PDF文件时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def _extract_employee_count_with_pymupdf(pdf_path: str, verbose: bool = True) -> Optional[int]:
+    """
+    使用 PyMuPDF 逐页提取员工数量
+    
+    关键词扫描使用 PyMuPDF 的文本提取；命中关键词的页面用 find_tables 识别表格，
+    识别不到表格时再用 pdfplumber 只解析该页作为补充
+    
+    参数:
+        pdf_path: PDF文件路径
+        verbose: 是否显示详细信息
+    
+    返回:
+        员工数量（整数），如果未找到返回None
+    """
+    plumber_pdf = None
+    try:
+        with fitz.open(pdf_path) as doc:
+            if verbose:
+                print(f"✓ PDF文件打开成功，共 {doc.page_count} 页")
+            
+            for page_index in page_scan_order(doc.page_count):
+                page = doc[page_index]
+                page_num = page_index + 1
+                text = page.get_text("text")
+                
+                if not text or not has_employee_info(text):
+                    continue
                 
-                if has_employee_keyword or has_employee_section:
-                    if verbose:
-                        print(f"\n在第 {page_num} 页找到员工相关信息")
-                    
-                    # 尝试提取表格
-                    tables = page.extract_tables()
-                    if tables:
-                        if verbose:
-                            print(f"  找到 {len(tables)} 个表格")
-                        
-                        # 分析每个表格
-                        for table_idx, table in enumerate(tables):
-                            if verbose:
-                                print(f"  分析表格 {table_idx + 1}:")
-                            employee_count = analyze_table_for_employee_count(table, keywords, verbose=verbose)
-                            if employee_count is not None:
-                                if verbose:
-                                    print(f"  ✓ 在表格 {table_idx + 1} 中找到员工数量: {employee_count}")
-                                return employee_count
+                tables = []
+                if may_contain_employee_table(text):
+                    # find_tables 需要 PyMuPDF >= 1.23
+                    if hasattr(page, "find_tables"):
+                        tables = [table.extract() for table in page.find_tables().tables]
                     
-                    # 如果表格提取失败，尝试从文本中提取
-                    employee_count = extract_employee_count_from_text(text, keywords)
-                    if employee_count is not None:
-                        if verbose:
-                            print(f"  ✓ 从文本中提取到员工数量: {employee_count}")
-                        return employee_count
+                    # PyMuPDF 识别不到表格时，用 pdfplumber 只解析该页
+                    if not tables:
+                        if plumber_pdf is None:
+                            plumber_pdf = pdfplumber.open(pdf_path)
+                        plumber_page = plumber_pdf.pages[page_num - 1]
+                        tables = plumber_page.extract_tables()
+                        plumber_page.close()
+                
+                employee_count = extract_employee_count_from_page(
+                    page_num, text, tables, verbose=verbose
+                )
+                if employee_count is not None:
+                    return employee_count
             
-            if employee_count is None and verbose:
+            if verbose:
                 print("\n⚠ 未找到员工数量信息")
                 print("提示：可以尝试查看PDF中的'员工情况'或'员工构成'章节")
             
-            return employee_count
-            
+            return None
+    
     except Exception as e:
         print(f"✗ 处理PDF文件时出错: {e}")
         import traceback
         traceback.print_exc()
         return None
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+
+def has_employee_info(text: str) -> bool:
+    """
+    判断页面文本是否包含员工相关信息
+    
+    参数:
+        text: 页面文本
+    
+    返回:
+        包含员工关键词或员工情况章节返回True
+    """
+    # 所有关键词都包含"员工"，没有"员工"的页面（年报中的大多数页面）一次扫描即可排除
+    if "员工" not in text:
+        return False
+    
+    # 检查是否包含员工情况章节
+    if "情况" in text or "构成" in text:
+        return True
+    
+    # 检查是否包含员工相关关键词
+    if EMPLOYEE_KEYWORD_AUTOMATON is not None:
+        return next(EMPLOYEE_KEYWORD_AUTOMATON.iter(text), None) is not None
+    return any(keyword in text for keyword in EMPLOYEE_COUNT_KEYWORDS)
+
+def may_contain_employee_table(text: str) -> bool:
+    """
+    判断页面是否可能包含员工数量表格
+    
+    表格分析只从包含关键词或"合计"的行中取数，页面文本中两者都没有时，
+    无需进行耗时的表格识别
+    
+    参数:
+        text: 页面文本
+    
+    返回:
+        可能包含员工数量表格返回True
+    """
+    return "合计" in text or any(keyword in text for keyword in EMPLOYEE_COUNT_KEYWORDS)
+
+def extract_employee_count_from_page(page_num: int, text: str, tables: List[List[List]], verbose: bool = False) -> Optional[int]:
+    """
+    从单页的表格和文本中提取员工数量
+    
+    参数:
+        page_num: 页码（用于输出）
+        text: 页面文本
+        tables: 页面中提取到的表格
+        verbose: 是否显示详细信息
+    
+    返回:
+        员工数量（整数），如果未找到返回None
+    """
+    keywords = EMPLOYEE_COUNT_KEYWORDS
+    
+    if verbose:
+        print(f"\n在第 {page_num} 页找到员工相关信息")
+    
+    # 尝试从表格提取
+    if tables:
+        if verbose:
+            print(f"  找到 {len(tables)} 个表格")
+        
+        # 分析每个表格
+        for table_idx, table in enumerate(tables):
+            if verbose:
+                print(f"  分析表格 {table_idx + 1}:")
+            employee_count = analyze_table_for_employee_count(table, keywords, verbose=verbose)
+            if employee_count is not None:
+                if verbose:
+                    print(f"  ✓ 在表格 {table_idx + 1} 中找到员工数量: {employee_count}")
+                return employee_count
+    
+    # 如果表格提取失败，尝试从文本中提取
+    employee_count = extract_employee_count_from_text(text, keywords)
+    if employee_count is not None:
+        if verbose:
+            print(f"  ✓ 从文本中提取到员工数量: {employee_count}")
+    
+    return employee_count
 
 def is_reasonable_employee_count(num: int) -> bool:
     """
@@ -111,9 +331,23 @@ def is_reasonable_employee_count(num: int) -> bool:
     返回:
         如果合理返回True，否则返回False
     """
-    # 员工数量通常在 10 到 1000000 之间
-    # 小于10可能是其他数据，大于100万通常不合理
-    return 10 <= num <= 1000000
+    return MIN_EMPLOYEE_COUNT <= num <= MAX_EMPLOYEE_COUNT
+
+def max_reasonable_employee_count(numbers: List[int]) -> Optional[int]:
+    """
+    一次遍历找出最大的合理员工数量
+    
+    参数:
+        numbers: 数字列表
+    
+    返回:
+        最大的合理数字，如果没有合理数字返回None
+    """
+    best = None
+    for num in numbers:
+        if MIN_EMPLOYEE_COUNT <= num <= MAX_EMPLOYEE_COUNT and (best is None or num > best):
+            best = num
+    return best
 
 def analyze_table_for_employee_count(table: List[List], keywords: List[str], verbose: bool = False) -> Optional[int]:
     """
@@ -130,117 +364,118 @@ def analyze_table_for_employee_count(table: List[List], keywords: List[str], ver
     if not table:
         return None
     
-    # 将表格转换为字符串以便搜索
-    table_text = "\n".join(["\t".join([str(cell) if cell else "" for cell in row]) for row in table])
-    
-    # 存储所有候选数字（用于调试）
-    # 格式：(数字, 来源描述, 优先级)
+    # 按优先级分组存储候选数字（用于调试）
+    # 格式：(数字, 来源描述)
     # 优先级：1=合计关键词行, 2=其他关键词行, 3=合计+员工行
-    candidates = []
+    priority_1 = []
+    priority_2 = []
+    priority_3 = []
+    
+    # 关键词按是否包含"合计"分组，每个表格只分组一次
+    total_keywords = [keyword for keyword in keywords if "合计" in keyword]
+    other_keywords = [keyword for keyword in keywords if "合计" not in keyword]
+    
+    # 每行的数字只提取一次：同一行可能匹配多个关键词，也会作为上一行的"下一行"被再次读取
+    row_numbers = {}
+    
+    def numbers_in_row(idx: int) -> List[int]:
+        numbers = row_numbers.get(idx)
+        if numbers is None:
+            numbers = row_numbers[idx] = extract_numbers_from_row(table[idx])
+        return numbers
     
-    # 优先查找包含"合计"的关键词行（最高优先级）
+    # 一次遍历表格，每行按三个优先级分别匹配
     for row_idx, row in enumerate(table):
         row_text = " ".join([str(cell) if cell else "" for cell in row])
         
         # 检查是否包含"合计"相关的关键词（最高优先级）
-        for keyword in keywords:
-            if keyword in row_text and "合计" in keyword:
+        for keyword in total_keywords:
+            if keyword in row_text:
                 if verbose:
                     print(f"    找到合计关键词 '{keyword}' 在第 {row_idx + 1} 行（高优先级）")
                     print(f"    行内容: {row_text[:150]}...")
                 
                 # 在这一行查找数字
-                numbers = extract_numbers_from_row(row)
+                numbers = numbers_in_row(row_idx)
                 if numbers:
                     if verbose:
                         print(f"    当前行找到数字: {numbers}")
-                    # 优先选择该行中最大的合理数字（合计通常是最大的）
-                    valid_numbers = [num for num in numbers if isinstance(num, int) and is_reasonable_employee_count(num)]
-                    if valid_numbers:
-                        # 选择最大的数字（合计行通常包含最大的数字）
-                        max_num = max(valid_numbers)
-                        candidates.append((max_num, f"合计关键词行{row_idx+1}", 1))
+                    # 选择该行中最大的合理数字（合计行通常包含最大的数字）
+                    max_num = max_reasonable_employee_count(numbers)
+                    if max_num is not None:
+                        priority_1.append((max_num, f"合计关键词行{row_idx+1}"))
                         if verbose:
                             print(f"    ✓ 候选数字: {max_num} (来自合计关键词行，优先级1)")
-                        # 如果找到合计关键词行，优先返回（不再查找其他）
-                        # 但继续收集其他候选用于调试
                 
                 # 如果当前行没找到，检查下一行
                 if row_idx + 1 < len(table):
-                    next_row = table[row_idx + 1]
-                    numbers = extract_numbers_from_row(next_row)
+                    numbers = numbers_in_row(row_idx + 1)
                     if numbers:
                         if verbose:
                             print(f"    下一行找到数字: {numbers}")
-                        valid_numbers = [num for num in numbers if isinstance(num, int) and is_reasonable_employee_count(num)]
-                        if valid_numbers:
-                            max_num = max(valid_numbers)
-                            candidates.append((max_num, f"合计关键词行{row_idx+1}的下一行", 1))
+                        max_num = max_reasonable_employee_count(numbers)
+                        if max_num is not None:
+                            priority_1.append((max_num, f"合计关键词行{row_idx+1}的下一行"))
                             if verbose:
                                 print(f"    ✓ 候选数字: {max_num} (来自下一行，优先级1)")
-    
-    # 查找其他关键词行（较低优先级）
-    for row_idx, row in enumerate(table):
-        row_text = " ".join([str(cell) if cell else "" for cell in row])
         
-        # 检查是否包含其他关键词（排除已处理的合计关键词）
-        for keyword in keywords:
-            if keyword in row_text and "合计" not in keyword:
+        # 已有合理范围内的优先级1候选时，低优先级候选不会被选中；
+        # 详细模式下继续收集，便于调试
+        if not verbose and any(10 <= num <= 100000 for num, _ in priority_1):
+            continue
+        
+        # 检查是否包含其他关键词（排除合计关键词）
+        for keyword in other_keywords:
+            if keyword in row_text:
                 if verbose:
                     print(f"    找到关键词 '{keyword}' 在第 {row_idx + 1} 行")
                     print(f"    行内容: {row_text[:100]}...")
                 
                 # 在这一行查找数字
-                numbers = extract_numbers_from_row(row)
+                numbers = numbers_in_row(row_idx)
                 if numbers:
                     if verbose:
                         print(f"    当前行找到数字: {numbers}")
                     for num in numbers:
-                        if isinstance(num, int) and is_reasonable_employee_count(num):
-                            candidates.append((num, f"关键词行{row_idx+1}", 2))
+                        if MIN_EMPLOYEE_COUNT <= num <= MAX_EMPLOYEE_COUNT:
+                            priority_2.append((num, f"关键词行{row_idx+1}"))
                             if verbose:
                                 print(f"    ✓ 候选数字: {num} (来自关键词行，优先级2)")
                 
                 # 如果当前行没找到，检查下一行
                 if row_idx + 1 < len(table):
-                    next_row = table[row_idx + 1]
-                    numbers = extract_numbers_from_row(next_row)
+                    numbers = numbers_in_row(row_idx + 1)
                     if numbers:
                         if verbose:
                             print(f"    下一行找到数字: {numbers}")
                         for num in numbers:
-                            if isinstance(num, int) and is_reasonable_employee_count(num):
-                                candidates.append((num, f"关键词行{row_idx+1}的下一行", 2))
+                            if MIN_EMPLOYEE_COUNT <= num <= MAX_EMPLOYEE_COUNT:
+                                priority_2.append((num, f"关键词行{row_idx+1}的下一行"))
                                 if verbose:
                                     print(f"    ✓ 候选数字: {num} (来自下一行，优先级2)")
-    
-    # 如果没找到关键词，尝试查找"合计"行（最低优先级）
-    for row_idx, row in enumerate(table):
-        row_text = " ".join([str(cell) if cell else "" for cell in row])
+        
+        # 查找"合计"行（最低优先级）
         if "合计" in row_text and "员工" in row_text:
             if verbose:
                 print(f"    找到'合计+员工'在第 {row_idx + 1} 行")
-            numbers = extract_numbers_from_row(row)
+            numbers = numbers_in_row(row_idx)
             if numbers:
                 if verbose:
                     print(f"    合计行找到数字: {numbers}")
-                valid_numbers = [num for num in numbers if isinstance(num, int) and is_reasonable_employee_count(num)]
-                if valid_numbers:
-                    max_num = max(valid_numbers)
-                    candidates.append((max_num, f"合计行{row_idx+1}", 3))
+                max_num = max_reasonable_employee_count(numbers)
+                if max_num is not None:
+                    priority_3.append((max_num, f"合计行{row_idx+1}"))
                     if verbose:
                         print(f"    ✓ 候选数字: {max_num} (来自合计行，优先级3)")
     
     # 如果有多个候选，按优先级选择
-    if candidates:
+    if priority_1 or priority_2 or priority_3:
         if verbose:
+            candidates = ([(num, desc, 1) for num, desc in priority_1]
+                          + [(num, desc, 2) for num, desc in priority_2]
+                          + [(num, desc, 3) for num, desc in priority_3])
             print(f"    所有候选数字: {candidates}")
         
-        # 按优先级分组
-        priority_1 = [(num, desc) for num, desc, priority in candidates if priority == 1]
-        priority_2 = [(num, desc) for num, desc, priority in candidates if priority == 2]
-        priority_3 = [(num, desc) for num, desc, priority in candidates if priority == 3]
-        
         # 优先选择优先级1的候选（合计关键词行）
         if priority_1:
             valid_nums = [num for num, _ in priority_1 if 10 <= num <= 100000]
@@ -303,15 +538,21 @@ def extract_numbers_from_row(row: List) -> List[int]:
             continue
         
         cell_str = str(cell).strip()
+        digits = cell_str.replace(",", "").replace("，", "")
         
-        # 尝试直接转换为整数
+        # 纯数字单元格直接转换为整数，无需经过浮点数
+        if digits.isdecimal():
+            numbers.append(int(digits))
+            continue
+        
+        # 尝试按数值转换（如小数）
         try:
-            num = int(float(cell_str.replace(",", "").replace("，", "")))
+            num = int(float(digits))
             numbers.append(num)
         except (ValueError, AttributeError):
             # 尝试从文本中提取数字
             # 匹配整数（可能包含千位分隔符）
-            matches = re.findall(r'[\d,，]+', cell_str)
+            matches = CELL_NUMBER_RE.findall(cell_str)
             for match in matches:
                 try:
                     num = int(float(match.replace(",", "").replace("，", "")))
@@ -343,7 +584,7 @@ def extract_employee_count_from_text(text: str, keywords: List[str]) -> Optional
                 search_text = " ".join(search_lines)
                 
                 # 提取所有数字
-                numbers = re.findall(r'\d+[,\d]*', search_text)
+                numbers = TEXT_NUMBER_RE.findall(search_text)
                 for num_str in numbers:
                     try:
                         num = int(float(num_str.replace(",", "").replace("，", "")))
@@ -382,8 +623,8 @@ def is_annual_report_pdf(filename: str) -> bool:
     返回:
         如果是年报PDF返回True，否则返回False
     """
-    # 必须是PDF文件
-    if not filename.lower().endswith('.pdf'):
+    # 必须是PDF文件（只对扩展名转小写，不复制整个文件名）
+    if filename[-4:].lower() != '.pdf':
         return False
     
     # 必须包含"年度报告"4个字
@@ -392,6 +633,74 @@ def is_annual_report_pdf(filename: str) -> bool:
     
     return True
 
+def scan_annual_reports(directory_path: str,
+                        dir_mtimes: Optional[Dict[str, int]] = None) -> List[Tuple[str, Optional[int]]]:
+    """
+    递归扫描目录中的年报PDF文件，同时从文件名识别年份
+    
+    使用 os.scandir 直接读取目录项，遍历顺序与 os.walk 相同（先当前目录文件，再逐个子目录），
+    不进入符号链接指向的目录
+    
+    参数:
+        directory_path: 目录路径
+        dir_mtimes: 可选，记录扫描过的每个目录的修改时间 {目录路径: st_mtime_ns}
+    
+    返回:
+        列表，每个元素为 (文件路径, 年份)
+    """
+    reports = []
+    subdirs = []
+    
+    try:
+        if dir_mtimes is not None:
+            dir_mtimes[directory_path] = os.stat(directory_path).st_mtime_ns
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif is_annual_report_pdf(entry.name):
+                    reports.append((entry.path, extract_year_from_filename(entry.name)))
+    except OSError:
+        # 与 os.walk 一致，忽略无法读取的目录
+        return reports
+    
+    for subdir in subdirs:
+        reports.extend(scan_annual_reports(subdir, dir_mtimes))
+    
+    return reports
+
+# 目录扫描结果缓存 {目录绝对路径: (各级目录修改时间, 扫描结果)}
+_annual_report_scan_cache: Dict[str, Tuple[Dict[str, int], List[Tuple[str, Optional[int]]]]] = {}
+
+def list_annual_reports(directory_path: str) -> List[Tuple[str, Optional[int]]]:
+    """
+    列出目录中的年报PDF文件及年份，同一目录重复调用时复用上次的扫描结果
+    
+    目录中增删文件会改变所在目录的修改时间，只要扫描过的各级目录修改时间都未变，
+    缓存就仍然有效，此时只需逐个 stat 目录，无需重新列出所有文件
+    
+    参数:
+        directory_path: 目录路径
+    
+    返回:
+        列表，每个元素为 (文件路径, 年份)
+    """
+    key = os.path.abspath(directory_path)
+    cached = _annual_report_scan_cache.get(key)
+    if cached is not None:
+        dir_mtimes, reports = cached
+        try:
+            if all(os.stat(path).st_mtime_ns == mtime for path, mtime in dir_mtimes.items()):
+                return list(reports)
+        except OSError:
+            pass
+    
+    dir_mtimes = {}
+    reports = scan_annual_reports(directory_path, dir_mtimes)
+    _annual_report_scan_cache[key] = (dir_mtimes, reports)
+    return list(reports)
+
 def extract_year_from_filename(filename: str) -> Optional[int]:
     """
     从文件名中提取年份
@@ -403,14 +712,9 @@ def extract_year_from_filename(filename: str) -> Optional[int]:
         年份（整数），如果未找到返回None
     """
     # 查找4位数字年份（2000-2099）
-    year_match = re.search(r'20\d{2}', filename)
+    year_match = YEAR_RE.search(filename)
     if year_match:
-        try:
-            year = int(year_match.group())
-            if 2000 <= year <= 2099:
-                return year
-        except ValueError:
-            pass
+        return int(year_match.group())
     
     return None
 
@@ -427,31 +731,26 @@ def extract_stock_code_from_filename(filename: str) -> Optional[str]:
     # 常见的股票代码格式：6位数字（A股）
     # 例如：600519、000001、300750等
     
-    # 匹配6位数字（可能是股票代码）
-    code_matches = re.findall(r'\b\d{6}\b', filename)
-    
-    if code_matches:
-        # 返回第一个匹配的6位数字
-        return code_matches[0]
+    # 匹配第一个独立的6位数字（可能是股票代码）
+    code_match = STOCK_CODE_RE.search(filename)
+    if code_match:
+        return code_match.group()
     
-    # 如果没有找到6位数字，尝试从文件名开头提取
+    # 数字后紧跟下划线时不构成单词边界，单独匹配文件名开头的代码
     # 有些文件名可能是：600519_2024年年度报告.pdf
-    basename = os.path.splitext(filename)[0]
-    parts = basename.split('_')
-    if parts:
-        first_part = parts[0]
-        if re.match(r'^\d{6}$', first_part):
-            return first_part
+    prefix_match = STOCK_CODE_PREFIX_RE.match(filename)
+    if prefix_match:
+        return prefix_match.group(1)
     
     return None
 
-def save_to_csv(stock_code: str, results: List[Tuple[int, Optional[int]]], output_dir: str = ".") -> str:
+def save_to_csv(stock_code: str, results: Iterable[Tuple[int, Optional[int]]], output_dir: str = ".") -> str:
     """
     将员工数量数据保存到CSV文件
     
     参数:
         stock_code: 股票代码
-        results: 结果列表，每个元素为 (年份, 员工数量)
+        results: 结果（列表或迭代器），每个元素为 (年份, 员工数量)
         output_dir: 输出目录
     
     返回:
@@ -477,10 +776,11 @@ def save_to_csv(stock_code: str, results: List[Tuple[int, Optional[int]]], outpu
             writer = csv.writer(csvfile)
             # 写入表头
             writer.writerow(['年份', '员工数量'])
-            # 写入数据
-            for year, employee_count in sorted_results:
-                count_str = str(employee_count) if employee_count is not None else ""
-                writer.writerow([year, count_str])
+            # 写入数据（一次 writerows 调用写入所有行）
+            writer.writerows(
+                (year, str(employee_count) if employee_count is not None else "")
+                for year, employee_count in sorted_results
+            )
         
         print(f"  ✓ 数据已保存到: {csv_path}")
         return csv_path
@@ -488,7 +788,23 @@ def save_to_csv(stock_code: str, results: List[Tuple[int, Optional[int]]], outpu
         print(f"  ✗ 保存CSV文件失败: {e}")
         return ""
 
-def process_directory(directory_path: str, verbose: bool = False, stock_code: Optional[str] = None) -> List[Tuple[str, Optional[int], Optional[int]]]:
+def _extract_employee_count_worker(pdf_path: str, verbose: bool = False) -> Tuple[Optional[int], str]:
+    """
+    批量提取的子进程任务
+    
+    详细输出先写入内存缓冲区，随结果返回主进程统一输出，
+    避免多个子进程逐行写标准输出造成交错和大量系统调用
+    
+    返回:
+        (员工数量, 缓冲的输出文本)
+    """
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        employee_count = extract_employee_count_from_pdf(pdf_path, verbose=verbose)
+    return employee_count, buffer.getvalue()
+
+def process_directory(directory_path: str, verbose: bool = False, stock_code: Optional[str] = None,
+                      max_workers: Optional[int] = None) -> List[Tuple[str, Optional[int], Optional[int]]]:
     """
     批量处理目录中的年报PDF文件
     
@@ -496,6 +812,7 @@ def process_directory(directory_path: str, verbose: bool = False, stock_code: Op
         directory_path: 目录路径
         verbose: 是否显示详细信息
         stock_code: 股票代码（如果为None，会尝试从文件名中提取）
+        max_workers: 并行进程数（可选，默认为CPU核数；为1时在当前进程中逐个处理）
     
     返回:
         结果列表，每个元素为 (文件路径, 年份, 员工数量)
@@ -511,15 +828,9 @@ def process_directory(directory_path: str, verbose: bool = False, stock_code: Op
     print(f"正在扫描目录: {directory_path}")
     print("=" * 80)
     
-    results = []
-    pdf_files = []
-    
-    # 遍历目录中的所有文件
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if is_annual_report_pdf(file):
-                file_path = os.path.join(root, file)
-                pdf_files.append(file_path)
+    # 遍历目录中的所有文件，扫描时一并识别年份 {文件路径: 年份}
+    report_years = dict(list_annual_reports(directory_path))
+    pdf_files = list(report_years)
     
     if not pdf_files:
         print("⚠ 未找到年报PDF文件")
@@ -527,31 +838,28 @@ def process_directory(directory_path: str, verbose: bool = False, stock_code: Op
     
     print(f"找到 {len(pdf_files)} 个年报PDF文件\n")
     
-    # 如果未提供股票代码，尝试从第一个文件名中提取
-    if stock_code is None and pdf_files:
-        first_filename = os.path.basename(pdf_files[0])
-        stock_code = extract_stock_code_from_filename(first_filename)
-        if stock_code:
-            print(f"从文件名识别股票代码: {stock_code}\n")
+    # 如果未提供股票代码，尝试从文件名中提取
+    if stock_code is None:
+        for pdf_path in pdf_files:
+            stock_code = extract_stock_code_from_filename(os.path.basename(pdf_path))
+            if stock_code:
+                print(f"从文件名识别股票代码: {stock_code}\n")
+                break
     
-    # 用于保存CSV的数据（年份，员工数量）
-    csv_data = []
+    # 提取结果 {文件路径: 员工数量}
+    employee_counts = {}
     
-    # 处理每个PDF文件
-    for idx, pdf_path in enumerate(pdf_files, 1):
+    def record(idx: int, pdf_path: str, employee_count: Optional[int], output: str = ""):
         filename = os.path.basename(pdf_path)
-        year = extract_year_from_filename(filename)
-        
-        # 如果还未识别股票代码，尝试从当前文件名提取
-        if stock_code is None:
-            stock_code = extract_stock_code_from_filename(filename)
+        year = report_years[pdf_path]
         
         print(f"[{idx}/{len(pdf_files)}] 处理文件: {filename}")
         if year:
             print(f"  识别年份: {year}")
         
-        # 提取员工数量（verbose=False时输出更简洁）
-        employee_count = extract_employee_count_from_pdf(pdf_path, verbose=verbose)
+        # 子进程缓冲的详细输出，随结果一次输出，不与其他文件交错
+        if output:
+            print(output, end="")
         
         if not verbose:
             # 简化输出模式
@@ -560,13 +868,37 @@ def process_directory(directory_path: str, verbose: bool = False, stock_code: Op
             else:
                 print(f"  ✗ 未能提取员工数量")
         
+        employee_counts[pdf_path] = employee_count
+        print()  # 空行分隔
+    
+    # 每个PDF的解析互相独立且受CPU限制，用多进程而不是多线程并行处理
+    workers = min(max_workers or os.cpu_count() or 1, len(pdf_files))
+    
+    if workers > 1:
+        # 按模块名导入任务函数，本文件作为脚本运行时子进程也能反序列化
+        from 测试_从年报提取员工数量 import _extract_employee_count_worker as worker
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(worker, pdf_path, verbose): pdf_path for pdf_path in pdf_files}
+            # 按完成顺序输出进度
+            for idx, future in enumerate(as_completed(futures), 1):
+                record(idx, futures[future], *future.result())
+    else:
+        for idx, pdf_path in enumerate(pdf_files, 1):
+            # 提取员工数量（verbose=False时输出更简洁）
+            record(idx, pdf_path, extract_employee_count_from_pdf(pdf_path, verbose=verbose))
+    
+    # 结果保持目录扫描顺序，与处理完成顺序无关
+    results = []
+    # 用于保存CSV的数据（年份，员工数量）
+    csv_data = []
+    for pdf_path, year in report_years.items():
+        employee_count = employee_counts[pdf_path]
         results.append((pdf_path, year, employee_count))
         
         # 收集CSV数据（只保存有年份的数据）
         if year is not None:
             csv_data.append((year, employee_count))
-        
-        print()  # 空行分隔
     
     # 保存到CSV文件
     if csv_data:
@@ -687,15 +1019,8 @@ def verify_specific_year(directory_path: str, year: int, stock_code: Optional[st
     print(f"验证 {year} 年员工数量提取结果")
     print("=" * 80)
     
-    # 查找对应年份的PDF文件
-    pdf_files = []
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if is_annual_report_pdf(file):
-                file_year = extract_year_from_filename(file)
-                if file_year == year:
-                    file_path = os.path.join(root, file)
-                    pdf_files.append(file_path)
+    # 查找对应年份的PDF文件（复用目录扫描结果）
+    pdf_files = [file_path for file_path, file_year in list_annual_reports(directory_path) if file_year == year]
     
     if not pdf_files:
         print(f"✗ 未找到 {year} 年的年报PDF文件")
@@ -16,10 +16,29 @@ import re
 import csv
 import pdfplumber
 import pandas as pd
-from typing import Optional, Dict, List, Tuple
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional, Dict, List, Tuple
 from pathlib import Path
 import sys
 
+# 可选：PyMuPDF（fitz）基于 MuPDF 的 C 实现，文本提取比 pdfminer 快一个数量级
+# 安装：pip install pymupdf；未安装时回退到 pdfplumber
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# 可选：pyahocorasick 多模式匹配，一次扫描即可匹配全部中英文关键词
+# 安装：pip install pyahocorasick；未安装时回退到逐个关键词查找
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # 避免在 Streamlit 环境替换 stdout，防止 “I/O operation on closed file”
 def is_streamlit_env():
     try:
@@ -28,14 +47,150 @@ def is_streamlit_env():
     except ImportError:
         return any('streamlit' in str(m) for m in sys.modules.keys())
 
+# 已经是 UTF-8 时不再包装：本文件以 __main__ 运行或按别名加载后，批量提取时还会按模块名再导入一次，
+# 重复包装会使上一个 TextIOWrapper 被回收并关闭共享的底层缓冲区
 if sys.platform == 'win32' and not is_streamlit_env():
     try:
-        import io
-        if hasattr(sys.stdout, "buffer"):
+        if hasattr(sys.stdout, "buffer") and (getattr(sys.stdout, "encoding", None) or "").lower() != "utf-8":
             sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     except Exception:
         pass
 
+# 港股年报关键词（中英文混合）
+HK_EMPLOYEE_KEYWORDS = [
+    # 中文关键词
+    "在职员工的数量合计",
+    "在职员工数量合计",
+    "员工数量合计",
+    "员工总数",
+    "在职员工总数",
+    "员工人数合计",
+    "雇员总数",
+    "雇员人数合计",
+    "员工人数",
+    "雇员人数",
+    # 英文关键词
+    "Total number of employees",
+    "Total employees",
+    "Number of employees",
+    "Employee count",
+    "Total staff",
+    "Staff number",
+    # 繁体中文关键词
+    "在職員工的數量合計",
+    "在職員工數量合計",
+    "員工數量合計",
+    "員工總數",
+    "在職員工總數",
+    "員工人數合計",
+    "僱員總數",
+    "僱員人數合計",
+]
+
+def is_total_keyword(keyword: str) -> bool:
+    """
+    判断关键词是否表示合计（表格分析中作为高优先级）
+    
+    参数:
+        keyword: 关键词
+    
+    返回:
+        包含"合计"或"Total"返回True
+    """
+    return "合计" in keyword or "Total" in keyword or "total" in keyword.lower()
+
+# 书签标题中表示员工章节的词（小写比较）
+HK_EMPLOYEE_SECTION_TITLES = ("员工", "雇员", "員工", "僱員", "employee", "staff")
+
+# 带千位分隔符的数字
+THOUSANDS_NUMBER_RE = re.compile(r'\d{1,3}(?:[,，]\d{3})*')
+# 表格单元格的数字模式，依次匹配：带千位分隔符的数字、普通整数
+CELL_NUMBER_REGEXES = [
+    THOUSANDS_NUMBER_RE,
+    re.compile(r'\d+'),
+]
+
+def _build_keyword_automaton(keywords: List[str]):
+    """
+    构建关键词的 Aho-Corasick 自动机
+    
+    参数:
+        keywords: 关键词列表
+    
+    返回:
+        自动机对象，pyahocorasick 不可用时返回None
+    """
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+HK_KEYWORD_AUTOMATON = _build_keyword_automaton(HK_EMPLOYEE_KEYWORDS)
+
+def _compile_keyword_pattern(keywords: List[str]) -> "re.Pattern":
+    """
+    将关键词列表编译为一个正则表达式（多选分支），一次 search 即可判断是否包含任一关键词
+    
+    参数:
+        keywords: 关键词列表
+    
+    返回:
+        编译后的正则表达式
+    """
+    return re.compile("|".join(map(re.escape, keywords)))
+
+# 模块关键词列表的预编译模式 {id(关键词列表): 正则表达式}
+KEYWORD_PATTERNS = {
+    id(HK_EMPLOYEE_KEYWORDS): _compile_keyword_pattern(HK_EMPLOYEE_KEYWORDS),
+}
+
+def find_keywords(text: str, keywords: List[str]) -> List[str]:
+    """
+    按关键词列表的顺序返回文本中出现的关键词
+    
+    使用模块关键词列表时通过 Aho-Corasick 自动机一次扫描匹配全部关键词；
+    没有自动机时先用预编译模式排除不含任何关键词的文本，再逐个关键词查找
+    
+    参数:
+        text: 文本
+        keywords: 关键词列表
+    
+    返回:
+        出现的关键词列表
+    """
+    if keywords is HK_EMPLOYEE_KEYWORDS and HK_KEYWORD_AUTOMATON is not None:
+        hits = {keyword for _, keyword in HK_KEYWORD_AUTOMATON.iter(text)}
+        if not hits:
+            return []
+        return [keyword for keyword in keywords if keyword in hits]
+    
+    pattern = KEYWORD_PATTERNS.get(id(keywords))
+    if pattern is not None and pattern.search(text) is None:
+        return []
+    return [keyword for keyword in keywords if keyword in text]
+
+def contains_any_keyword(text: str, keywords: List[str]) -> bool:
+    """
+    判断文本是否包含任一关键词，命中第一个即返回
+    
+    模块关键词列表使用预编译模式在C层一次扫描，其他列表逐个关键词查找
+    
+    参数:
+        text: 文本
+        keywords: 关键词列表
+    
+    返回:
+        包含任一关键词返回True
+    """
+    pattern = KEYWORD_PATTERNS.get(id(keywords))
+    if pattern is not None:
+        return pattern.search(text) is not None
+    return any(keyword in text for keyword in keywords)
+
 def extract_employee_count_from_hk_pdf(pdf_path: str, verbose: bool = True) -> Optional[int]:
     """
     从港股年报PDF中提取员工数量
@@ -54,98 +209,221 @@ def extract_employee_count_from_hk_pdf(pdf_path: str, verbose: bool = True) -> O
     if verbose:
         print(f"正在打开PDF文件: {pdf_path}")
     
+    if PYMUPDF_AVAILABLE:
+        return _extract_employee_count_from_hk_pdf_with_pymupdf(pdf_path, verbose=verbose)
+    
     try:
         with pdfplumber.open(pdf_path) as pdf:
             total_pages = len(pdf.pages)
             if verbose:
                 print(f"[OK] PDF文件打开成功，共 {total_pages} 页")
             
-            # 港股年报关键词（中英文混合）
-            keywords = [
-                # 中文关键词
-                "在职员工的数量合计",
-                "在职员工数量合计",
-                "员工数量合计",
-                "员工总数",
-                "在职员工总数",
-                "员工人数合计",
-                "雇员总数",
-                "雇员人数合计",
-                "员工人数",
-                "雇员人数",
-                # 英文关键词
-                "Total number of employees",
-                "Total employees",
-                "Number of employees",
-                "Employee count",
-                "Total staff",
-                "Staff number",
-                # 繁体中文关键词
-                "在職員工的數量合計",
-                "在職員工數量合計",
-                "員工數量合計",
-                "員工總數",
-                "在職員工總數",
-                "員工人數合計",
-                "僱員總數",
-                "僱員人數合計",
-            ]
-            
-            employee_count = None
-            
             # 遍历每一页
             for page_num, page in enumerate(pdf.pages, 1):
-                # 提取文本
-                text = page.extract_text()
-                
-                if not text:
-                    continue
-                
-                # 检查是否包含员工相关关键词
-                has_employee_keyword = any(keyword in text for keyword in keywords)
-                has_employee_section = (
-                    ("员工" in text or "雇员" in text or "employee" in text.lower() or "staff" in text.lower()) and 
-                    ("情况" in text or "构成" in text or "information" in text.lower() or "composition" in text.lower())
-                )
-                
-                if has_employee_keyword or has_employee_section:
-                    if verbose:
-                        print(f"\n在第 {page_num} 页找到员工相关信息")
+                try:
+                    # 提取文本
+                    text = page.extract_text()
                     
-                    # 尝试提取表格
-                    tables = page.extract_tables()
-                    if tables:
-                        if verbose:
-                            print(f"  找到 {len(tables)} 个表格")
-                        
-                        # 分析每个表格
-                        for table_idx, table in enumerate(tables):
-                            if verbose:
-                                print(f"  分析表格 {table_idx + 1}:")
-                            employee_count = analyze_table_for_employee_count(table, keywords, verbose=verbose)
-                            if employee_count is not None:
-                                if verbose:
-                                    print(f"  [OK] 在表格 {table_idx + 1} 中找到员工数量: {employee_count:,}")
-                                return employee_count
+                    if not text or not has_hk_employee_info(text):
+                        continue
                     
-                    # 如果表格提取失败，尝试从文本中提取
-                    employee_count = extract_employee_count_from_text(text, keywords)
+                    employee_count = extract_employee_count_from_hk_page(
+                        page_num, text, page.extract_tables, verbose=verbose
+                    )
                     if employee_count is not None:
-                        if verbose:
-                            print(f"  [OK] 从文本中提取到员工数量: {employee_count:,}")
                         return employee_count
+                finally:
+                    # 每页处理完立即释放页面缓存，批量处理时内存不随页数增长
+                    page.close()
             
-            if employee_count is None and verbose:
+            if verbose:
                 print("\n[WARNING] 未找到员工数量信息")
                 print("提示：可以尝试查看PDF中的'员工情况'、'员工构成'或'Employee Information'章节")
             
-            return employee_count
+            return None
+            
+    except Exception as e:
+        print(f"[FAIL] 处理PDF文件时出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def _extract_employee_count_from_hk_pdf_with_pymupdf(pdf_path: str, verbose: bool = True) -> Optional[int]:
+    """
+    使用 PyMuPDF 逐页提取港股年报员工数量
+    
+    关键词扫描使用 PyMuPDF 的文本提取；命中关键词的页面用 find_tables 识别表格，
+    识别不到表格时再用 pdfplumber 只解析该页作为补充
+    
+    参数:
+        pdf_path: PDF文件路径
+        verbose: 是否显示详细调试信息
+    
+    返回:
+        员工数量（整数），如果未找到返回None
+    """
+    plumber_pdf = None
+    try:
+        with fitz.open(pdf_path) as doc:
+            if verbose:
+                print(f"[OK] PDF文件打开成功，共 {doc.page_count} 页")
+            
+            for page_index in hk_page_scan_order(doc):
+                page = doc[page_index]
+                page_num = page_index + 1
+                text = page.get_text("text")
+                
+                if not text or not has_hk_employee_info(text):
+                    continue
+                
+                def extract_tables():
+                    nonlocal plumber_pdf
+                    
+                    # find_tables 需要 PyMuPDF >= 1.23
+                    # 识别出的表格按需提取单元格：前面的表格已找到员工数量时，后面的表格无需提取
+                    tables = []
+                    if hasattr(page, "find_tables"):
+                        tables = [table.extract for table in page.find_tables().tables]
+                    
+                    if not tables:
+                        if plumber_pdf is None:
+                            plumber_pdf = pdfplumber.open(pdf_path)
+                        plumber_page = plumber_pdf.pages[page_num - 1]
+                        tables = plumber_page.extract_tables()
+                        plumber_page.close()
+                    
+                    return tables
+                
+                employee_count = extract_employee_count_from_hk_page(
+                    page_num, text, extract_tables, verbose=verbose
+                )
+                if employee_count is not None:
+                    return employee_count
+            
+            if verbose:
+                print("\n[WARNING] 未找到员工数量信息")
+                print("提示：可以尝试查看PDF中的'员工情况'、'员工构成'或'Employee Information'章节")
             
+            return None
+    
     except Exception as e:
         print(f"[FAIL] 处理PDF文件时出错: {e}")
         import traceback
         traceback.print_exc()
         return None
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+
+def hk_page_scan_order(doc) -> List[int]:
+    """
+    生成 PyMuPDF 文档的页面扫描顺序：书签目录中员工相关章节所在页优先，其余页按原顺序
+    
+    港股年报大多带有书签，"员工"/"Employees" 章节的页码可以直接从目录得到，
+    无需逐页扫描到该章节；没有书签或找不到相关章节时按原顺序扫描全部页面
+    
+    参数:
+        doc: fitz.Document
+    
+    返回:
+        页面索引列表（从0开始）
+    """
+    total_pages = doc.page_count
+    toc = doc.get_toc(simple=True)  # [[层级, 标题, 页码(从1开始)], ...]
+    
+    priority_pages = []
+    for idx, (_, title, start_page) in enumerate(toc):
+        title_lower = title.lower()
+        if start_page < 1 or not any(anchor in title_lower for anchor in HK_EMPLOYEE_SECTION_TITLES):
+            continue
+        
+        # 章节范围：到下一个书签所在页为止（章节可能与下一个书签同页结束）
+        end_page = start_page
+        for _, _, next_page in toc[idx + 1:]:
+            if next_page >= start_page:
+                end_page = next_page
+                break
+        
+        for page_no in range(start_page, min(end_page, total_pages) + 1):
+            if page_no - 1 not in priority_pages:
+                priority_pages.append(page_no - 1)
+    
+    if not priority_pages:
+        return list(range(total_pages))
+    
+    priority_set = set(priority_pages)
+    return priority_pages + [idx for idx in range(total_pages) if idx not in priority_set]
+
+def has_hk_employee_info(text: str) -> bool:
+    """
+    判断页面文本是否包含员工相关信息（中英文）
+    
+    参数:
+        text: 页面文本
+    
+    返回:
+        包含员工关键词或员工情况章节返回True
+    """
+    # 检查是否包含员工相关关键词
+    if contains_any_keyword(text, HK_EMPLOYEE_KEYWORDS):
+        return True
+    
+    # 英文章节名不区分大小写，小写文本只生成一次
+    text_lower = text.lower()
+    has_employee_section = (
+        ("员工" in text or "雇员" in text or "employee" in text_lower or "staff" in text_lower) and 
+        ("情况" in text or "构成" in text or "information" in text_lower or "composition" in text_lower)
+    )
+    
+    return has_employee_section
+
+def extract_employee_count_from_hk_page(page_num: int, text: str, extract_tables: Callable[[], List],
+                                        verbose: bool = False) -> Optional[int]:
+    """
+    从单页的文本和表格中提取员工数量
+    
+    先识别表格，表格中找不到时回退到文本提取
+    
+    参数:
+        page_num: 页码（用于输出）
+        text: 页面文本
+        extract_tables: 提取页面表格的函数，返回的每个表格是二维列表，或返回二维列表的函数（按需提取）
+        verbose: 是否显示详细调试信息
+    
+    返回:
+        员工数量（整数），如果未找到返回None
+    """
+    keywords = HK_EMPLOYEE_KEYWORDS
+    
+    if verbose:
+        print(f"\n在第 {page_num} 页找到员工相关信息")
+    
+    tables = extract_tables()
+    
+    # 尝试从表格提取
+    if tables:
+        if verbose:
+            print(f"  找到 {len(tables)} 个表格")
+        
+        # 分析每个表格
+        for table_idx, table in enumerate(tables):
+            if callable(table):
+                table = table()
+            if verbose:
+                print(f"  分析表格 {table_idx + 1}:")
+            employee_count = analyze_table_for_employee_count(table, keywords, verbose=verbose)
+            if employee_count is not None:
+                if verbose:
+                    print(f"  [OK] 在表格 {table_idx + 1} 中找到员工数量: {employee_count:,}")
+                return employee_count
+    
+    # 如果表格提取失败，尝试从文本中提取
+    employee_count = extract_employee_count_from_text(text, keywords)
+    if employee_count is not None:
+        if verbose:
+            print(f"  [OK] 从文本中提取到员工数量: {employee_count:,}")
+    
+    return employee_count
 
 def is_reasonable_employee_count(num: int) -> bool:
     """
@@ -177,42 +455,36 @@ def analyze_table_for_employee_count(table: List[List], keywords: List[str], ver
     
     candidates = []
     
-    # 优先查找包含"合计"或"Total"的关键词行
+    # 只遍历一次表格：每行拼接一次文本、匹配一次关键词，再按关键词是否表示合计分配优先级
     for row_idx, row in enumerate(table):
         row_text = " ".join([str(cell) if cell else "" for cell in row])
         
-        # 检查是否包含合计相关的关键词
-        for keyword in keywords:
-            if keyword in row_text and ("合计" in keyword or "Total" in keyword or "total" in keyword.lower()):
+        numbers = None
+        for keyword in find_keywords(row_text, keywords):
+            # 同一行命中多个关键词时只提取一次数字
+            if numbers is None:
+                numbers = extract_numbers_from_row(row)
+            
+            # 优先查找包含"合计"或"Total"的关键词行
+            if is_total_keyword(keyword):
                 if verbose:
                     print(f"    找到合计关键词 '{keyword}' 在第 {row_idx + 1} 行（高优先级）")
                 
-                # 在这一行查找数字
-                numbers = extract_numbers_from_row(row)
-                if numbers:
-                    valid_numbers = [num for num in numbers if isinstance(num, int) and is_reasonable_employee_count(num)]
-                    if valid_numbers:
-                        max_num = max(valid_numbers)
-                        candidates.append((max_num, f"合计关键词行{row_idx+1}", 1))
-                        if verbose:
-                            print(f"    [OK] 候选数字: {max_num:,} (来自合计关键词行，优先级1)")
-    
-    # 查找其他关键词行
-    for row_idx, row in enumerate(table):
-        row_text = " ".join([str(cell) if cell else "" for cell in row])
-        
-        for keyword in keywords:
-            if keyword in row_text and "合计" not in keyword and "Total" not in keyword and "total" not in keyword.lower():
+                valid_numbers = [num for num in numbers if is_reasonable_employee_count(num)]
+                if valid_numbers:
+                    max_num = max(valid_numbers)
+                    candidates.append((max_num, f"合计关键词行{row_idx+1}", 1))
+                    if verbose:
+                        print(f"    [OK] 候选数字: {max_num:,} (来自合计关键词行，优先级1)")
+            else:
                 if verbose:
                     print(f"    找到关键词 '{keyword}' 在第 {row_idx + 1} 行")
                 
-                numbers = extract_numbers_from_row(row)
-                if numbers:
-                    for num in numbers:
-                        if isinstance(num, int) and is_reasonable_employee_count(num):
-                            candidates.append((num, f"关键词行{row_idx+1}", 2))
-                            if verbose:
-                                print(f"    [OK] 候选数字: {num:,} (来自关键词行，优先级2)")
+                for num in numbers:
+                    if is_reasonable_employee_count(num):
+                        candidates.append((num, f"关键词行{row_idx+1}", 2))
+                        if verbose:
+                            print(f"    [OK] 候选数字: {num:,} (来自关键词行，优先级2)")
     
     # 按优先级排序，返回最高优先级的数字
     if candidates:
@@ -247,23 +519,9 @@ def extract_numbers_from_row(row: List) -> List[int]:
         cell_str = cell_str.replace('人', '').replace('名', '').replace('位', '')
         cell_str = cell_str.replace('persons', '').replace('employees', '').replace('staff', '')
         
-        # 尝试提取数字
-        # 匹配整数（可能包含千位分隔符）
-        number_patterns = [
-            r'\d{1,3}(?:[,，]\d{3})*',  # 带千位分隔符的数字
-            r'\d+',  # 普通整数
-        ]
-        
-        for pattern in number_patterns:
-            matches = re.findall(pattern, cell_str)
-            for match in matches:
-                try:
-                    # 移除分隔符后转换为整数
-                    num_str = match.replace(',', '').replace('，', '')
-                    num = int(num_str)
-                    numbers.append(num)
-                except ValueError:
-                    continue
+        # 尝试提取数字（匹配结果都是数字串，可直接转换为整数）
+        for regex in CELL_NUMBER_REGEXES:
+            numbers.extend(map(int, regex.findall(cell_str)))
     
     return numbers
 
@@ -282,41 +540,73 @@ def extract_employee_count_from_text(text: str, keywords: List[str]) -> Optional
     lines = text.split('\n')
     
     for line in lines:
-        for keyword in keywords:
-            if keyword in line:
-                # 尝试从该行提取数字
-                numbers = re.findall(r'\d{1,3}(?:[,，]\d{3})*', line)
-                for num_str in numbers:
-                    try:
-                        num = int(num_str.replace(',', '').replace('，', ''))
-                        if is_reasonable_employee_count(num):
-                            return num
-                    except ValueError:
-                        continue
+        # 同一行命中多个关键词时提取的数字相同，只需处理一次
+        if contains_any_keyword(line, keywords):
+            # 尝试从该行提取数字
+            for num_str in THOUSANDS_NUMBER_RE.findall(line):
+                num = int(num_str.replace(',', '').replace('，', ''))
+                if is_reasonable_employee_count(num):
+                    return num
     
     return None
 
-def batch_extract_employee_count_from_pdfs(pdf_dir: str, output_csv: str = None) -> Dict[str, Optional[int]]:
+def _extract_employee_count_worker(pdf_path: str, verbose: bool = True) -> Tuple[Optional[int], str]:
+    """
+    批量提取的子进程任务
+    
+    详细输出先写入内存缓冲区，随结果返回主进程统一输出，避免多个子进程的输出交错
+    
+    返回:
+        (员工数量, 缓冲的输出文本)
+    """
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        employee_count = extract_employee_count_from_hk_pdf(pdf_path, verbose=verbose)
+    return employee_count, buffer.getvalue()
+
+def batch_extract_employee_count_from_pdfs(pdf_dir: str, output_csv: str = None,
+                                           max_workers: Optional[int] = None) -> Dict[str, Optional[int]]:
     """
     批量从PDF目录中提取员工数量
     
     参数:
         pdf_dir: PDF文件目录
         output_csv: 输出CSV文件路径（可选）
+        max_workers: 并行进程数（可选，默认为CPU核数；为1时在当前进程中逐个处理）
     
     返回:
         字典，格式为 {文件名: 员工数量}
     """
-    results = {}
+    counts = {}
     
     pdf_files = list(Path(pdf_dir).glob("*.pdf"))
     
     print(f"找到 {len(pdf_files)} 个PDF文件")
     
-    for pdf_file in pdf_files:
-        print(f"\n处理: {pdf_file.name}")
-        count = extract_employee_count_from_hk_pdf(str(pdf_file), verbose=True)
-        results[pdf_file.name] = count
+    # 每个PDF的解析互相独立且受CPU限制，用多进程并行处理
+    workers = min(max_workers or os.cpu_count() or 1, len(pdf_files))
+    
+    if workers > 1:
+        # 按模块名导入任务函数：本文件常通过 importlib 以别名加载，
+        # 子进程只能按真实模块名反序列化任务函数
+        from 港股_从年报提取员工数量 import _extract_employee_count_worker as worker
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(worker, str(pdf_file)): pdf_file for pdf_file in pdf_files}
+            # 按完成顺序输出进度
+            for future in as_completed(futures):
+                pdf_file = futures[future]
+                count, output = future.result()
+                print(f"\n处理: {pdf_file.name}")
+                print(output, end="")
+                counts[pdf_file.name] = count
+    else:
+        for pdf_file in pdf_files:
+            print(f"\n处理: {pdf_file.name}")
+            counts[pdf_file.name] = extract_employee_count_from_hk_pdf(str(pdf_file), verbose=True)
+    
+    # 结果保持文件扫描顺序，与处理完成顺序无关
+    results = {pdf_file.name: counts[pdf_file.name] for pdf_file in pdf_files}
     
     # 保存到CSV
     if output_csv:
@@ -329,7 +619,8 @@ def batch_extract_employee_count_from_pdfs(pdf_dir: str, output_csv: str = None)
     
     return results
 
-def extract_employee_count_by_year_from_pdfs(pdf_dir: str, symbol: str, start_year: int, end_year: int) -> Dict[int, Optional[int]]:
+def extract_employee_count_by_year_from_pdfs(pdf_dir: str, symbol: str, start_year: int, end_year: int,
+                                             max_workers: Optional[int] = None) -> Dict[int, Optional[int]]:
     """
     从PDF目录中按年份提取员工数量
     
@@ -338,11 +629,19 @@ def extract_employee_count_by_year_from_pdfs(pdf_dir: str, symbol: str, start_ye
         symbol: 股票代码（用于匹配文件名）
         start_year: 起始年份
         end_year: 结束年份
+        max_workers: 并行进程数（可选，默认为CPU核数；为1时在当前进程中逐个处理）
     
     返回:
         字典，格式为 {年份: 员工数量}
     """
-    results = {}
+    # 只列一次目录，在内存中匹配候选文件名（normcase 保持与文件系统一致的大小写规则）
+    try:
+        existing_files = {os.path.normcase(name) for name in os.listdir(pdf_dir)}
+    except OSError:
+        existing_files = set()
+    
+    # 先为每个年份找到对应的年报文件 {年份: 文件名}
+    year_files = {}
     
     for year in range(start_year, end_year + 1):
         # 尝试多种可能的文件名格式
@@ -354,19 +653,40 @@ def extract_employee_count_by_year_from_pdfs(pdf_dir: str, symbol: str, start_ye
             f"{year}年度报告.pdf",
         ]
         
-        found = False
+        year_files[year] = None
         for filename in possible_names:
-            pdf_path = os.path.join(pdf_dir, filename)
-            if os.path.exists(pdf_path):
-                print(f"\n处理 {year} 年年报: {filename}")
-                count = extract_employee_count_from_hk_pdf(pdf_path, verbose=True)
-                results[year] = count
-                found = True
+            if os.path.normcase(filename) in existing_files:
+                year_files[year] = filename
                 break
+    
+    found_years = [year for year, filename in year_files.items() if filename is not None]
+    workers = min(max_workers or os.cpu_count() or 1, len(found_years))
+    
+    # 多进程时先并行提取所有年份，再按年份顺序输出
+    outputs = {}
+    if workers > 1:
+        # 按模块名导入任务函数，原因同 batch_extract_employee_count_from_pdfs
+        from 港股_从年报提取员工数量 import _extract_employee_count_worker as worker
         
-        if not found:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {year: executor.submit(worker, os.path.join(pdf_dir, year_files[year])) for year in found_years}
+            outputs = {year: future.result() for year, future in futures.items()}
+    
+    results = {}
+    
+    for year, filename in year_files.items():
+        if filename is None:
             print(f"[WARNING] 未找到 {year} 年年报PDF文件")
             results[year] = None
+            continue
+        
+        print(f"\n处理 {year} 年年报: {filename}")
+        if year in outputs:
+            count, output = outputs[year]
+            print(output, end="")
+        else:
+            count = extract_employee_count_from_hk_pdf(os.path.join(pdf_dir, filename), verbose=True)
+        results[year] = count
     
     return results
 
@@ -5,11 +5,61 @@
 将港股财务数据接口适配到现有的A股财务分析框架
 """
 
+import re
+import time
+import weakref
 import akshare as ak
 import pandas as pd
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Optional, Dict, Tuple
 from datetime import datetime
 
+# 港股财务分析指标缓存 {港股代码: (获取时间, DataFrame)}，同一代码在有效期内只请求一次接口
+HK_INDICATOR_CACHE_TTL = 3600  # 秒
+HK_INDICATOR_CACHE_MAX_SIZE = 256
+_hk_indicator_cache: Dict[str, Tuple[float, pd.DataFrame]] = {}
+
+def fetch_hk_analysis_indicator(symbol_clean: str) -> Optional[pd.DataFrame]:
+    """
+    获取港股财务分析指标（带缓存）
+    
+    get_hk_annual_data 和 get_hk_symbol_name 共用同一份数据，缓存有效期内不重复请求网络；
+    请求失败或返回空数据时不缓存
+    
+    参数:
+        symbol_clean: 港股代码（不带 .HK 后缀），如 "00700"
+    
+    返回:
+        财务分析指标DataFrame的副本，调用方可以随意修改
+    """
+    now = time.monotonic()
+    cached = _hk_indicator_cache.get(symbol_clean)
+    if cached is not None and now - cached[0] < HK_INDICATOR_CACHE_TTL:
+        return cached[1].copy()
+    
+    indicator = ak.stock_financial_hk_analysis_indicator_em(symbol=symbol_clean)
+    if indicator is None or indicator.empty:
+        return indicator
+    
+    # 超出容量时先清理过期项，仍然超出则淘汰最早获取的一项
+    if len(_hk_indicator_cache) >= HK_INDICATOR_CACHE_MAX_SIZE:
+        for key in [k for k, (fetched_at, _) in _hk_indicator_cache.items() if now - fetched_at >= HK_INDICATOR_CACHE_TTL]:
+            del _hk_indicator_cache[key]
+        if len(_hk_indicator_cache) >= HK_INDICATOR_CACHE_MAX_SIZE:
+            del _hk_indicator_cache[min(_hk_indicator_cache, key=lambda k: _hk_indicator_cache[k][0])]
+    
+    _hk_indicator_cache[symbol_clean] = (now, indicator)
+    return indicator.copy()
+
+# 报告期中的4位数字片段（前瞻匹配，相邻片段可以重叠）
+YEAR_WINDOW_RE = re.compile(r'\d{4}')
+YEAR_WINDOWS_RE = re.compile(r'(?=(\d{4}))')
+
+# 报告期列缓存 {(id(数据框), 报告期列名): (数据框弱引用, 列索引对象, 报告期列)}
+_date_col_cache: Dict[Tuple[int, str], tuple] = {}
+
+@lru_cache(maxsize=4096)
 def is_hk_stock(symbol: str) -> bool:
     """
     判断是否为港股代码
@@ -48,30 +98,35 @@ def get_hk_annual_data(symbol: str, start_year: int = 2015, end_year: int = 2024
     }
     
     try:
-        # 获取财务分析指标（主要数据源）
-        print("正在获取港股财务分析指标数据...")
-        analysis_indicator = ak.stock_financial_hk_analysis_indicator_em(symbol=symbol_clean)
-        if analysis_indicator is not None and not analysis_indicator.empty:
-            results['analysis_indicator'] = analysis_indicator
-            print(f"[OK] 财务分析指标数据获取成功，共 {len(analysis_indicator)} 条记录")
+        # 两个接口互不依赖，同时发起请求，总耗时取决于较慢的一个
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            analysis_future = executor.submit(fetch_hk_analysis_indicator, symbol_clean)
+            financial_future = executor.submit(ak.stock_hk_financial_indicator_em, symbol=symbol_clean)
             
-            # 从分析指标中提取利润表相关数据
-            profit_data = extract_profit_from_hk_indicator(analysis_indicator)
-            if profit_data is not None:
-                results['profit'] = profit_data
-                print(f"[OK] 利润表数据提取成功")
-        else:
-            print("[FAIL] 财务分析指标数据获取失败或为空")
-        
-        # 获取财务指标（补充数据）
-        print("正在获取港股财务指标数据...")
-        try:
-            financial_indicator = ak.stock_hk_financial_indicator_em(symbol=symbol_clean)
-            if financial_indicator is not None and not financial_indicator.empty:
-                results['financial_indicator'] = financial_indicator
-                print(f"[OK] 财务指标数据获取成功，共 {len(financial_indicator)} 条记录")
-        except Exception as e:
-            print(f"[WARNING] 财务指标数据获取失败: {e}")
+            # 获取财务分析指标（主要数据源）
+            print("正在获取港股财务分析指标数据...")
+            analysis_indicator = analysis_future.result()
+            if analysis_indicator is not None and not analysis_indicator.empty:
+                results['analysis_indicator'] = analysis_indicator
+                print(f"[OK] 财务分析指标数据获取成功，共 {len(analysis_indicator)} 条记录")
+                
+                # 从分析指标中提取利润表相关数据
+                profit_data = extract_profit_from_hk_indicator(analysis_indicator)
+                if profit_data is not None:
+                    results['profit'] = profit_data
+                    print(f"[OK] 利润表数据提取成功")
+            else:
+                print("[FAIL] 财务分析指标数据获取失败或为空")
+            
+            # 获取财务指标（补充数据）
+            print("正在获取港股财务指标数据...")
+            try:
+                financial_indicator = financial_future.result()
+                if financial_indicator is not None and not financial_indicator.empty:
+                    results['financial_indicator'] = financial_indicator
+                    print(f"[OK] 财务指标数据获取成功，共 {len(financial_indicator)} 条记录")
+            except Exception as e:
+                print(f"[WARNING] 财务指标数据获取失败: {e}")
         
     except Exception as e:
         print(f"[FAIL] 获取港股数据失败: {e}")
@@ -103,24 +158,86 @@ def extract_profit_from_hk_indicator(analysis_indicator: pd.DataFrame) -> Option
         'REPORT_DATE': 'REPORT_DATE',  # 报告期
     }
     
-    # 创建利润表DataFrame
-    profit_data = pd.DataFrame()
-    
-    # 复制映射的字段
-    for hk_field, a_field in field_mapping.items():
-        if hk_field in analysis_indicator.columns:
-            profit_data[a_field] = analysis_indicator[hk_field]
+    # 收集映射的字段（报告期已包含在映射中）
+    columns = {
+        a_field: analysis_indicator[hk_field]
+        for hk_field, a_field in field_mapping.items()
+        if hk_field in analysis_indicator.columns
+    }
     
-    # 添加报告期字段（如果存在）
-    if 'REPORT_DATE' in analysis_indicator.columns:
-        profit_data['REPORT_DATE'] = analysis_indicator['REPORT_DATE']
-    elif 'FISCAL_YEAR' in analysis_indicator.columns:
+    if 'REPORT_DATE' not in analysis_indicator.columns and 'FISCAL_YEAR' in analysis_indicator.columns:
         # 如果没有REPORT_DATE，尝试从FISCAL_YEAR构造
-        profit_data['REPORT_DATE'] = analysis_indicator['FISCAL_YEAR']
+        columns['REPORT_DATE'] = analysis_indicator['FISCAL_YEAR']
+    
+    # 一次性创建利润表DataFrame，避免逐列插入
+    profit_data = pd.DataFrame(columns)
     
     return profit_data if not profit_data.empty else None
 
-def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPORT_DATE') -> Optional[pd.Series]:
+def find_date_col(df: pd.DataFrame, date_col_name: str = 'REPORT_DATE') -> Optional[str]:
+    """
+    查找数据框的报告期列，结果按数据框缓存
+    
+    逐年提取时同一数据框会被反复查找；列被修改后（df.columns 换成新对象）重新查找
+    
+    参数:
+        df: 数据框
+        date_col_name: 报告期列名
+    
+    返回:
+        报告期列名，如果没有则返回None
+    """
+    key = (id(df), date_col_name)
+    cached = _date_col_cache.get(key)
+    if cached is not None and cached[0]() is df and cached[1] is df.columns:
+        return cached[2]
+    
+    date_col = None
+    for col in df.columns:
+        if date_col_name in col or 'REPORT_DATE' in col or 'FISCAL_YEAR' in col:
+            date_col = col
+            break
+    
+    _date_col_cache[key] = (
+        weakref.ref(df, lambda _, key=key: _date_col_cache.pop(key, None)),
+        df.columns, date_col,
+    )
+    return date_col
+
+def get_year_row_index(df: pd.DataFrame, date_col: str) -> Dict[str, int]:
+    """
+    建立数据框的年份索引：年份 -> 报告期包含该年份的最后一条年报数据的行位置
+    
+    与逐年筛选的结果一致：报告期按字符串包含年份匹配；有 FISCAL_YEAR 列时只保留包含 12-31 的行。
+    需要查询多个年份时由调用方建立一次并传给 extract_year_data_hk（见 extract_years_data_hk）
+    
+    参数:
+        df: 数据框
+        date_col: 报告期列名
+    
+    返回:
+        年份索引字典，如 {"2023": 0, "2022": 1}
+    """
+    dates = df[date_col].astype(str).to_numpy()
+    row_positions = range(len(df))
+    
+    # 如果是年报，通常包含12-31
+    if 'FISCAL_YEAR' in df.columns:
+        row_positions = df['FISCAL_YEAR'].astype(str).str.contains('12-31', na=False).to_numpy().nonzero()[0]
+    
+    # 按行位置顺序写入，后面的行覆盖前面的行，即记录最后一条
+    year_index = {}
+    for position in row_positions:
+        value = dates[position]
+        if not isinstance(value, str):  # 缺失值
+            continue
+        for year_str in YEAR_WINDOWS_RE.findall(value):
+            year_index[year_str] = int(position)
+    
+    return year_index
+
+def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPORT_DATE',
+                         year_index: Optional[Dict[str, int]] = None) -> Optional[pd.Series]:
     """
     从港股数据框中提取指定年份的数据
     
@@ -128,6 +245,7 @@ def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPO
         df: 数据框
         year: 年份，如 2024
         date_col_name: 报告期列名
+        year_index: 可选，get_year_row_index 为该数据框建立的年份索引；提供时直接查索引，不再扫描报告期列
     
     返回:
         该年份的数据行（Series），如果没有则返回None
@@ -136,11 +254,7 @@ def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPO
         return None
     
     # 查找报告期列
-    date_col = None
-    for col in df.columns:
-        if date_col_name in col or 'REPORT_DATE' in col or 'FISCAL_YEAR' in col:
-            date_col = col
-            break
+    date_col = find_date_col(df, date_col_name)
     
     if date_col is None:
         return None
@@ -148,6 +262,11 @@ def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPO
     # 筛选指定年份的年报数据
     year_str = str(year)
     
+    # 调用方已建立年份索引时，常见的4位年份直接查索引
+    if year_index is not None and YEAR_WINDOW_RE.fullmatch(year_str):
+        position = year_index.get(year_str)
+        return df.iloc[position] if position is not None else None  # 索引中记录的是最后一条（最新的）
+    
     # 尝试多种日期格式匹配
     filtered = df[
         df[date_col].astype(str).str.contains(year_str, na=False)
@@ -162,6 +281,36 @@ def extract_year_data_hk(df: pd.DataFrame, year: int, date_col_name: str = 'REPO
     
     return None
 
+def extract_years_data_hk(df: pd.DataFrame, years: Iterable[int], date_col_name: str = 'REPORT_DATE') -> Dict[int, pd.Series]:
+    """
+    从港股数据框中一次性提取多个年份的数据
+    
+    结果与对每个年份调用 extract_year_data_hk 相同，但年份索引只建立一次，
+    不需要每个年份都对整列做字符串匹配
+    
+    参数:
+        df: 数据框
+        years: 年份列表
+        date_col_name: 报告期列名
+    
+    返回:
+        字典，格式为 {年份: 该年份的数据行（Series）}，按 years 的顺序排列；没有数据的年份不包含在内
+    """
+    if df is None or df.empty:
+        return {}
+    
+    date_col = find_date_col(df, date_col_name)
+    if date_col is None:
+        return {}
+    
+    year_index = get_year_row_index(df, date_col)
+    result = {}
+    for year in years:
+        row = extract_year_data_hk(df, year, date_col_name, year_index=year_index)
+        if row is not None:
+            result[year] = row
+    return result
+
 def get_value_from_row_hk(row: pd.Series, column_name: str, default: str = "-", return_numeric: bool = True):
     """
     从港股数据行中获取指定列的值，转换为数值（亿元）
@@ -208,7 +357,7 @@ def get_hk_symbol_name(symbol: str) -> str:
         symbol_clean = symbol.replace('.HK', '')
         # 尝试从财务分析指标中获取名称
         try:
-            indicator = ak.stock_financial_hk_analysis_indicator_em(symbol=symbol_clean)
+            indicator = fetch_hk_analysis_indicator(symbol_clean)
             if indicator is not None and not indicator.empty:
                 if 'SECURITY_NAME_ABBR' in indicator.columns:
                     name = indicator['SECURITY_NAME_ABBR'].iloc[0]
@@ -266,18 +415,20 @@ def get_annual_data_unified(symbol: str, start_year: int = 2015, end_year: int =
                 'balance_sheet': None
             }
             
+            # 三张报表互不依赖，同时发起请求；按原顺序读取结果，某张报表失败时不再读取后面的报表
+            fetchers = [
+                ('profit', ak.stock_profit_sheet_by_report_em),
+                ('cash_flow', ak.stock_cash_flow_sheet_by_report_em),
+                ('balance_sheet', ak.stock_balance_sheet_by_report_em),
+            ]
+            
             try:
-                profit = ak.stock_profit_sheet_by_report_em(symbol=symbol_with_suffix)
-                if profit is not None and not profit.empty:
-                    results['profit'] = profit
-                
-                cash_flow = ak.stock_cash_flow_sheet_by_report_em(symbol=symbol_with_suffix)
-                if cash_flow is not None and not cash_flow.empty:
-                    results['cash_flow'] = cash_flow
-                
-                balance_sheet = ak.stock_balance_sheet_by_report_em(symbol=symbol_with_suffix)
-                if balance_sheet is not None and not balance_sheet.empty:
-                    results['balance_sheet'] = balance_sheet
+                with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+                    futures = [(key, executor.submit(fetcher, symbol=symbol_with_suffix)) for key, fetcher in fetchers]
+                    for key, future in futures:
+                        df = future.result()
+                        if df is not None and not df.empty:
+                            results[key] = df
             except Exception as e:
                 print(f"[FAIL] 获取A股数据失败: {e}")
             
@@ -14,32 +14,353 @@
 
 import os
 import io
+import re
 import sys
+import json
+import time
+import traceback
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import pandas as pd
 import streamlit as st
-import plotly.express as px
+
+# 尝试导入 pyarrow（可选，用于把年报数据缓存到本地 Parquet 文件）
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 尝试导入 xlsxwriter（可选，港股报表导出优先使用，比 openpyxl 写入更快）
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+# 尝试导入 tkinter（可选，本机运行时用于弹出文件/文件夹选择对话框，服务器环境通常没有）
+try:
+    import tkinter as tk
+    from tkinter import filedialog
+    TKINTER_AVAILABLE = True
+except ImportError:
+    TKINTER_AVAILABLE = False
 
 # -----------------------------
 # 工具：动态导入模块
 # -----------------------------
-def load_module(name: str, path: str):
+# Streamlit 每次交互都会重新运行脚本，缓存后每个模块在进程内只执行一次；
+# 缓存键包含文件修改时间，模块文件被修改后下次使用时自动重新加载
+@st.cache_resource(show_spinner=False, max_entries=32)
+def load_module_cached(name: str, path: str, mtime: float):
     spec = importlib.util.spec_from_file_location(name, path)
     module = importlib.util.module_from_spec(spec)
     sys.modules[name] = module
     spec.loader.exec_module(module)
     return module
 
-# 预加载核心模块
+def load_module(name: str, path: str):
+    return load_module_cached(name, path, os.path.getmtime(path))
+
+# 预加载核心模块（报表下载工具和员工数量提取模块在对应功能中按需加载）
 fa_a = load_module("financial_analysis_a", "07_财务分析.py")
 fa_hk = load_module("financial_analysis_hk", "hk_financial_analysis_full.py")
 hk_adapter = load_module("hk_adapter", "hk_financial_adapter.py")
-dl_tool = load_module("report_downloader", "财务报表下载工具.py")
-emp_a = load_module("emp_a", "智能_从年报提取员工数量.py")
-emp_hk = load_module("emp_hk", "港股_从年报提取员工数量.py")
+
+# -----------------------------
+# 工具：年报数据缓存
+# -----------------------------
+# 财务分析的9个模块各自调用一次年报数据获取函数，同一股票重复分析时也会重新请求；
+# 缓存后同一股票、同一年份范围在有效期内只请求一次接口
+ANNUAL_DATA_CACHE_TTL = 24 * 60 * 60  # 秒
+
+class AnnualDataUnavailable(Exception):
+    """年报数据获取失败（不写入缓存），携带原始返回结果"""
+    def __init__(self, result: Dict):
+        super().__init__("年报数据获取失败")
+        self.result = result
+
+def _original(func):
+    """取被缓存包装之前的原始函数（脚本重新运行时避免重复包装）"""
+    return getattr(func, "__wrapped__", func)
+
+# 各市场的原始年报数据获取函数
+ANNUAL_DATA_FETCHERS = {
+    "A股": _original(fa_a.get_annual_data),
+    "港股": _original(hk_adapter.get_hk_annual_data),
+}
+
+# 本地磁盘缓存：内存缓存随进程重启丢失，磁盘上的 Parquet 文件在有效期内可跨进程复用
+ANNUAL_DATA_DISK_CACHE_DIR = os.path.join(".cache", "parquet")
+ANNUAL_DATA_DISK_CACHE_MARKETS = {"A股": "a", "港股": "hk"}
+
+def annual_data_disk_cache_prefix(market: str, symbol: str, start_year: int, end_year: int) -> str:
+    """
+    生成年报数据磁盘缓存的文件路径前缀
+    
+    参数:
+        market: 市场，"A股" 或 "港股"
+        symbol: 股票代码
+        start_year: 起始年份
+        end_year: 结束年份
+    
+    返回:
+        路径前缀；每张报表保存为 {前缀}_{键名}.parquet，其余字段和报表清单保存为 {前缀}.json
+    """
+    safe_symbol = re.sub(r"[^\w.]", "_", symbol)
+    name = f"{ANNUAL_DATA_DISK_CACHE_MARKETS[market]}_{safe_symbol}_{start_year}_{end_year}"
+    return os.path.join(ANNUAL_DATA_DISK_CACHE_DIR, name)
+
+def load_annual_data_from_disk(market: str, symbol: str, start_year: int, end_year: int) -> Optional[Dict]:
+    """
+    从磁盘缓存读取年报数据
+    
+    参数:
+        market: 市场，"A股" 或 "港股"
+        symbol: 股票代码
+        start_year: 起始年份
+        end_year: 结束年份
+    
+    返回:
+        与原始获取函数相同结构的字典；未安装 pyarrow、没有缓存、缓存过期或读取失败时返回 None
+    """
+    if not PARQUET_AVAILABLE:
+        return None
+    
+    prefix = annual_data_disk_cache_prefix(market, symbol, start_year, end_year)
+    try:
+        # 以清单文件的修改时间判断是否过期
+        if time.time() - os.path.getmtime(f"{prefix}.json") > ANNUAL_DATA_CACHE_TTL:
+            return None
+        with open(f"{prefix}.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        result = manifest["values"]
+        for key in manifest["frames"]:
+            result[key] = pd.read_parquet(f"{prefix}_{key}.parquet", engine="pyarrow")
+        return result
+    except Exception:
+        return None
+
+def save_annual_data_to_disk(market: str, symbol: str, start_year: int, end_year: int, result: Dict) -> None:
+    """
+    将年报数据写入磁盘缓存（写入失败时不影响返回结果）
+    
+    参数:
+        market: 市场，"A股" 或 "港股"
+        symbol: 股票代码
+        start_year: 起始年份
+        end_year: 结束年份
+        result: 原始获取函数返回的字典
+    """
+    if not PARQUET_AVAILABLE:
+        return
+    
+    prefix = annual_data_disk_cache_prefix(market, symbol, start_year, end_year)
+    frames = [key for key, value in result.items() if isinstance(value, pd.DataFrame)]
+    values = {key: value for key, value in result.items() if not isinstance(value, pd.DataFrame)}
+    try:
+        os.makedirs(ANNUAL_DATA_DISK_CACHE_DIR, exist_ok=True)
+        # 先删除旧清单，写入中途失败时不会读到新旧混合的缓存
+        if os.path.exists(f"{prefix}.json"):
+            os.remove(f"{prefix}.json")
+        for key in frames:
+            result[key].to_parquet(f"{prefix}_{key}.parquet", engine="pyarrow", compression="zstd")
+        # 清单文件最后写入，读取时只有清单存在才认为缓存完整
+        with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+            json.dump({"frames": frames, "values": values}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"写入年报数据磁盘缓存失败: {e}")
+
+@st.cache_data(ttl=ANNUAL_DATA_CACHE_TTL, show_spinner=False)
+def fetch_annual_data_cached(market: str, symbol: str, start_year: int, end_year: int) -> Dict:
+    """
+    获取年报数据（带缓存）
+    
+    参数:
+        market: 市场，"A股" 或 "港股"
+        symbol: 股票代码
+        start_year: 起始年份
+        end_year: 结束年份
+    
+    返回:
+        原始获取函数返回的字典；一张报表都没有获取到时抛出 AnnualDataUnavailable，不缓存失败结果
+    """
+    result = load_annual_data_from_disk(market, symbol, start_year, end_year)
+    if result is not None:
+        return result
+    
+    result = ANNUAL_DATA_FETCHERS[market](symbol, start_year, end_year)
+    if not any(isinstance(value, pd.DataFrame) for value in result.values()):
+        raise AnnualDataUnavailable(result)
+    save_annual_data_to_disk(market, symbol, start_year, end_year, result)
+    return result
+
+def cached_annual_data_fetcher(market: str):
+    """
+    生成与原始获取函数接口一致的带缓存版本，用于替换各模块中的年报数据获取函数
+    
+    参数:
+        market: 市场，"A股" 或 "港股"
+    
+    返回:
+        get_annual_data(symbol, start_year, end_year) 形式的函数
+    """
+    def get_annual_data(symbol, start_year=2015, end_year=2024):
+        try:
+            return fetch_annual_data_cached(market, symbol, start_year, end_year)
+        except AnnualDataUnavailable as e:
+            return e.result
+    
+    get_annual_data.__wrapped__ = ANNUAL_DATA_FETCHERS[market]
+    return get_annual_data
+
+# A股分析模块的9个计算函数都通过 get_annual_data 取数；
+# 港股分析模块的 get_annual_data 包装函数需要每次运行以设置年结日，因此替换其内部调用的 get_hk_annual_data，
+# 报表下载的港股分支与其共用同一份缓存
+fa_a.get_annual_data = cached_annual_data_fetcher("A股")
+fa_hk.get_hk_annual_data = cached_annual_data_fetcher("港股")
+hk_adapter.get_hk_annual_data = cached_annual_data_fetcher("港股")
+
+# -----------------------------
+# 工具：分析结果缓存
+# -----------------------------
+# 只改动勾选模块后重新分析时，已计算过的模块直接复用结果，不再重新计算
+ANALYSIS_MODULES = {"A股": fa_a, "港股": fa_hk}
+
+class MetricsUnavailable(Exception):
+    """分析模块没有计算出结果（不写入缓存），携带原始返回结果"""
+    def __init__(self, result: Optional[pd.DataFrame]):
+        super().__init__("分析结果为空")
+        self.result = result
+
+@st.cache_data(ttl=ANNUAL_DATA_CACHE_TTL, max_entries=256, show_spinner=False)
+def calculate_metrics_cached(market: str, func_name: str, symbol: str, start_year: int, end_year: int,
+                             employee_csv: Optional[bytes] = None) -> pd.DataFrame:
+    """
+    调用分析模块的计算函数（带缓存）
+    
+    参数:
+        market: 市场，"A股" 或 "港股"
+        func_name: 计算函数名，如 "calculate_revenue_metrics"
+        symbol: 股票代码
+        start_year: 起始年份
+        end_year: 结束年份
+        employee_csv: 上传的员工数量CSV内容（仅人均数据使用，按内容参与缓存键）
+    
+    返回:
+        计算结果；结果为空时抛出 MetricsUnavailable，不缓存空结果
+    """
+    func = getattr(ANALYSIS_MODULES[market], func_name)
+    if employee_csv is not None:
+        # 直接从内存缓冲区读取上传的CSV，不再写入临时文件
+        result = func(symbol, start_year, end_year, employee_csv_path=io.BytesIO(employee_csv))
+    else:
+        result = func(symbol, start_year, end_year)
+    if result is None or result.empty:
+        raise MetricsUnavailable(result)
+    return result
+
+def calculate_metrics(market: str, func_name: str, symbol: str, start_year: int, end_year: int,
+                      employee_csv: Optional[bytes] = None) -> Optional[pd.DataFrame]:
+    """调用 calculate_metrics_cached，空结果时返回计算函数的原始返回值"""
+    try:
+        return calculate_metrics_cached(market, func_name, symbol, start_year, end_year, employee_csv)
+    except MetricsUnavailable as e:
+        return e.result
+
+@st.cache_data(ttl=ANNUAL_DATA_CACHE_TTL, show_spinner=False)
+def get_symbol_name_cached(market: str, symbol: str) -> str:
+    """获取股票名称（带缓存，A股需要下载全部股票列表）；分析模块不提供时返回股票代码"""
+    fa = ANALYSIS_MODULES[market]
+    return fa.get_symbol_name(symbol) if hasattr(fa, "get_symbol_name") else symbol
+
+# -----------------------------
+# 工具：文件/文件夹选择对话框
+# -----------------------------
+def open_tk_dialog(dialog, **kwargs) -> Optional[str]:
+    """
+    弹出 tkinter 文件/文件夹选择对话框
+    
+    Tk 根窗口只能在创建它的线程中使用，而 Streamlit 每次重新运行都在新的线程中执行脚本，
+    所以每次弹框都新建一个隐藏的置顶根窗口，关闭对话框后立即销毁（出错时也销毁）
+    
+    参数:
+        dialog: filedialog 中的对话框函数，如 filedialog.askdirectory
+        **kwargs: 传给对话框函数的参数（title、filetypes 等）
+    
+    返回:
+        选择的路径；取消选择时返回 None
+    """
+    root = tk.Tk()
+    try:
+        root.withdraw()  # 隐藏主窗口
+        root.attributes('-topmost', True)  # 窗口置顶
+        return dialog(**kwargs) or None
+    finally:
+        root.destroy()
+
+def path_input(label: str, state_key: str, default: str, **kwargs) -> str:
+    """
+    路径输入框（显示在侧边栏）
+    
+    输入框的值由控件 key 管理，只在内容改变时同步到 state_key；切换功能页面时 Streamlit
+    会清除未显示控件的状态，回到页面时再从 state_key 恢复之前输入或选择的路径
+    
+    参数:
+        label: 输入框标签
+        state_key: 保存路径的 session_state 键
+        default: 默认路径
+        **kwargs: 传给 st.text_input 的其他参数（如 placeholder）
+    
+    返回:
+        输入框中的路径
+    """
+    widget_key = f"{state_key}_input"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = default
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = st.session_state[state_key]
+    
+    def sync_path():
+        st.session_state[state_key] = st.session_state[widget_key]
+    
+    return st.text_input(label, key=widget_key, on_change=sync_path, **kwargs)
+
+def pick_path(state_key: str, picker) -> None:
+    """
+    选择按钮的回调：弹出选择对话框，把选中的路径写入 state_key 和对应的输入框
+    （回调在脚本重新运行之前执行，输入框随本次运行直接显示新路径）
+    """
+    selected = picker()
+    if selected:
+        st.session_state[state_key] = selected
+        st.session_state[f"{state_key}_input"] = selected
+
+# -----------------------------
+# 会话数据：一次分析/下载的结果整体保存在 session_state 的一个键下
+# -----------------------------
+@dataclass
+class AnalysisSession:
+    """财务分析结果"""
+    results: Dict[str, pd.DataFrame]
+    company_name: str
+    timestamp: str
+    filepath: str
+    excel_bytes: Optional[bytes] = None
+    display_cache: Dict[str, pd.DataFrame] = field(default_factory=dict)  # Sheet名 -> 字符串化的预览表
+
+@dataclass
+class ReportSession:
+    """报表下载结果"""
+    result_dict: Dict
+    excel_bytes: Optional[bytes]
+    company_name: str
+    chinese_mappings: Dict = field(default_factory=dict)  # 港股英文字段名到中文名称的映射
+    display_cache: Dict[Tuple[int, str], pd.DataFrame] = field(default_factory=dict)  # (年份, 报表类型) -> 预览表
 
 # -----------------------------
 # 页面配置
@@ -119,6 +440,218 @@ def get_formula_notes(sheet_name):
     
     return formula_notes
 
+# -----------------------------
+# 辅助函数：金额换算为亿元
+# -----------------------------
+def convert_to_yi(values: pd.Series) -> pd.Series:
+    """
+    将整列金额从元转换为亿元，保留2位小数（跳过非数值）
+    
+    参数:
+        values: 金额列
+    
+    返回:
+        换算后的列；缺失值保持缺失，无法转换为数值的值保持原样
+    """
+    num = pd.to_numeric(values, errors="coerce")
+    converted = (num / 100000000).round(2)
+    # 只有存在非数值内容时才需要回填原值
+    keep_original = num.isna() & values.notna()
+    if keep_original.any():
+        converted = converted.where(~keep_original, values)
+    return converted
+
+def format_yi_for_display(values: pd.Series) -> pd.Series:
+    """
+    将亿元金额列格式化为字符串用于预览（避免 Arrow 序列化混合类型时出错）
+    
+    参数:
+        values: 亿元金额列，可能混有文本
+    
+    返回:
+        字符串列；数值保留2位小数，缺失值为空字符串，文本保持原样
+    """
+    num = pd.to_numeric(values, errors="coerce")
+    formatted = num.map("{:.2f}".format, na_action="ignore").astype(object)
+    is_text = num.isna() & values.notna()
+    if is_text.any():
+        formatted = formatted.where(~is_text, values.astype(str))
+    return formatted.fillna("")
+
+def hk_statement_table(df: pd.DataFrame, chinese_mapping: Union[Dict[str, str], pd.Series]) -> pd.DataFrame:
+    """
+    将港股单年报表（单行宽格式）转为 科目 | 数值（亿元） 两列
+    
+    参数:
+        df: 单行的港股报表数据框
+        chinese_mapping: 英文字段名到中文名称的映射（字典或以英文字段名为索引的 Series）
+    
+    返回:
+        包含 科目、数值 两列的数据框；科目使用中文名称（无映射时保留原字段名）
+    """
+    # 排除 REPORT_DATE 列：按列名掩码直接取列，不再复制出一份去掉该列的数据框
+    keep = df.columns != 'REPORT_DATE'
+    # 每年的报表只有一行，直接用列名和该行数值构造，不做整表转置
+    df_t = pd.DataFrame({
+        "科目": df.columns[keep].to_numpy(),
+        "数值": df.iloc[0, keep].to_numpy(),
+    })
+    # 将金额从元转换为亿元（跳过非数值）
+    df_t["数值"] = convert_to_yi(df_t["数值"])
+    # 使用中文名称映射替换英文字段名
+    df_t["科目"] = df_t["科目"].map(chinese_mapping).fillna(df_t["科目"])  # 如果有映射就用中文，否则用原值
+    return df_t
+
+def build_report_preview(df_preview: pd.DataFrame, market: str,
+                         chinese_mapping: Union[Dict[str, str], pd.Series]) -> pd.DataFrame:
+    """
+    生成报表预览表（科目 | 数值(亿元)），数值列已格式化为字符串
+    
+    参数:
+        df_preview: 某一年某张报表的数据
+        market: 市场，"A股" 或 "港股"
+        chinese_mapping: 港股英文字段名到中文名称的映射（A股不使用）
+    
+    返回:
+        预览用数据框
+    """
+    # A股数据已经是格式化后的（科目、中文科目、数值(亿)），港股需要转置
+    if market == "A股":
+        # A股：直接显示，但只显示科目和数值(亿)
+        display_df = df_preview[["科目", "数值(亿)"]].copy()
+    else:
+        # 港股：转置，并转换为亿元，使用中文名称
+        display_df = hk_statement_table(df_preview, chinese_mapping)
+    display_df.columns = ["科目", "数值(亿元)"]
+    # 确保"数值"列为字符串类型，避免 Arrow 序列化错误
+    display_df["数值(亿元)"] = format_yi_for_display(display_df["数值(亿元)"])
+    return display_df
+
+# 港股报表导出：每年一个Sheet，依次为三张报表
+HK_REPORT_STATEMENTS = [
+    ("资产负债表", "balance"),
+    ("利润表", "profit"),
+    ("现金流量表", "cash_flow"),
+]
+
+def build_hk_report_rows(year_data: Dict[str, Optional[pd.DataFrame]],
+                         chinese_mappings: Dict[str, Union[Dict[str, str], pd.Series]]) -> Tuple[List[list], Set[int]]:
+    """
+    生成港股报表某一年Sheet的所有行（金额已转换为亿元）
+    
+    参数:
+        year_data: 该年的报表，格式为 {"balance"/"profit"/"cash_flow": 单行数据框或None}
+        chinese_mappings: 各报表的英文字段名到中文名称的映射
+    
+    返回:
+        (行列表, 标题行的行号集合)；缺失值为 None，报表之间空两行
+    """
+    rows = []
+    header_rows = set()
+    for title, stmt_key in HK_REPORT_STATEMENTS:
+        df = year_data[stmt_key]
+        if df is None or df.empty:
+            continue
+        # 行转列：科目 | 数值（亿元）
+        df_t = hk_statement_table(df, chinese_mappings.get(stmt_key, {}))
+        # 报表之间空两行
+        if rows:
+            rows.extend([[], []])
+        # 标题行：【报表名】 | 数值
+        header_rows.add(len(rows))
+        rows.append([f"【{title}】", "数值"])
+        # 数据行，缺失值写为空单元格
+        for subject, value in df_t.itertuples(index=False):
+            rows.append([None if pd.isna(subject) else subject, None if pd.isna(value) else value])
+    return rows, header_rows
+
+def hk_report_column_widths(rows: List[list]) -> List[float]:
+    """
+    计算自适应列宽（中文字符按2个字符宽度计算）
+    
+    参数:
+        rows: 行列表
+    
+    返回:
+        各列宽度
+    """
+    def display_length(value) -> int:
+        # 非ASCII字符按2计：总长度的2倍减去ASCII字符数，ASCII字符数由编码时丢弃非ASCII字符得到，不再逐字符调用 ord
+        text = str(value)
+        return 2 * len(text) - len(text.encode("ascii", "ignore"))
+    
+    widths = []
+    for col_idx in range(max(len(row) for row in rows)):
+        max_length = max((display_length(row[col_idx]) for row in rows
+                          if col_idx < len(row) and row[col_idx] is not None), default=0)
+        widths.append(min(max(max_length + 2, 8), 50) if max_length > 0 else 10)
+    return widths
+
+def write_hk_report_excel(sheets: Dict[str, Tuple[List[list], Set[int]]]) -> bytes:
+    """
+    将港股报表写成Excel文件内容
+    
+    已安装 xlsxwriter 时使用其 constant_memory 模式逐行写入，否则使用 openpyxl 只写模式；
+    两种方式都不在内存中保留完整的单元格对象，标题行样式与 pandas 写入的表头样式一致
+    
+    参数:
+        sheets: 字典，格式为 {Sheet名称: (行列表, 标题行的行号集合)}
+    
+    返回:
+        xlsx 文件的字节内容
+    """
+    output = io.BytesIO()
+    
+    if XLSXWRITER_AVAILABLE:
+        wb = xlsxwriter.Workbook(output, {"constant_memory": True, "strings_to_numbers": False})
+        header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        for sheet_name, (rows, header_rows) in sheets.items():
+            ws = wb.add_worksheet(sheet_name)
+            for col_idx, width in enumerate(hk_report_column_widths(rows)):
+                ws.set_column(col_idx, col_idx, width)
+            for row_idx, row in enumerate(rows):
+                cell_format = header_format if row_idx in header_rows else None
+                for col_idx, value in enumerate(row):
+                    if value is None:
+                        continue
+                    # 文本一律按字符串写入，避免以 "=" 开头的科目名被当作公式
+                    if isinstance(value, str):
+                        ws.write_string(row_idx, col_idx, value, cell_format)
+                    else:
+                        ws.write(row_idx, col_idx, value, cell_format)
+        wb.close()
+        return output.getvalue()
+    
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+    
+    wb = Workbook(write_only=True)
+    thin = Side(style="thin")
+    header_font = Font(bold=True)
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_alignment = Alignment(horizontal="center", vertical="top")
+    for sheet_name, (rows, header_rows) in sheets.items():
+        ws = wb.create_sheet(sheet_name)
+        # 只写模式需要在写入数据之前设置列宽
+        for col_idx, width in enumerate(hk_report_column_widths(rows)):
+            ws.column_dimensions[get_column_letter(col_idx + 1)].width = width
+        for row_idx, row in enumerate(rows):
+            if row_idx in header_rows:
+                cells = []
+                for value in row:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.font = header_font
+                    cell.border = header_border
+                    cell.alignment = header_alignment
+                    cells.append(cell)
+                ws.append(cells)
+            else:
+                ws.append(row)
+    wb.save(output)
+    return output.getvalue()
+
 # -----------------------------
 # 功能 1：财务分析
 # -----------------------------
@@ -151,93 +684,74 @@ def run_financial_analysis():
         results: Dict[str, pd.DataFrame] = {}
 
         try:
-            if market == "A股":
-                fa = fa_a
-            else:
-                fa = fa_hk
-            company_name = fa.get_symbol_name(symbol) if hasattr(fa, "get_symbol_name") else symbol
+            fa = ANALYSIS_MODULES[market]
+            company_name = get_symbol_name_cached(market, symbol)
 
             progress = st.progress(0)
             done = 0
+            shown = 0.0
             total = sum(modules.values()) or 1
 
             def step():
-                nonlocal done
+                # 进度变化达到5%或全部完成时才刷新进度条，减少发往前端的消息
+                nonlocal done, shown
                 done += 1
-                progress.progress(min(1.0, done / total))
+                pct = done / total
+                if pct - shown >= 0.05 or done == total:
+                    progress.progress(pct)
+                    shown = pct
 
-            # 营收基本数据
-            if modules["营收基本数据"]:
-                df = fa.calculate_revenue_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["营收基本数据"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "营收基本数据", timestamp=timestamp)
-                step()
-            # 费用构成
-            if modules["费用构成"]:
-                df = fa.calculate_expense_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["费用构成"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "费用构成", timestamp=timestamp)
-                step()
-            # 增长率
-            if modules["增长率"]:
-                df = fa.calculate_growth_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["增长"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "增长", timestamp=timestamp)
-                step()
-            # 资产负债
-            if modules["资产负债"]:
-                df = fa.calculate_balance_sheet_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["资产负债"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "资产负债", timestamp=timestamp)
-                step()
-            # WC分析
-            if modules["WC分析"]:
-                df = fa.calculate_wc_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["WC分析"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "WC分析", timestamp=timestamp)
-                step()
-            # 固定资产投入分析
-            if modules["固定资产投入分析"]:
-                df = fa.calculate_fixed_asset_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["固定资产投入分析"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "固定资产投入分析", timestamp=timestamp)
-                step()
-            # 收益率和杜邦分析
-            if modules["收益率和杜邦分析"]:
-                df = fa.calculate_roi_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["收益率和杜邦分析"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "收益率和杜邦分析", timestamp=timestamp)
-                step()
-            # 资产周转
-            if modules["资产周转"]:
-                df = fa.calculate_asset_turnover_metrics(symbol, start_year, end_year)
-                if df is not None and not df.empty:
-                    results["资产周转"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "资产周转", timestamp=timestamp)
-                step()
-            # 人均数据
-            if modules["人均数据"]:
-                csv_path = None
-                if employee_csv:
-                    import tempfile
-                    csv_bytes = employee_csv.getvalue()
-                    # 使用系统临时目录，兼容 Windows 和 Linux
-                    temp_dir = tempfile.gettempdir()
-                    csv_path = os.path.join(temp_dir, employee_csv.name)
-                    with open(csv_path, "wb") as f:
-                        f.write(csv_bytes)
-                df = fa.calculate_per_capita_metrics(symbol, start_year, end_year, employee_csv_path=csv_path)
+            # 人均数据需要的员工CSV：直接使用上传内容，按内容参与结果缓存
+            csv_bytes = employee_csv.getvalue() if modules["人均数据"] and employee_csv else None
+
+            # (模块名, Sheet名, 计算函数名, 额外参数)，按Excel中的Sheet顺序排列
+            tasks = [
+                ("营收基本数据", "营收基本数据", "calculate_revenue_metrics", {}),
+                ("费用构成", "费用构成", "calculate_expense_metrics", {}),
+                ("增长率", "增长", "calculate_growth_metrics", {}),
+                ("资产负债", "资产负债", "calculate_balance_sheet_metrics", {}),
+                ("WC分析", "WC分析", "calculate_wc_metrics", {}),
+                ("固定资产投入分析", "固定资产投入分析", "calculate_fixed_asset_metrics", {}),
+                ("收益率和杜邦分析", "收益率和杜邦分析", "calculate_roi_metrics", {}),
+                ("资产周转", "资产周转", "calculate_asset_turnover_metrics", {}),
+                ("人均数据", "人均数据", "calculate_per_capita_metrics", {"employee_csv": csv_bytes}),
+            ]
+            tasks = [task for task in tasks if modules[task[0]]]
+
+            # 各模块的计算互不依赖，耗时主要在网络请求上，用线程池并行计算；
+            # 同一份年报数据由缓存保证只请求一次，其余线程等待缓存结果
+            computed: Dict[str, Optional[pd.DataFrame]] = {}
+            if tasks:
+                with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+                    futures = {
+                        executor.submit(calculate_metrics, market, func_name, symbol, start_year, end_year,
+                                        **kwargs): sheet_name
+                        for _, sheet_name, func_name, kwargs in tasks
+                    }
+                    for future in as_completed(futures):
+                        computed[futures[future]] = future.result()
+                        step()
+
+            # 按Sheet顺序汇总结果，一次性写入Excel文件
+            for _, sheet_name, _, _ in tasks:
+                df = computed[sheet_name]
                 if df is not None and not df.empty:
-                    results["人均数据"] = df
-                    fa.save_to_excel(df, symbol, company_name, start_year, end_year, "人均数据", timestamp=timestamp)
-                step()
+                    results[sheet_name] = df
+            # 注意：save_all_to_excel函数统一使用"财务分析"作为文件名，不区分A股/港股
+            filepath = os.path.join("output", f"{company_name}_{start_year}-{end_year}_财务分析_{timestamp}.xlsx")
+            excel_bytes = None
+            if results:
+                # 在内存中生成Excel，下载按钮直接使用这份数据，不再从磁盘读回
+                buffer = io.BytesIO()
+                if fa.save_all_to_excel(results, symbol, company_name, start_year, end_year, timestamp=timestamp, output=buffer) is not None:
+                    excel_bytes = buffer.getvalue()
+                    # 同时保存到 output 目录（目录不可写时不影响下载）
+                    try:
+                        os.makedirs("output", exist_ok=True)
+                        with open(filepath, "wb") as f:
+                            f.write(excel_bytes)
+                    except OSError as e:
+                        st.warning(f"Excel 文件保存到 output 目录失败：{e}")
 
             progress.progress(1.0)
             st.success("分析完成！")
@@ -246,31 +760,32 @@ def run_financial_analysis():
                 st.warning("未生成任何结果，请检查数据是否可用。")
                 return
 
-            # 保存结果到 session_state
-            st.session_state[session_key] = results
-            st.session_state[f"{session_key}_company"] = company_name
-            st.session_state[f"{session_key}_timestamp"] = timestamp
-            # 注意：save_to_excel函数统一使用"财务分析"作为文件名，不区分A股/港股
-            st.session_state[f"{session_key}_filepath"] = os.path.join("output", f"{company_name}_{start_year}-{end_year}_财务分析_{timestamp}.xlsx")
+            # 保存结果到 session_state（重新分析后预览表缓存随之清空）
+            st.session_state[session_key] = AnalysisSession(results, company_name, timestamp, filepath, excel_bytes)
 
         except Exception as e:
             st.error(f"分析失败：{e}")
-            import traceback
             st.code(traceback.format_exc())
 
     # 显示分析结果（从 session_state 读取）
-    if session_key in st.session_state:
-        results = st.session_state[session_key]
-        company_name = st.session_state.get(f"{session_key}_company", symbol)
-        timestamp = st.session_state.get(f"{session_key}_timestamp", "")
-        filepath = st.session_state.get(f"{session_key}_filepath", "")
+    analysis = st.session_state.get(session_key)
+    if analysis is not None:
+        results = analysis.results
+        company_name = analysis.company_name
+        timestamp = analysis.timestamp
+        filepath = analysis.filepath
+        excel_bytes = analysis.excel_bytes
 
         sheet = st.selectbox("选择要查看的Sheet", list(results.keys()))
         
         # 显示数据表格
         st.subheader(f"📊 {sheet}")
-        # 将DataFrame转换为字符串类型以避免PyArrow类型转换问题（混合类型：数值和"-"）
-        display_df = results[sheet].astype(str)
+        # 将DataFrame转换为字符串类型以避免PyArrow类型转换问题（混合类型：数值和"-"）；
+        # 按Sheet缓存在本次分析结果中，切换指标等控件触发重新运行时不再逐个单元格转换
+        display_df = analysis.display_cache.get(sheet)
+        if display_df is None:
+            display_df = results[sheet].astype(str)
+            analysis.display_cache[sheet] = display_df
         st.dataframe(display_df, width='stretch', height=420)
         
         # 显示公式注释
@@ -304,27 +819,20 @@ def run_financial_analysis():
                     )
                     
                     if selected_metrics:
-                        # 准备绘图数据
-                        chart_data = []
-                        for metric in selected_metrics:
-                            metric_row = df[df["科目"] == metric]
-                            if not metric_row.empty:
-                                for year_col in year_cols:
-                                    value = metric_row[year_col].iloc[0]
-                                    # 跳过 "-" 和非数值
-                                    if value != "-" and pd.notna(value):
-                                        try:
-                                            numeric_value = float(value)
-                                            chart_data.append({
-                                                "年份": int(year_col),
-                                                "指标": metric,
-                                                "数值": numeric_value
-                                            })
-                                        except (ValueError, TypeError):
-                                            pass
+                        # 准备绘图数据：每个指标取第一行，按所选顺序一次取出所有年份列，
+                        # 转置后 melt 为长表（按指标依次排列各年份），不再逐个指标筛选、逐个单元格转换
+                        metric_rows = df.drop_duplicates("科目").set_index("科目")
+                        metric_rows = metric_rows.loc[[m for m in selected_metrics if m in metric_rows.index], year_cols]
+                        chart_df = metric_rows.T.melt(var_name="指标", value_name="数值", ignore_index=False)
+                        chart_df = chart_df.rename_axis("年份").reset_index()
+                        # 跳过 "-" 和非数值
+                        chart_df["数值"] = pd.to_numeric(chart_df["数值"], errors="coerce").astype(float)
+                        chart_df = chart_df.dropna(subset=["数值"])
+                        chart_df["年份"] = chart_df["年份"].astype(int)
                         
-                        if chart_data:
-                            chart_df = pd.DataFrame(chart_data)
+                        if not chart_df.empty:
+                            # plotly 导入较慢（约 0.15 秒），只在首次绘制趋势图时导入
+                            import plotly.express as px
                             fig = px.line(
                                 chart_df,
                                 x="年份",
@@ -339,14 +847,12 @@ def run_financial_analysis():
                             st.info("💡 所选指标没有可绘制的数值数据")
         except Exception as e:
             st.warning(f"⚠️ 图表生成失败：{str(e)}")
-            import traceback
             st.code(traceback.format_exc())
 
         # 下载Excel文件
-        if filepath and os.path.exists(filepath):
-            with open(filepath, "rb") as f:
-                st.download_button("📥 下载Excel文件", data=f.read(), file_name=os.path.basename(filepath),
-                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        if excel_bytes:
+            st.download_button("📥 下载Excel文件", data=excel_bytes, file_name=os.path.basename(filepath),
+                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         else:
             st.info("Excel 文件尚未生成或路径不存在。")
     else:
@@ -368,24 +874,11 @@ def run_report_download():
     session_key = f"report_data_{market}_{symbol}_{start_year}_{end_year}"
     if run_btn:
         # 点击按钮时清空旧数据
-        if session_key in st.session_state:
-            del st.session_state[session_key]
-        if f"{session_key}_excel" in st.session_state:
-            del st.session_state[f"{session_key}_excel"]
-        if f"{session_key}_company" in st.session_state:
-            del st.session_state[f"{session_key}_company"]
+        st.session_state.pop(session_key, None)
     
-    # 如果已有数据，直接使用；否则提示用户点击按钮
-    if session_key not in st.session_state:
-        if not run_btn:
-            st.info("在左侧选择报表类型并点击开始下载。")
-            return
-    else:
-        # 已有数据，显示预览和下载
-        result_dict = st.session_state[session_key]
-        excel_bytes = st.session_state.get(f"{session_key}_excel")
-        company_name = st.session_state.get(f"{session_key}_company", symbol)
-        
+    def render_preview(report: ReportSession):
+        """显示报表预览和Excel下载按钮"""
+        result_dict = report.result_dict
         # 显示预览选择器（A股和港股都支持）
         st.subheader(f"📊 {'A股' if market == 'A股' else '港股'}报表预览")
         year_options = sorted(result_dict.keys())
@@ -401,54 +894,41 @@ def run_report_download():
                 "利润表": "profit",
                 "现金流量表": "cash_flow",
             }
-            df_preview = result_dict.get(sel_year, {}).get(stmt_map[sel_type])
-            if df_preview is None or df_preview.empty:
+            # 预览表按 (年份, 报表类型) 缓存，切换控件触发重新运行时不再重复转换和格式化；
+            # 缓存放在本次下载结果中，重新下载时随其他数据一起清空
+            display_df = report.display_cache.get((sel_year, sel_type))
+            if display_df is None:
+                df_preview = result_dict.get(sel_year, {}).get(stmt_map[sel_type])
+                if df_preview is not None and not df_preview.empty:
+                    chinese_mapping = report.chinese_mappings.get(stmt_map[sel_type], {})
+                    display_df = build_report_preview(df_preview, market, chinese_mapping)
+                    report.display_cache[(sel_year, sel_type)] = display_df
+            if display_df is None:
                 st.info(f"{sel_year} 年的 {sel_type} 数据为空。")
             else:
-                # A股数据已经是格式化后的（科目、中文科目、数值(亿)），港股需要转置
-                if market == "A股":
-                    # A股：直接显示，但只显示科目和数值(亿)
-                    display_df = df_preview[["科目", "数值(亿)"]].copy()
-                    display_df.columns = ["科目", "数值(亿元)"]
-                else:
-                    # 港股：转置，并转换为亿元，使用中文名称
-                    # 排除 REPORT_DATE 列
-                    df_to_transpose = df_preview.drop(columns=['REPORT_DATE'], errors='ignore')
-                    df_t = df_to_transpose.T.reset_index()
-                    df_t.columns = ["科目", "数值"]
-                    # 将金额从元转换为亿元（跳过非数值）
-                    def convert_to_yi(x):
-                        if pd.isna(x) or str(x) == 'nan':
-                            return x
-                        try:
-                            return round(float(x) / 100000000, 2)
-                        except (ValueError, TypeError):
-                            return x
-                    df_t["数值"] = df_t["数值"].apply(convert_to_yi)
-                    # 使用中文名称映射替换英文字段名
-                    chinese_mappings = st.session_state.get(f"{session_key}_chinese_mappings", {})
-                    stmt_key = stmt_map[sel_type]
-                    chinese_mapping = chinese_mappings.get(stmt_key, {})
-                    df_t["科目"] = df_t["科目"].apply(
-                        lambda x: chinese_mapping.get(x, x)  # 如果有映射就用中文，否则用原值
-                    )
-                    display_df = df_t
-                    display_df.columns = ["科目", "数值(亿元)"]
-                # 确保"数值"列为字符串类型，避免 Arrow 序列化错误
-                display_df["数值(亿元)"] = display_df["数值(亿元)"].astype(str)
                 st.dataframe(display_df, width='stretch', height=420)
         
         # 显示下载按钮
-        if excel_bytes:
-            filename = f"{company_name}_{start_year}-{end_year}_{'三大报表' if market == 'A股' else '港股三大报表'}.xlsx"
+        if report.excel_bytes:
+            filename = f"{report.company_name}_{start_year}-{end_year}_{'三大报表' if market == 'A股' else '港股三大报表'}.xlsx"
             st.success("下载完成，可保存为Excel。")
-            st.download_button("📥 下载Excel文件", data=excel_bytes, file_name=filename,
+            st.download_button("📥 下载Excel文件", data=report.excel_bytes, file_name=filename,
                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    
+    # 如果已有数据，直接使用；否则提示用户点击按钮
+    if session_key not in st.session_state:
+        if not run_btn:
+            st.info("在左侧选择报表类型并点击开始下载。")
+            return
+    else:
+        # 已有数据，显示预览和下载
+        render_preview(st.session_state[session_key])
         return
 
     try:
         if market == "A股":
             # 使用现有下载工具
+            dl_tool = load_module("report_downloader", "财务报表下载工具.py")
             result_dict = dl_tool.get_financial_statements(symbol, start_year, end_year)
             if not result_dict:
                 st.warning("未获取到任何报表数据。")
@@ -457,12 +937,11 @@ def run_report_download():
             excel_bytes = dl_tool.create_excel_file(result_dict, symbol, company_name, start_year, end_year)
             
             # 保存到 session_state
-            st.session_state[session_key] = result_dict
-            st.session_state[f"{session_key}_excel"] = excel_bytes
-            st.session_state[f"{session_key}_company"] = company_name
+            report = ReportSession(result_dict, excel_bytes, company_name)
+            st.session_state[session_key] = report
             
-            # 重新运行以显示预览
-            st.rerun()
+            # 直接在本次运行中显示预览，不再整页重新运行
+            render_preview(report)
         else:
             # 港股：使用适配层获取三大报表并生成Excel
             data = hk_adapter.get_hk_annual_data(symbol, start_year, end_year)
@@ -470,25 +949,31 @@ def run_report_download():
                 st.warning("未获取到港股报表数据。")
                 return
 
-            def to_yearly(df, date_col="REPORT_DATE"):
-                if df is None or df.empty:
-                    return {}
-                out = {}
-                for year in range(start_year, end_year + 1):
-                    row = hk_adapter.extract_year_data_hk(df, year, date_col_name=date_col)
-                    if row is not None:
-                        out[year] = row.to_frame().T
-                return out
-
-            profit_years = to_yearly(data.get("profit"))
-            balance_years = to_yearly(data.get("balance_sheet"))
-            cash_years = to_yearly(data.get("cash_flow"))
+            def to_yearly(executor, df, date_col="REPORT_DATE"):
+                """提交整张报表的按年提取任务（一次遍历报告期列取出所有年份），返回 future"""
+                return executor.submit(hk_adapter.extract_years_data_hk, df, range(start_year, end_year + 1),
+                                       date_col_name=date_col)
+
+            def collect_yearly(future):
+                """按年份顺序收集提取结果，返回 {年份: 单行DataFrame}"""
+                # 取出的行含报告期字符串，整行为 object 类型；转回单行表后恢复各列的数值类型，
+                # 后续换算亿元时直接按浮点列计算，不再逐个解析对象
+                return {year: row.to_frame().T.infer_objects() for year, row in future.result().items()}
+
+            # 三张报表的提取互不依赖，提交到同一个线程池后再收集结果
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                profit_future = to_yearly(executor, data.get("profit"))
+                balance_future = to_yearly(executor, data.get("balance_sheet"))
+                cash_future = to_yearly(executor, data.get("cash_flow"))
+                profit_years = collect_yearly(profit_future)
+                balance_years = collect_yearly(balance_future)
+                cash_years = collect_yearly(cash_future)
             
-            # 保存中文名称映射
+            # 保存中文名称映射；预先转为 Series，逐年逐表映射时不再每次由字典重建索引
             chinese_mappings = {
-                "balance": data.get("balance_sheet_chinese_mapping", {}),
-                "profit": data.get("profit_chinese_mapping", {}),
-                "cash_flow": data.get("cash_flow_chinese_mapping", {}),
+                "balance": pd.Series(data.get("balance_sheet_chinese_mapping", {}), dtype=object),
+                "profit": pd.Series(data.get("profit_chinese_mapping", {}), dtype=object),
+                "cash_flow": pd.Series(data.get("cash_flow_chinese_mapping", {}), dtype=object),
             }
             
             # 组装为 {year: {balance, profit, cash}}
@@ -506,99 +991,32 @@ def run_report_download():
                 st.warning("未找到指定年份的港股报表数据。")
                 return
 
-            # 写入Excel（金额已转换为亿元）
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                for year, year_data in results.items():
-                    sheet_name = f"{year}年"
-                    pos = 0
-                    for title, stmt_key, df in [
-                        ("资产负债表", "balance", year_data["balance"]),
-                        ("利润表", "profit", year_data["profit"]),
-                        ("现金流量表", "cash_flow", year_data["cash_flow"])
-                    ]:
-                        if df is None or df.empty:
-                            continue
-                        # 行转列：科目 | 数值（亿元）
-                        # 排除 REPORT_DATE 列
-                        df_to_transpose = df.drop(columns=['REPORT_DATE'], errors='ignore')
-                        df_t = df_to_transpose.T.reset_index()
-                        df_t.columns = ["科目", "数值"]
-                        # 将金额从元转换为亿元（跳过非数值）
-                        def convert_to_yi(x):
-                            if pd.isna(x) or str(x) == 'nan':
-                                return x
-                            try:
-                                return round(float(x) / 100000000, 2)
-                            except (ValueError, TypeError):
-                                return x
-                        df_t["数值"] = df_t["数值"].apply(convert_to_yi)
-                        # 使用中文名称映射替换英文字段名
-                        chinese_mapping = chinese_mappings.get(stmt_key, {})
-                        df_t["科目"] = df_t["科目"].apply(
-                            lambda x: chinese_mapping.get(x, x)  # 如果有映射就用中文，否则用原值
-                        )
-                        # 写标题
-                        ws = writer.book.create_sheet(sheet_name) if sheet_name not in writer.book.sheetnames else writer.book[sheet_name]
-                        # 如果是新建的空sheet，openpyxl不会被pandas自动写入；改用 pandas 写数据，标题单元格用 openpyxl
-                        df_t.to_excel(writer, sheet_name=sheet_name, startrow=pos, index=False)
-                        # 写标题文字（放在数据上方一行）
-                        ws = writer.sheets[sheet_name]
-                        ws.cell(row=pos + 1, column=1, value=f"【{title}】")
-                        pos += len(df_t) + 3  # 标题 + 数据 + 空行
-                
-                # 在writer关闭前设置列宽自适应
-                try:
-                    from openpyxl.utils import get_column_letter
-                    
-                    # 为每个sheet设置列宽
-                    for sheet_name in writer.book.sheetnames:
-                        ws = writer.book[sheet_name]
-                        for col_idx, col in enumerate(ws.iter_cols(min_row=1, max_row=ws.max_row, values_only=False), start=1):
-                            max_length = 0
-                            column_letter = get_column_letter(col_idx)
-                            
-                            for cell in col:
-                                if cell.value is not None:
-                                    try:
-                                        cell_value = str(cell.value)
-                                        length = 0
-                                        for char in cell_value:
-                                            if ord(char) > 127:  # 非ASCII字符（包括中文）
-                                                length += 2
-                                            else:
-                                                length += 1
-                                        if length > max_length:
-                                            max_length = length
-                                    except:
-                                        pass
-                            
-                            if max_length > 0:
-                                adjusted_width = min(max(max_length + 2, 8), 50)
-                                ws.column_dimensions[column_letter].width = adjusted_width
-                            else:
-                                ws.column_dimensions[column_letter].width = 10
-                except Exception as e:
-                    # 如果设置列宽失败，不影响返回结果
-                    pass
-
-            output.seek(0)
-            excel_bytes = output.getvalue()
+            # 写入Excel（金额已转换为亿元），每年一个Sheet
+            sheets = {}
+            for year, year_data in results.items():
+                rows, header_rows = build_hk_report_rows(year_data, chinese_mappings)
+                if rows:
+                    sheets[f"{year}年"] = (rows, header_rows)
+            excel_bytes = write_hk_report_excel(sheets)
             
             # 保存到 session_state（包含中文映射）
-            st.session_state[session_key] = results
-            st.session_state[f"{session_key}_excel"] = excel_bytes
-            st.session_state[f"{session_key}_company"] = symbol
-            st.session_state[f"{session_key}_chinese_mappings"] = chinese_mappings
+            report = ReportSession(results, excel_bytes, symbol, chinese_mappings)
+            st.session_state[session_key] = report
             
-            # 重新运行以显示预览
-            st.rerun()
+            # 直接在本次运行中显示预览，不再整页重新运行
+            render_preview(report)
 
     except Exception as e:
         st.error(f"下载失败：{e}")
-        import traceback
         st.code(traceback.format_exc())
 
+
+def count_pdf_files(directory: str) -> int:
+    """统计目录中的PDF文件数量（os.scandir 的目录项自带文件类型，无需逐个 stat）"""
+    with os.scandir(directory) as entries:
+        return sum(1 for entry in entries if entry.is_file() and entry.name.lower().endswith(".pdf"))
+
+
 # -----------------------------
 # 功能 3：员工数量提取
 # -----------------------------
@@ -608,41 +1026,22 @@ def run_employee_extraction():
     # 文件夹选择功能
     def select_folder():
         """打开文件夹选择对话框"""
+        if not TKINTER_AVAILABLE:
+            st.warning("文件夹选择器不可用: 未安装 tkinter，请手动输入路径")
+            return None
         try:
-            import tkinter as tk
-            from tkinter import filedialog
-            root = tk.Tk()
-            root.withdraw()  # 隐藏主窗口
-            root.attributes('-topmost', True)  # 窗口置顶
-            folder_path = filedialog.askdirectory(title="选择PDF文件夹")
-            root.destroy()
-            return folder_path if folder_path else None
+            return open_tk_dialog(filedialog.askdirectory, title="选择PDF文件夹")
         except Exception as e:
             st.warning(f"文件夹选择器不可用: {e}，请手动输入路径")
             return None
     
-    # 初始化PDF目录路径
-    if 'pdf_dir' not in st.session_state:
-        st.session_state['pdf_dir'] = "年报PDF"
-    
     # 文件夹选择按钮和输入框
     col1, col2 = st.sidebar.columns([3, 1])
     with col1:
-        # 不使用key参数，直接通过value参数控制，这样选择文件夹后可以立即更新
-        pdf_dir = st.text_input(
-            "PDF目录路径", 
-            value=st.session_state.get('pdf_dir', "年报PDF")
-        )
-        # 如果输入框的值改变了，更新session_state
-        if pdf_dir:
-            st.session_state['pdf_dir'] = pdf_dir
+        pdf_dir = path_input("PDF目录路径", 'pdf_dir', "年报PDF")
     with col2:
-        if st.button("📁 选择", use_container_width=True, help="点击选择文件夹", key="select_folder_btn"):
-            selected_folder = select_folder()
-            if selected_folder:
-                # 直接更新session_state，然后rerun，输入框会自动使用新的value
-                st.session_state['pdf_dir'] = selected_folder
-                st.rerun()  # 刷新页面以更新输入框
+        st.button("📁 选择", use_container_width=True, help="点击选择文件夹", key="select_folder_btn",
+                  on_click=pick_path, args=('pdf_dir', select_folder))
     
     run_btn = st.sidebar.button("🚀 开始提取", type="primary", use_container_width=True)
     if not run_btn:
@@ -668,20 +1067,22 @@ def run_employee_extraction():
             return
         
         # 检查目录中是否有PDF文件
-        pdf_files = [f for f in os.listdir(actual_pdf_dir) if f.lower().endswith('.pdf')]
-        if not pdf_files:
+        pdf_count = count_pdf_files(actual_pdf_dir)
+        if not pdf_count:
             st.warning(f"⚠️ 目录中没有找到PDF文件: `{actual_pdf_dir}`")
             st.info("💡 请确保目录中包含年报PDF文件")
         else:
-            st.success(f"✓ 找到 {len(pdf_files)} 个PDF文件")
+            st.success(f"✓ 找到 {pdf_count} 个PDF文件")
         
         results = {}
         if market == "A股":
             # 批量提取（传递股票代码）
+            emp_a = load_module("emp_a", "智能_从年报提取员工数量.py")
             res = emp_a.batch_extract_employee_count_smart(actual_pdf_dir, stock_code=symbol, use_smart=True)
             results = {k: v for k, v in res.items()}
         else:
             # 港股按年份提取
+            emp_hk = load_module("emp_hk", "港股_从年报提取员工数量.py")
             res = emp_hk.extract_employee_count_by_year_from_pdfs(actual_pdf_dir, symbol, start_year, end_year)
             results = {f"{year}年": count for year, count in res.items()}
 
@@ -690,23 +1091,49 @@ def run_employee_extraction():
             return
 
         # 展示结果
-        df = pd.DataFrame(list(results.items()), columns=["年份/文件", "员工数量"])
+        df = pd.DataFrame({"年份/文件": list(results.keys()), "员工数量": list(results.values())})
         st.dataframe(df, width='stretch', height=400)
 
-        # 下载CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False, encoding="utf-8-sig")
-        st.download_button("📥 下载员工数量CSV", data=output.getvalue().encode("utf-8-sig"),
+        # 下载CSV：直接按 utf-8-sig 编码写入字节缓冲区，不再先生成整段字符串再编码一次
+        csv_buffer = io.BytesIO()
+        df.to_csv(csv_buffer, index=False, encoding="utf-8-sig")
+        st.download_button("📥 下载员工数量CSV", data=csv_buffer.getvalue(),
                            file_name=f"{symbol}_员工数量.csv", mime="text/csv")
 
     except Exception as e:
         st.error(f"提取失败：{e}")
-        import traceback
         st.code(traceback.format_exc())
 
 # -----------------------------
 # 功能 4：年报PDF下载（A股 + 港股）
 # -----------------------------
+# 并行下载的线程数：年报文件较大，同时请求过多容易被巨潮资讯网/披露易限流
+PDF_DOWNLOAD_WORKERS = 4
+# 单个年报PDF的大小上限，超过视为异常文件
+PDF_MAX_SIZE_MB = 500
+# 未找到年报的记录保留时间：期间重复点击下载不再请求这些年份
+PDF_MISS_CACHE_TTL = 60 * 60  # 秒
+
+def validate_pdf_file(filepath: str) -> Optional[str]:
+    """
+    检查下载得到的文件是否为有效PDF（服务器返回的错误页面也可能被保存为 .pdf）
+    
+    参数:
+        filepath: 文件路径
+    
+    返回:
+        无效时返回原因，有效时返回 None
+    """
+    file_size = os.path.getsize(filepath) / 1024 / 1024  # MB
+    if file_size > PDF_MAX_SIZE_MB:
+        return f"文件过大（{file_size:.0f} MB），已删除"
+    with open(filepath, "rb") as f:
+        head = f.read(5)
+    if head != b"%PDF-":
+        return "下载内容不是PDF文件（可能是错误页面），已删除"
+    return None
+
+
 def run_pdf_download():
     if market == "A股":
         run_pdf_download_a()
@@ -729,42 +1156,25 @@ def run_pdf_download_a():
     # 文件夹选择功能
     def select_save_folder():
         """打开文件夹选择对话框"""
+        if not TKINTER_AVAILABLE:
+            st.warning("文件夹选择器不可用: 未安装 tkinter，请手动输入路径")
+            return None
         try:
-            import tkinter as tk
-            from tkinter import filedialog
-            root = tk.Tk()
-            root.withdraw()
-            root.attributes('-topmost', True)
-            folder_path = filedialog.askdirectory(title="选择PDF保存目录")
-            root.destroy()
-            return folder_path if folder_path else None
+            return open_tk_dialog(filedialog.askdirectory, title="选择PDF保存目录")
         except Exception as e:
             st.warning(f"文件夹选择器不可用: {e}，请手动输入路径")
             return None
     
-    # 初始化保存路径
-    if 'pdf_save_dir' not in st.session_state:
-        st.session_state['pdf_save_dir'] = "年报PDF"
-    
     st.sidebar.markdown("---")
     st.sidebar.subheader("📁 下载设置")
     
-    # 保存路径选择（不使用key参数，通过value直接控制）
+    # 保存路径选择
     col1, col2 = st.sidebar.columns([3, 1])
     with col1:
-        save_dir = st.text_input(
-            "保存目录",
-            value=st.session_state.get('pdf_save_dir', "年报PDF")
-        )
-        # 如果用户手动输入了路径，更新session_state
-        if save_dir and save_dir != st.session_state.get('pdf_save_dir'):
-            st.session_state['pdf_save_dir'] = save_dir
+        save_dir = path_input("保存目录", 'pdf_save_dir', "年报PDF")
     with col2:
-        if st.button("📁", use_container_width=True, help="选择保存文件夹", key="select_save_folder_btn"):
-            selected_folder = select_save_folder()
-            if selected_folder:
-                st.session_state['pdf_save_dir'] = selected_folder
-                st.rerun()
+        st.button("📁", use_container_width=True, help="选择保存文件夹", key="select_save_folder_btn",
+                  on_click=pick_path, args=('pdf_save_dir', select_save_folder))
     
     # 下载按钮
     download_btn = st.sidebar.button("🚀 开始下载", type="primary", use_container_width=True, key="download_pdf_btn")
@@ -780,8 +1190,7 @@ def run_pdf_download_a():
         st.write(f"**保存目录：** `{actual_save_dir}`")
         # 检查目录
         if os.path.exists(actual_save_dir):
-            existing_pdfs = [f for f in os.listdir(actual_save_dir) if f.lower().endswith('.pdf')]
-            st.write(f"**已有文件：** {len(existing_pdfs)} 个PDF")
+            st.write(f"**已有文件：** {count_pdf_files(actual_save_dir)} 个PDF")
         else:
             st.write("**目录状态：** 将自动创建")
     
@@ -824,42 +1233,87 @@ def run_pdf_download_a():
     years = list(range(int(start_year), int(end_year) + 1))
     total_years = len(years)
     
-    for idx, year in enumerate(years):
-        status_text.text(f"正在下载 {year} 年年报... ({idx + 1}/{total_years})")
-        
-        with log_container:
-            st.write(f"**[{year}年]** 搜索中...")
+    def download_year(year):
+        """
+        下载单个年份的年报（在线程池中执行，不调用 Streamlit）
         
-        try:
-            # 调用下载函数
-            filepath = pdf_dl.download_annual_report(symbol, year, actual_save_dir)
-            
-            if filepath and os.path.exists(filepath):
-                file_size = os.path.getsize(filepath) / 1024 / 1024  # MB
-                results['success'].append({
-                    'year': year,
-                    'path': filepath,
-                    'size': f"{file_size:.2f} MB"
-                })
-                with log_container:
-                    st.success(f"[OK] {year}年年报下载成功：{os.path.basename(filepath)} ({file_size:.2f} MB)")
-            else:
-                results['failed'].append({
-                    'year': year,
-                    'reason': '未找到年报或下载失败'
-                })
-                with log_container:
-                    st.warning(f"[!] {year}年年报下载失败")
-        except Exception as e:
+        返回:
+            (文件路径, 是否确认没有该年年报)；下载失败时文件路径为 None
+        """
+        search_status = {}
+        filepath = pdf_dl.download_annual_report(symbol, year, actual_save_dir, search_status=search_status)
+        if not (filepath and os.path.exists(filepath)):
+            return None, search_status.get('no_report', False)
+        reason = validate_pdf_file(filepath)
+        if reason:
+            os.remove(filepath)
+            raise ValueError(reason)
+        return filepath, False
+    
+    # 近期已确认未找到年报的年份直接计入失败，不再重复请求
+    miss_cache = st.session_state.setdefault('pdf_miss_cache', {})
+    now = time.time()
+    pending_years = []
+    for year in years:
+        missed_at = miss_cache.get((symbol, year))
+        if missed_at is not None and now - missed_at < PDF_MISS_CACHE_TTL:
             results['failed'].append({
                 'year': year,
-                'reason': str(e)
+                'reason': '近期已查询过，未找到年报'
             })
             with log_container:
-                st.error(f"[X] {year}年年报下载出错：{e}")
-        
-        # 更新进度
-        progress_bar.progress((idx + 1) / total_years)
+                st.info(f"[跳过] {year}年年报近期已查询过，未找到")
+        else:
+            pending_years.append(year)
+    
+    # 各年份的下载互不依赖，耗时主要在网络等待上，用线程池并行下载；
+    # 界面更新只在主线程中按完成顺序进行
+    status_text.text(f"正在下载 {len(pending_years)} 个年份的年报...")
+    completed = total_years - len(pending_years)
+    progress_bar.progress(completed / total_years if total_years else 0)
+    with ThreadPoolExecutor(max_workers=max(1, min(PDF_DOWNLOAD_WORKERS, len(pending_years)))) as executor:
+        futures = {executor.submit(download_year, year): year for year in pending_years}
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                filepath, no_report = future.result()
+                
+                if filepath:
+                    miss_cache.pop((symbol, year), None)
+                    file_size = os.path.getsize(filepath) / 1024 / 1024  # MB
+                    results['success'].append({
+                        'year': year,
+                        'path': filepath,
+                        'size': f"{file_size:.2f} MB"
+                    })
+                    with log_container:
+                        st.success(f"[OK] {year}年年报下载成功：{os.path.basename(filepath)} ({file_size:.2f} MB)")
+                else:
+                    # 只记录搜索正常完成但确实没有年报的年份；网络错误等请求失败不缓存，下次仍会重试
+                    if no_report:
+                        miss_cache[(symbol, year)] = time.time()
+                    results['failed'].append({
+                        'year': year,
+                        'reason': '未找到年报或下载失败'
+                    })
+                    with log_container:
+                        st.warning(f"[!] {year}年年报下载失败")
+            except Exception as e:
+                results['failed'].append({
+                    'year': year,
+                    'reason': str(e)
+                })
+                with log_container:
+                    st.error(f"[X] {year}年年报下载出错：{e}")
+            
+            # 更新进度
+            completed += 1
+            status_text.text(f"正在下载年报... ({completed}/{total_years})")
+            progress_bar.progress(completed / total_years)
+    
+    # 汇总按年份排列，与完成顺序无关
+    results['success'].sort(key=lambda item: item['year'])
+    results['failed'].sort(key=lambda item: item['year'])
     
     # 显示下载结果汇总
     st.markdown("---")
@@ -884,6 +1338,13 @@ def run_pdf_download_a():
         st.success(f"下载完成！文件保存在：`{actual_save_dir}`")
 
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def parse_hk_reports_cached(html_path: str, mtime: float) -> List[Dict]:
+    """解析港交所搜索结果HTML（按路径和修改时间缓存，预览和下载共用同一次解析结果）"""
+    hk_pdf_dl = load_module("hk_pdf_downloader", "09_下载港股年报PDF.py")
+    return hk_pdf_dl.parse_html_for_annual_reports(html_path)
+
+
 def run_pdf_download_hk():
     """港股年报PDF下载（从HTML文件解析）"""
     st.header("📥 年报PDF下载（港股）")
@@ -899,43 +1360,30 @@ def run_pdf_download_hk():
     # 文件选择功能
     def select_html_file():
         """打开文件选择对话框选择HTML文件"""
+        if not TKINTER_AVAILABLE:
+            st.warning("文件选择器不可用: 未安装 tkinter，请手动输入路径")
+            return None
         try:
-            import tkinter as tk
-            from tkinter import filedialog
-            root = tk.Tk()
-            root.withdraw()
-            root.attributes('-topmost', True)
-            file_path = filedialog.askopenfilename(
+            return open_tk_dialog(
+                filedialog.askopenfilename,
                 title="选择港交所搜索结果HTML文件",
                 filetypes=[("HTML文件", "*.html;*.htm"), ("所有文件", "*.*")]
             )
-            root.destroy()
-            return file_path if file_path else None
         except Exception as e:
             st.warning(f"文件选择器不可用: {e}，请手动输入路径")
             return None
     
     def select_save_folder():
         """打开文件夹选择对话框"""
+        if not TKINTER_AVAILABLE:
+            st.warning("文件夹选择器不可用: 未安装 tkinter，请手动输入路径")
+            return None
         try:
-            import tkinter as tk
-            from tkinter import filedialog
-            root = tk.Tk()
-            root.withdraw()
-            root.attributes('-topmost', True)
-            folder_path = filedialog.askdirectory(title="选择PDF保存目录")
-            root.destroy()
-            return folder_path if folder_path else None
+            return open_tk_dialog(filedialog.askdirectory, title="选择PDF保存目录")
         except Exception as e:
             st.warning(f"文件夹选择器不可用: {e}，请手动输入路径")
             return None
     
-    # 初始化路径
-    if 'hk_html_path' not in st.session_state:
-        st.session_state['hk_html_path'] = ""
-    if 'hk_pdf_save_dir' not in st.session_state:
-        st.session_state['hk_pdf_save_dir'] = "港股年报PDF"
-    
     st.sidebar.markdown("---")
     st.sidebar.subheader("📁 下载设置")
     
@@ -943,38 +1391,19 @@ def run_pdf_download_hk():
     st.sidebar.markdown("**步骤1: 选择HTML文件**")
     col1, col2 = st.sidebar.columns([3, 1])
     with col1:
-        html_path = st.text_input(
-            "HTML文件路径",
-            value=st.session_state.get('hk_html_path', ""),
-            placeholder="从港交所保存的搜索结果HTML"
-        )
-        # 如果用户手动输入了路径，更新session_state
-        if html_path and html_path != st.session_state.get('hk_html_path'):
-            st.session_state['hk_html_path'] = html_path
+        path_input("HTML文件路径", 'hk_html_path', "", placeholder="从港交所保存的搜索结果HTML")
     with col2:
-        if st.button("📄", use_container_width=True, help="选择HTML文件", key="select_html_btn"):
-            selected_file = select_html_file()
-            if selected_file:
-                st.session_state['hk_html_path'] = selected_file
-                st.rerun()
+        st.button("📄", use_container_width=True, help="选择HTML文件", key="select_html_btn",
+                  on_click=pick_path, args=('hk_html_path', select_html_file))
     
     # PDF保存目录选择
     st.sidebar.markdown("**步骤2: 选择保存目录**")
     col3, col4 = st.sidebar.columns([3, 1])
     with col3:
-        save_dir = st.text_input(
-            "保存目录",
-            value=st.session_state.get('hk_pdf_save_dir', "港股年报PDF")
-        )
-        # 如果用户手动输入了路径，更新session_state
-        if save_dir and save_dir != st.session_state.get('hk_pdf_save_dir'):
-            st.session_state['hk_pdf_save_dir'] = save_dir
+        save_dir = path_input("保存目录", 'hk_pdf_save_dir', "港股年报PDF")
     with col4:
-        if st.button("📁", use_container_width=True, help="选择保存文件夹", key="select_hk_save_folder_btn"):
-            selected_folder = select_save_folder()
-            if selected_folder:
-                st.session_state['hk_pdf_save_dir'] = selected_folder
-                st.rerun()
+        st.button("📁", use_container_width=True, help="选择保存文件夹", key="select_hk_save_folder_btn",
+                  on_click=pick_path, args=('hk_pdf_save_dir', select_save_folder))
     
     # 下载按钮
     download_btn = st.sidebar.button("🚀 开始下载", type="primary", use_container_width=True, key="download_hk_pdf_btn")
@@ -1021,22 +1450,18 @@ def run_pdf_download_hk():
             st.markdown("---")
             st.markdown("### 🔍 HTML文件预览")
             try:
-                reports = hk_pdf_dl.parse_html_for_annual_reports(actual_html_path)
+                reports = parse_hk_reports_cached(actual_html_path, os.path.getmtime(actual_html_path))
                 if reports:
                     # 筛选年份范围
                     filtered_reports = [r for r in reports if start_year <= r['year'] <= end_year]
                     st.success(f"解析成功！找到 {len(reports)} 个年报，符合年份范围的有 {len(filtered_reports)} 个")
                     
                     # 显示列表
-                    preview_data = []
-                    for r in reports:
-                        in_range = "✓" if start_year <= r['year'] <= end_year else ""
-                        preview_data.append({
-                            "选中": in_range,
-                            "年份": r['year'],
-                            "标题": r['title'][:40],
-                        })
-                    st.dataframe(pd.DataFrame(preview_data), use_container_width=True)
+                    preview_df = pd.DataFrame(reports)[["year", "title"]].rename(columns={"year": "年份", "title": "标题"})
+                    preview_df["标题"] = preview_df["标题"].str.slice(0, 40)
+                    in_range = preview_df["年份"].between(int(start_year), int(end_year))
+                    preview_df.insert(0, "选中", in_range.map({True: "✓", False: ""}))
+                    st.dataframe(preview_df, use_container_width=True)
                 else:
                     st.warning("未在HTML文件中找到年报链接，请检查文件是否正确")
             except Exception as e:
@@ -1066,13 +1491,13 @@ def run_pdf_download_hk():
     status_text.text("正在解析HTML文件...")
     
     try:
-        reports = hk_pdf_dl.parse_html_for_annual_reports(actual_html_path)
+        reports = parse_hk_reports_cached(actual_html_path, os.path.getmtime(actual_html_path))
         if not reports:
             st.error("未在HTML文件中找到年报链接")
             return
         
         # 筛选年份范围
-        years_to_download = list(range(int(start_year), int(end_year) + 1))
+        years_to_download = frozenset(range(int(start_year), int(end_year) + 1))
         filtered_reports = [r for r in reports if r['year'] in years_to_download]
         
         if not filtered_reports:
@@ -1089,52 +1514,68 @@ def run_pdf_download_hk():
         progress_bar = st.progress(0)
         log_container = st.container()
         
+        symbol_clean = symbol.zfill(5)
+        
+        def download_report(report):
+            """下载单个年报（在线程池中执行，不调用 Streamlit）"""
+            filename = f"{symbol_clean}_{report['year']}年年度报告.pdf"
+            save_path = os.path.join(actual_save_dir, filename)
+            success = hk_pdf_dl.download_pdf_from_url(report['pdf_url'], save_path)
+            if not (success and os.path.exists(save_path)):
+                return None
+            reason = validate_pdf_file(save_path)
+            if reason:
+                os.remove(save_path)
+                raise ValueError(reason)
+            return save_path
+        
+        # 解析结果每个年份只保留一份年报，各文件路径不同，可以并行下载
+        with log_container:
+            for report in filtered_reports:
+                st.write(f"**[{report['year']}年]** {report['title'][:30]}...")
+        
         total = len(filtered_reports)
-        for idx, report in enumerate(filtered_reports):
-            year = report['year']
-            pdf_url = report['pdf_url']
-            title = report['title']
-            
-            status_text.text(f"正在下载 {year} 年年报... ({idx + 1}/{total})")
-            
-            with log_container:
-                st.write(f"**[{year}年]** {title[:30]}...")
-            
-            try:
-                # 生成文件名
-                symbol_clean = symbol.zfill(5)
-                filename = f"{symbol_clean}_{year}年年度报告.pdf"
-                save_path = os.path.join(actual_save_dir, filename)
-                
-                # 下载PDF
-                success = hk_pdf_dl.download_pdf_from_url(pdf_url, save_path)
-                
-                if success and os.path.exists(save_path):
-                    file_size = os.path.getsize(save_path) / 1024 / 1024
-                    results['success'].append({
-                        'year': year,
-                        'path': save_path,
-                        'size': f"{file_size:.2f} MB"
-                    })
-                    with log_container:
-                        st.success(f"[OK] {year}年年报下载成功 ({file_size:.2f} MB)")
-                else:
+        status_text.text(f"正在下载 {total} 个年报...")
+        completed = 0
+        with ThreadPoolExecutor(max_workers=min(PDF_DOWNLOAD_WORKERS, total)) as executor:
+            futures = {executor.submit(download_report, report): report['year'] for report in filtered_reports}
+            for future in as_completed(futures):
+                year = futures[future]
+                try:
+                    save_path = future.result()
+                    
+                    if save_path:
+                        file_size = os.path.getsize(save_path) / 1024 / 1024
+                        results['success'].append({
+                            'year': year,
+                            'path': save_path,
+                            'size': f"{file_size:.2f} MB"
+                        })
+                        with log_container:
+                            st.success(f"[OK] {year}年年报下载成功 ({file_size:.2f} MB)")
+                    else:
+                        results['failed'].append({
+                            'year': year,
+                            'reason': '下载失败'
+                        })
+                        with log_container:
+                            st.warning(f"[!] {year}年年报下载失败")
+                except Exception as e:
                     results['failed'].append({
                         'year': year,
-                        'reason': '下载失败'
+                        'reason': str(e)
                     })
                     with log_container:
-                        st.warning(f"[!] {year}年年报下载失败")
-            except Exception as e:
-                results['failed'].append({
-                    'year': year,
-                    'reason': str(e)
-                })
-                with log_container:
-                    st.error(f"[X] {year}年年报下载出错：{e}")
-            
-            # 更新进度
-            progress_bar.progress((idx + 1) / total)
+                        st.error(f"[X] {year}年年报下载出错：{e}")
+                
+                # 更新进度
+                completed += 1
+                status_text.text(f"正在下载年报... ({completed}/{total})")
+                progress_bar.progress(completed / total)
+        
+        # 汇总顺序与解析结果一致（按年份倒序），与完成顺序无关
+        results['success'].sort(key=lambda item: item['year'], reverse=True)
+        results['failed'].sort(key=lambda item: item['year'], reverse=True)
         
         # 显示下载结果汇总
         st.markdown("---")
@@ -1159,7 +1600,6 @@ def run_pdf_download_hk():
     
     except Exception as e:
         st.error(f"下载失败：{e}")
-        import traceback
         st.code(traceback.format_exc())
 
 
@@ -10,12 +10,12 @@
 注意：只支持财务分析的Excel文件格式
 """
 
-import os
+import io
 import sys
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 # -----------------------------
 # 页面配置
@@ -30,6 +30,29 @@ st.set_page_config(
 # -----------------------------
 # 辅助函数：获取公式说明
 # -----------------------------
+# 各sheet的公式说明，格式为 {Sheet名称: {指标名称: 公式说明}}
+FORMULA_NOTES = {
+    '营收基本数据': {
+        '金融利润（亿元）': '金融利润 = 公允价值变动收益 + 投资收益',
+        '经营利润（亿元）': '经营利润 = 归母净利润 - 金融利润',
+        'CAPEX（亿元）': 'CAPEX = 购建固定资产、无形资产和其他长期资产支付的现金（来自现金流量表）'
+    },
+    '资产负债': {
+        '狭义无息债务（亿元）': '狭义无息债务 = 应付账款 + 预收账款 + 合同负债',
+        '广义无息债务（亿元）': '广义无息债务 = 应付账款 + 应付票据 + 预收账款 + 合同负债'
+    },
+    'WC分析': {
+        'WC（亿元）': 'WC = (应收账款 + 预付账款 + 存货 + 合同资产) - (应付账款 + 预收账款 + 合同负债)'
+    },
+    '固定资产投入分析': {
+        '固定资产（亿元）': '固定资产 = 固定资产 + 在建工程 + 工程物资 - 固定资产清理',
+        '长期资产（亿元）': '长期资产 = 固定资产 + 无形资产 + 开发支出 + 使用权资产 + 商誉 + 长期待摊费用'
+    },
+    '收益率和杜邦分析': {
+        'ROIC(%)': 'ROIC = EBIT / 投入资本 × 100，其中EBIT = 营业利润 + 利息支出，投入资本 = 总资产 - 狭义无息债务（应付账款 + 预收账款 + 合同负债）'
+    },
+}
+
 def get_formula_notes(sheet_name):
     """
     获取指定sheet的公式说明
@@ -38,53 +61,53 @@ def get_formula_notes(sheet_name):
         sheet_name: Sheet名称
     
     返回:
-        字典，格式为 {指标名称: 公式说明}
+        字典，格式为 {指标名称: 公式说明}；没有公式说明时返回空字典（只读，调用方不要修改）
+    """
+    return FORMULA_NOTES.get(sheet_name, {})
+
+# -----------------------------
+# 识别年份列
+# -----------------------------
+def detect_year_columns(df: pd.DataFrame) -> List[str]:
     """
-    formula_notes = {}
+    识别数据表中的年份列
     
-    if sheet_name == '营收基本数据':
-        formula_notes = {
-            '金融利润（亿元）': '金融利润 = 公允价值变动收益 + 投资收益',
-            '经营利润（亿元）': '经营利润 = 归母净利润 - 金融利润',
-            'CAPEX（亿元）': 'CAPEX = 购建固定资产、无形资产和其他长期资产支付的现金（来自现金流量表）'
-        }
-    elif sheet_name == '资产负债':
-        formula_notes = {
-            '狭义无息债务（亿元）': '狭义无息债务 = 应付账款 + 预收账款 + 合同负债',
-            '广义无息债务（亿元）': '广义无息债务 = 应付账款 + 应付票据 + 预收账款 + 合同负债'
-        }
-    elif sheet_name == 'WC分析':
-        formula_notes = {
-            'WC（亿元）': 'WC = (应收账款 + 预付账款 + 存货 + 合同资产) - (应付账款 + 预收账款 + 合同负债)'
-        }
-    elif sheet_name == '固定资产投入分析':
-        formula_notes = {
-            '固定资产（亿元）': '固定资产 = 固定资产 + 在建工程 + 工程物资 - 固定资产清理',
-            '长期资产（亿元）': '长期资产 = 固定资产 + 无形资产 + 开发支出 + 使用权资产 + 商誉 + 长期待摊费用'
-        }
-    elif sheet_name == '收益率和杜邦分析':
-        formula_notes = {
-            'ROIC(%)': 'ROIC = EBIT / 投入资本 × 100，其中EBIT = 营业利润 + 利息支出，投入资本 = 总资产 - 狭义无息债务（应付账款 + 预收账款 + 合同负债）'
-        }
+    参数:
+        df: 第一列为"科目"的数据表
     
-    return formula_notes
+    返回:
+        年份列名列表（字符串），如 ['2020', '2021']
+    """
+    year_cols = []
+    for col in df.columns:
+        if col != "科目":
+            # 尝试转换为年份（可能是字符串"2020"或整数2020）
+            try:
+                year_val = int(float(str(col)))
+                if 2000 <= year_val <= 2100:  # 合理的年份范围
+                    year_cols.append(str(year_val))
+            except (ValueError, TypeError):
+                pass
+    return year_cols
 
 # -----------------------------
 # 验证Excel文件格式
 # -----------------------------
-def validate_excel_file(file_path: str) -> tuple[bool, str, Optional[Dict[str, pd.DataFrame]]]:
+# 按文件内容缓存：同一个文件重复加载时不再重新解析
+@st.cache_data(show_spinner=False, max_entries=8)
+def validate_excel_file(file_bytes: bytes) -> tuple[bool, str, Optional[Dict[str, pd.DataFrame]]]:
     """
     验证Excel文件是否是财务分析文件格式
     
     参数:
-        file_path: Excel文件路径
+        file_bytes: 上传的Excel文件内容
     
     返回:
         (是否有效, 错误信息, 数据字典)
     """
     try:
-        # 读取所有sheet
-        excel_file = pd.ExcelFile(file_path)
+        # 读取所有sheet（直接从内存读取，不写入临时文件）
+        excel_file = pd.ExcelFile(io.BytesIO(file_bytes))
         sheet_names = excel_file.sheet_names
         
         # 检查是否有财务分析的sheet名称
@@ -102,7 +125,7 @@ def validate_excel_file(file_path: str) -> tuple[bool, str, Optional[Dict[str, p
         results = {}
         for sheet_name in sheet_names:
             try:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+                df = pd.read_excel(excel_file, sheet_name=sheet_name)
                 
                 # 验证数据格式：应该有"科目"列
                 if df.empty:
@@ -118,24 +141,21 @@ def validate_excel_file(file_path: str) -> tuple[bool, str, Optional[Dict[str, p
                 if len(df.columns) < 2:
                     continue
                 
-                # 清理数据：移除可能存在的公式说明行（包含"公式说明"文本的行）
-                # 查找"公式说明"所在的行索引
-                formula_row_idx = None
-                for idx, row in df.iterrows():
-                    if pd.notna(row.get("科目", "")) and "公式说明" in str(row.get("科目", "")):
-                        formula_row_idx = idx
-                        break
-                
-                # 如果有公式说明行，只保留之前的数据
-                if formula_row_idx is not None:
-                    df = df.iloc[:formula_row_idx].copy()
-                
-                # 确保"科目"列存在且不为空
-                df = df[df["科目"].notna()].copy()
+                # 清理数据：移除可能存在的公式说明行（包含"公式说明"文本的行）及之后的内容，
+                # 同时确保"科目"不为空；用整列掩码一次筛选，不再逐行遍历
+                subjects = df["科目"]
+                keep = subjects.notna()
+                formula_rows = keep & subjects.astype(str).str.contains("公式说明", regex=False, na=False)
+                if formula_rows.any():
+                    # 只保留第一个公式说明行之前的数据
+                    keep.iloc[formula_rows.to_numpy().argmax():] = False
+                df = df[keep].copy()
                 
                 if df.empty:
                     continue
                 
+                # 年份列在加载时识别一次，显示时直接读取
+                df.attrs["year_cols"] = detect_year_columns(df)
                 results[sheet_name] = df
             except Exception as e:
                 # 如果某个sheet读取失败，跳过
@@ -149,6 +169,33 @@ def validate_excel_file(file_path: str) -> tuple[bool, str, Optional[Dict[str, p
     except Exception as e:
         return False, f"读取Excel文件失败: {str(e)}", None
 
+# -----------------------------
+# 生成趋势图
+# -----------------------------
+# 按 (Sheet名称, 绘图数据) 缓存：切换Sheet或其他控件触发重新运行时，所选指标不变就直接复用图表
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_trend_figure(sheet_name: str, chart_df: pd.DataFrame):
+    """
+    生成指标趋势折线图
+    
+    参数:
+        sheet_name: Sheet名称（用于标题）
+        chart_df: 长表格式的绘图数据，包含 年份、指标、数值 三列
+    
+    返回:
+        plotly Figure
+    """
+    fig = px.line(
+        chart_df,
+        x="年份",
+        y="数值",
+        color="指标",
+        markers=True,
+        title=f"{sheet_name} - 趋势图"
+    )
+    fig.update_layout(hovermode="x unified")
+    return fig
+
 # -----------------------------
 # 显示数据表格和图表
 # -----------------------------
@@ -162,8 +209,13 @@ def display_sheet_data(sheet_name: str, df: pd.DataFrame):
     """
     # 显示数据表格
     st.subheader(f"📊 {sheet_name}")
-    # 将DataFrame转换为字符串类型以避免PyArrow类型转换问题（混合类型：数值和"-"）
-    display_df = df.astype(str)
+    # 将DataFrame转换为字符串类型以避免PyArrow类型转换问题（混合类型：数值和"-"）；
+    # 按Sheet缓存在 session_state 中，切换指标等控件触发重新运行时不再逐个单元格转换
+    display_cache = st.session_state.setdefault('excel_display', {})
+    display_df = display_cache.get(sheet_name)
+    if display_df is None:
+        display_df = df.astype(str)
+        display_cache[sheet_name] = display_df
     st.dataframe(display_df, width='stretch', height=420)
     
     # 显示公式注释
@@ -178,17 +230,10 @@ def display_sheet_data(sheet_name: str, df: pd.DataFrame):
     try:
         # DataFrame 格式：第一列是"科目"，其他列是年份（如'2020', '2021'等）
         if "科目" in df.columns:
-            # 获取所有年份列（数字字符串或整数）
-            year_cols = []
-            for col in df.columns:
-                if col != "科目":
-                    # 尝试转换为年份（可能是字符串"2020"或整数2020）
-                    try:
-                        year_val = int(float(str(col)))
-                        if 2000 <= year_val <= 2100:  # 合理的年份范围
-                            year_cols.append(str(year_val))
-                    except (ValueError, TypeError):
-                        pass
+            # 获取所有年份列（数字字符串或整数），加载文件时已识别
+            year_cols = df.attrs.get("year_cols")
+            if year_cols is None:
+                year_cols = detect_year_columns(df)
             
             if len(year_cols) >= 2:  # 至少需要2年数据才能画趋势
                 st.subheader("📈 趋势图")
@@ -205,36 +250,19 @@ def display_sheet_data(sheet_name: str, df: pd.DataFrame):
                 )
                 
                 if selected_metrics:
-                    # 准备绘图数据
-                    chart_data = []
-                    for metric in selected_metrics:
-                        metric_row = df[df["科目"] == metric]
-                        if not metric_row.empty:
-                            for year_col in year_cols:
-                                value = metric_row[year_col].iloc[0]
-                                # 跳过 "-" 和非数值
-                                if value != "-" and pd.notna(value):
-                                    try:
-                                        numeric_value = float(value)
-                                        chart_data.append({
-                                            "年份": int(year_col),
-                                            "指标": metric,
-                                            "数值": numeric_value
-                                        })
-                                    except (ValueError, TypeError):
-                                        pass
+                    # 准备绘图数据：每个指标取第一行，按所选顺序一次取出所有年份列，
+                    # 转置后 melt 为长表（按指标依次排列各年份），不再逐个指标筛选、逐个单元格转换
+                    metric_rows = df.drop_duplicates("科目").set_index("科目")
+                    metric_rows = metric_rows.loc[[m for m in selected_metrics if m in metric_rows.index], year_cols]
+                    chart_df = metric_rows.T.melt(var_name="指标", value_name="数值", ignore_index=False)
+                    chart_df = chart_df.rename_axis("年份").reset_index()
+                    # 跳过 "-" 和非数值
+                    chart_df["数值"] = pd.to_numeric(chart_df["数值"], errors="coerce").astype(float)
+                    chart_df = chart_df.dropna(subset=["数值"])
+                    chart_df["年份"] = chart_df["年份"].astype(int)
                     
-                    if chart_data:
-                        chart_df = pd.DataFrame(chart_data)
-                        fig = px.line(
-                            chart_df,
-                            x="年份",
-                            y="数值",
-                            color="指标",
-                            markers=True,
-                            title=f"{sheet_name} - 趋势图"
-                        )
-                        fig.update_layout(hovermode="x unified")
+                    if not chart_df.empty:
+                        fig = build_trend_figure(sheet_name, chart_df)
                         st.plotly_chart(fig, use_container_width=True)
                     else:
                         st.info("💡 所选指标没有可绘制的数值数据")
@@ -270,18 +298,9 @@ else:
         if uploaded_file is None:
             st.error("❌ 请先上传Excel文件")
         else:
-            # 保存上传的文件到临时目录
-            import tempfile
-            temp_dir = tempfile.gettempdir()
-            temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-            
             try:
-                # 保存文件
-                with open(temp_file_path, "wb") as f:
-                    f.write(uploaded_file.getvalue())
-                
-                # 验证文件格式
-                is_valid, error_msg, results = validate_excel_file(temp_file_path)
+                # 验证文件格式（直接传入上传内容，按内容缓存解析结果）
+                is_valid, error_msg, results = validate_excel_file(uploaded_file.getvalue())
                 
                 if not is_valid:
                     st.error(f"❌ {error_msg}")
@@ -289,14 +308,10 @@ else:
                     # 保存到session_state
                     st.session_state['excel_data'] = results
                     st.session_state['excel_file_name'] = uploaded_file.name
+                    # 加载新文件后清空上一个文件的预览表缓存
+                    st.session_state['excel_display'] = {}
                     st.success(f"✅ 文件加载成功！共找到 {len(results)} 个分析sheet")
                     
-                    # 清理临时文件
-                    try:
-                        os.remove(temp_file_path)
-                    except:
-                        pass
-                    
                     # 重新运行以显示数据
                     st.rerun()
                     
@@ -13,10 +13,19 @@ import streamlit as st
 import akshare as ak
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 import io
 
+# 尝试导入 xlsxwriter（可选，导出Excel时优先使用，比 openpyxl 写入更快）
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
 # 导入06_格式化显示财务数据模块
 import importlib.util
 import sys
@@ -34,6 +43,31 @@ FINANCIAL_ITEM_MAPPING = format_module.FINANCIAL_ITEM_MAPPING
 get_chinese_name = format_module.get_chinese_name
 convert_to_yi = format_module.convert_to_yi
 
+# 不区分大小写查找中文科目名用的映射（键为大写）；忽略大小写后重名的科目保留映射表中靠前的一项，与 get_chinese_name 一致
+FINANCIAL_ITEM_MAPPING_UPPER = {}
+for _key, _value in FINANCIAL_ITEM_MAPPING.items():
+    FINANCIAL_ITEM_MAPPING_UPPER.setdefault(_key.upper(), _value)
+
+@lru_cache(maxsize=None)
+def lookup_chinese_name(col):
+    """
+    查找科目的中文名（查表版的 get_chinese_name），没有中文映射时返回 "-"
+    （三张报表各年份的科目基本相同，按科目名缓存查找结果）
+    
+    参数:
+        col: 英文科目名
+    
+    返回:
+        中文科目名或 "-"
+    """
+    if col in FINANCIAL_ITEM_MAPPING:
+        chinese_name = FINANCIAL_ITEM_MAPPING[col]
+    else:
+        chinese_name = FINANCIAL_ITEM_MAPPING_UPPER.get(col.upper())
+    if chinese_name is None or chinese_name == col:
+        return "-"
+    return chinese_name
+
 def get_symbol_with_suffix(symbol):
     """
     为股票代码添加交易所后缀
@@ -54,6 +88,26 @@ def get_symbol_with_suffix(symbol):
     else:
         return symbol + '.SZ'
 
+# akshare 接口数据缓存有效期：同一股票调整年份范围或重新下载时直接复用已获取的报表
+AKSHARE_CACHE_TTL = 60 * 60  # 秒
+
+# 以下接口调用结果按股票代码缓存（请求失败抛出异常时不缓存）
+@st.cache_data(ttl=AKSHARE_CACHE_TTL, show_spinner=False)
+def fetch_balance_sheet(symbol_with_suffix):
+    return ak.stock_balance_sheet_by_report_em(symbol=symbol_with_suffix)
+
+@st.cache_data(ttl=AKSHARE_CACHE_TTL, show_spinner=False)
+def fetch_profit_sheet(symbol_with_suffix):
+    return ak.stock_profit_sheet_by_report_em(symbol=symbol_with_suffix)
+
+@st.cache_data(ttl=AKSHARE_CACHE_TTL, show_spinner=False)
+def fetch_cash_flow_sheet(symbol_with_suffix):
+    return ak.stock_cash_flow_sheet_by_report_em(symbol=symbol_with_suffix)
+
+@st.cache_data(ttl=AKSHARE_CACHE_TTL, show_spinner=False)
+def fetch_stock_info(symbol_clean):
+    return ak.stock_individual_info_em(symbol=symbol_clean)
+
 def get_symbol_name(symbol):
     """
     获取股票名称
@@ -66,7 +120,7 @@ def get_symbol_name(symbol):
     """
     try:
         symbol_clean = symbol.replace('.SZ', '').replace('.SH', '')
-        stock_info = ak.stock_individual_info_em(symbol=symbol_clean)
+        stock_info = fetch_stock_info(symbol_clean)
         if stock_info is not None and not stock_info.empty:
             name_row = stock_info[stock_info['item'] == '股票简称']
             if not name_row.empty:
@@ -75,133 +129,161 @@ def get_symbol_name(symbol):
         pass
     return symbol.replace('.SZ', '').replace('.SH', '')
 
-def format_statement_data(df, year, statement_type: Optional[str] = None):
+# 报表中不作为科目显示的列（代码、名称、日期等），日期列另外排除
+STATEMENT_EXCLUDE_COLS = frozenset([
+    'SECUCODE', 'SECURITY_CODE', 'SECURITY_NAME_ABBR',
+    'ORG_CODE', 'ORG_TYPE', 'REPORT_TYPE', 'REPORT_DATE_NAME',
+    'SECURITY_TYPE_CODE', 'NOTICE_DATE', 'UPDATE_DATE', 'CURRENCY',
+    'OPINION_TYPE', 'OSOPINION_TYPE', 'LISTING_STATE',
+])
+
+# 利润表常见科目顺序
+PROFIT_ORDER = (
+    "TOTAL_OPERATE_INCOME", "OPERATE_INCOME",
+    "OPERATE_COST", "OPERATE_TAX_ADD",
+    "SALE_EXPENSE", "MANAGE_EXPENSE", "RESEARCH_EXPENSE",
+    "FINANCE_EXPENSE",
+    "FAIRVALUE_CHANGE_INCOME", "INVEST_INCOME", "OTHER_INCOME",
+    "ASSET_DISPOSAL_INCOME", "NONBUSINESS_INCOME", "NONBUSINESS_EXPENSE",
+    "TOTAL_PROFIT", "INCOME_TAX",
+    "NETPROFIT", "PARENT_NETPROFIT", "DEDUCT_PARENT_NETPROFIT",
+    "MINORITY_INTEREST",
+    "BASIC_EPS", "DILUTED_EPS",
+)
+# 现金流量表常见科目顺序（按三大活动）
+CASH_FLOW_ORDER = (
+    # 经营活动
+    "SALE_SERVICE", "SALES_SERVICES", "RECEIVE_OTHER_OPERATE",
+    "OPERATE_INFLOW_BALANCE",
+    "BUY_SERVICE", "BUY_SERVICES", "PAY_STAFF_CASH",
+    "PAY_ALL_TAX", "PAY_OTHER_OPERATE",
+    "OPERATE_NETCASH_OPERATE", "NETCASH_OPERATE", "OPERATE_NET_CASH_FLOW",
+    # 投资活动
+    "WITHDRAW_INVEST", "RECEIVE_INVEST_INCOME", "DISPOSAL_LONG_ASSET",
+    "RECEIVE_OTHER_INVEST",
+    "INVEST_INFLOW_BALANCE",
+    "INVEST_PAY_CASH", "CONSTRUCT_LONG_ASSET", "PAY_OTHER_INVEST",
+    "INVEST_OUTFLOW_BALANCE",
+    "NETCASH_INVEST", "INVEST_NET_CASH_FLOW",
+    # 筹资活动
+    "ACCEPT_INVEST_CASH", "ACCEPT_LOAN_CASH", "ISSUE_BOND",
+    "RECEIVE_OTHER_FINANCE",
+    "FINANCE_INFLOW_BALANCE",
+    "PAY_DEBT_CASH", "ASSIGN_DIVIDEND_PORFIT", "PAY_OTHER_FINANCE",
+    "FINANCE_OUTFLOW_BALANCE",
+    "FINANCE_NET_CASH_FLOW",
+    # 其他
+    "RATE_CHANGE_EFFECT",
+    "NET_CASH_INCREASE", "BEGIN_CASH", "END_CASH",
+)
+
+# 科目在顺序表中的位置，排序时直接查表
+PROFIT_RANK = {name: rank for rank, name in enumerate(PROFIT_ORDER)}
+CASH_FLOW_RANK = {name: rank for rank, name in enumerate(CASH_FLOW_ORDER)}
+
+def find_date_column(df):
+    """查找报告期列，找不到时返回 None"""
+    for col in df.columns:
+        if 'REPORT_DATE' in col or '报告期' in col:
+            return col
+    return None
+
+def statement_item_columns(df) -> List[str]:
+    """取科目列：去掉日期列、代码/名称等非科目列和同比（_YOY）列"""
+    date_col = find_date_column(df)
+    return [
+        col for col in df.columns
+        if col != date_col and col not in STATEMENT_EXCLUDE_COLS and '_YOY' not in col
+    ]
+
+def annual_report_rows(df) -> Dict[int, pd.Series]:
     """
-    格式化财务报表数据为"每个科目一行"的格式
+    一次扫描日期列，按年份取出年报（12-31）数据行
     
     参数:
         df: 原始数据框
-        year: 年份
     
     返回:
-        格式化后的数据框，包含：科目、中文科目、数值(亿)
+        字典，格式为 {年份: 该年年报数据行}；同一年份有多行时取第一行
     """
     if df is None or df.empty:
-        return None
-    
-    # 查找日期列
-    date_col = None
-    for col in df.columns:
-        if 'REPORT_DATE' in col or '报告期' in col:
-            date_col = col
-            break
+        return {}
     
+    date_col = find_date_column(df)
     if date_col is None:
-        return None
+        return {}
     
-    # 筛选指定年份的数据（12-31年报）
-    year_str = str(year)
-    date_str = f"{year}-12-31"
-    date_str_alt = f"{year_str}-12-31"
-    filtered = df[
-        df[date_col].astype(str).str.contains(date_str, na=False) |
-        df[date_col].astype(str).str.contains(date_str_alt, na=False)
-    ]
+    years = df[date_col].astype(str).str.extract(r"(\d{4})-12-31", expand=False)
+    has_year = years.notna().to_numpy()
+    annual = df[has_year]
+    years = years[has_year].astype(int)
+    first = (~years.duplicated()).to_numpy()
+    return {year: annual.iloc[pos] for pos, year in enumerate(years) if first[pos]}
+
+def format_statement_data(df, year, statement_type: Optional[str] = None):
+    """
+    格式化财务报表数据为"每个科目一行"的格式
+    
+    参数:
+        df: 原始数据框
+        year: 年份
     
-    if filtered.empty:
+    返回:
+        格式化后的数据框，包含：科目、中文科目、数值(亿)
+    """
+    row_data = annual_report_rows(df).get(int(year))
+    if row_data is None:
         return None
+    return format_statement_row(df[statement_item_columns(df)], row_data, statement_type)
+
+def format_statement_row(items, row_data, statement_type: Optional[str] = None):
+    """
+    将某一年的年报数据行格式化为"每个科目一行"的格式
     
-    # 取第一行（如果有多行）
-    row_data = filtered.iloc[0]
+    参数:
+        items: 只含科目列的数据框（按 statement_item_columns 筛选，用于确定科目列和列类型）
+        row_data: 该年年报数据行（annual_report_rows 的结果）
+        statement_type: 报表类型，profit/cash_flow 时按常见科目顺序排列
     
+    返回:
+        格式化后的数据框，包含：科目、中文科目、数值(亿)
+    """
     # 转置：每列变成一行
-    result_data = []
-    exclude_cols = [date_col, 'SECUCODE', 'SECURITY_CODE', 'SECURITY_NAME_ABBR', 
-                  'ORG_CODE', 'ORG_TYPE', 'REPORT_TYPE', 'REPORT_DATE_NAME',
-                  'SECURITY_TYPE_CODE', 'NOTICE_DATE', 'UPDATE_DATE', 'CURRENCY',
-                  'OPINION_TYPE', 'OSOPINION_TYPE', 'LISTING_STATE']
+    values = row_data[items.columns]
+    values = values[values.notna()]
     
-    for col in df.columns:
-        if col not in exclude_cols:
-            value = row_data[col]
-            if pd.notna(value) and '_YOY' not in col:
-                try:
-                    num_value = float(value)
-                    if num_value != 0:
-                        # 转换为亿单位
-                        value_yi = convert_to_yi(value)
-                        # 获取中文名
-                        chinese_name = get_chinese_name(col)
-                        if chinese_name is None or chinese_name == col:
-                            chinese_name = "-"
-                        result_data.append({
-                            '科目': col,
-                            '中文科目': chinese_name,
-                            '数值(亿)': value_yi
-                        })
-                except:
-                    if str(value) not in ['False', 'nan', 'None', '']:
-                        chinese_name = get_chinese_name(col)
-                        if chinese_name is None or chinese_name == col:
-                            chinese_name = "-"
-                        result_data.append({
-                            '科目': col,
-                            '中文科目': chinese_name,
-                            '数值(亿)': value
-                        })
-    
-    if not result_data:
+    # 数值列（绝大多数科目）整列处理：去掉0值，换算为亿元（保留2位小数）
+    numeric_columns = set(items.select_dtypes(include="number").columns)
+    is_numeric = [col in numeric_columns for col in values.index]
+    nums = values[is_numeric].astype(float)
+    nums = nums[nums != 0] / 100000000
+    converted = dict(zip(nums.index, [round(num, 2) for num in nums.tolist()]))
+    
+    # 其他类型的列（文本等）逐个判断：能转成数值的按数值处理，否则保留有意义的原值
+    for col, value in values[[not flag for flag in is_numeric]].items():
+        try:
+            if float(value) != 0:
+                converted[col] = convert_to_yi(value)
+        except:
+            if str(value) not in ['False', 'nan', 'None', '']:
+                converted[col] = value
+    
+    if not converted:
         return None
     
-    result_df = pd.DataFrame(result_data)
+    kept_cols = [col for col in values.index if col in converted]
+    result_df = pd.DataFrame({
+        '科目': kept_cols,
+        '中文科目': [lookup_chinese_name(col) for col in kept_cols],
+        '数值(亿)': [converted[col] for col in kept_cols],
+    })
 
     # 根据报表类型调整显示顺序
     if statement_type in ("profit", "cash_flow"):
-        # 利润表常见科目顺序
-        profit_order = [
-            "TOTAL_OPERATE_INCOME", "OPERATE_INCOME",
-            "OPERATE_COST", "OPERATE_TAX_ADD",
-            "SALE_EXPENSE", "MANAGE_EXPENSE", "RESEARCH_EXPENSE",
-            "FINANCE_EXPENSE",
-            "FAIRVALUE_CHANGE_INCOME", "INVEST_INCOME", "OTHER_INCOME",
-            "ASSET_DISPOSAL_INCOME", "NONBUSINESS_INCOME", "NONBUSINESS_EXPENSE",
-            "TOTAL_PROFIT", "INCOME_TAX",
-            "NETPROFIT", "PARENT_NETPROFIT", "DEDUCT_PARENT_NETPROFIT",
-            "MINORITY_INTEREST",
-            "BASIC_EPS", "DILUTED_EPS",
-        ]
-        # 现金流量表常见科目顺序（按三大活动）
-        cash_order = [
-            # 经营活动
-            "SALE_SERVICE", "SALES_SERVICES", "RECEIVE_OTHER_OPERATE",
-            "OPERATE_INFLOW_BALANCE",
-            "BUY_SERVICE", "BUY_SERVICES", "PAY_STAFF_CASH",
-            "PAY_ALL_TAX", "PAY_OTHER_OPERATE",
-            "OPERATE_NETCASH_OPERATE", "NETCASH_OPERATE", "OPERATE_NET_CASH_FLOW",
-            # 投资活动
-            "WITHDRAW_INVEST", "RECEIVE_INVEST_INCOME", "DISPOSAL_LONG_ASSET",
-            "RECEIVE_OTHER_INVEST",
-            "INVEST_INFLOW_BALANCE",
-            "INVEST_PAY_CASH", "CONSTRUCT_LONG_ASSET", "PAY_OTHER_INVEST",
-            "INVEST_OUTFLOW_BALANCE",
-            "NETCASH_INVEST", "INVEST_NET_CASH_FLOW",
-            # 筹资活动
-            "ACCEPT_INVEST_CASH", "ACCEPT_LOAN_CASH", "ISSUE_BOND",
-            "RECEIVE_OTHER_FINANCE",
-            "FINANCE_INFLOW_BALANCE",
-            "PAY_DEBT_CASH", "ASSIGN_DIVIDEND_PORFIT", "PAY_OTHER_FINANCE",
-            "FINANCE_OUTFLOW_BALANCE",
-            "FINANCE_NET_CASH_FLOW",
-            # 其他
-            "RATE_CHANGE_EFFECT",
-            "NET_CASH_INCREASE", "BEGIN_CASH", "END_CASH",
-        ]
-        order_list = profit_order if statement_type == "profit" else cash_order
-        # 使用科目（英文列名）排序，未出现在顺序表中的放在后面
-        result_df["__order"] = result_df["科目"].apply(
-            lambda x: order_list.index(x) if x in order_list else len(order_list) + 1
-        )
-        result_df = result_df.sort_values(by="__order").drop(columns="__order")
+        rank = PROFIT_RANK if statement_type == "profit" else CASH_FLOW_RANK
+        # 使用科目（英文列名）排序，未出现在顺序表中的按原顺序放在后面
+        result_df["__order"] = result_df["科目"].map(rank).fillna(len(rank) + 1)
+        result_df = result_df.sort_values(by="__order", kind="stable").drop(columns="__order")
 
     return result_df
 
@@ -224,25 +306,49 @@ def get_financial_statements(symbol, start_year, end_year):
     status_text = st.empty()
     
     try:
-        # 1. 获取资产负债表
-        status_text.text("📊 正在获取资产负债表数据...")
+        # 1-3. 获取三大报表：三个接口互不依赖，同时发起请求，总耗时取决于最慢的一个
+        status_text.text("📊 正在获取资产负债表、利润表、现金流量表数据...")
         progress_bar.progress(10)
-        balance_sheet = ak.stock_balance_sheet_by_report_em(symbol=symbol_with_suffix)
+        fetchers = {
+            'balance': ("资产负债表", fetch_balance_sheet),
+            'profit': ("利润表", fetch_profit_sheet),
+            'cash_flow': ("现金流量表", fetch_cash_flow_sheet),
+        }
+        statements = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+            futures = {
+                executor.submit(fetcher, symbol_with_suffix): key
+                for key, (_, fetcher) in fetchers.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    statements[key] = future.result()
+                except Exception as e:
+                    # 单张报表获取失败时只跳过该报表
+                    statements[key] = None
+                    errors.append(e)
+                    st.warning(f"⚠️ 获取{fetchers[key][0]}数据失败：{str(e)}")
+                progress_bar.progress(10 + 20 * len(statements))
         
-        # 2. 获取利润表
-        status_text.text("💰 正在获取利润表数据...")
-        progress_bar.progress(30)
-        profit = ak.stock_profit_sheet_by_report_em(symbol=symbol_with_suffix)
+        # 三张报表都获取失败时按获取失败处理
+        if len(errors) == len(fetchers):
+            raise errors[0]
         
-        # 3. 获取现金流量表
-        status_text.text("💵 正在获取现金流量表数据...")
-        progress_bar.progress(50)
-        cash_flow = ak.stock_cash_flow_sheet_by_report_em(symbol=symbol_with_suffix)
+        balance_sheet = statements['balance']
+        profit = statements['profit']
+        cash_flow = statements['cash_flow']
         
         # 4. 按年份组织数据
         status_text.text("📋 正在按年份组织数据...")
         progress_bar.progress(70)
         
+        # 每张报表只扫描一次日期列，按年份取出年报数据行；科目列（去掉非科目列和同比列）也只筛选一次
+        frames = {'balance': balance_sheet, 'profit': profit, 'cash_flow': cash_flow}
+        annual_rows = {key: annual_report_rows(df) for key, df in frames.items()}
+        items = {key: df[statement_item_columns(df)] for key, df in frames.items() if annual_rows[key]}
+        
         for year in range(start_year, end_year + 1):
             year_data = {
                 'balance': None,
@@ -250,17 +356,11 @@ def get_financial_statements(symbol, start_year, end_year):
                 'cash_flow': None
             }
             
-            # 格式化资产负债表
-            if balance_sheet is not None and not balance_sheet.empty:
-                year_data['balance'] = format_statement_data(balance_sheet, year, statement_type="balance")
-            
-            # 格式化利润表（按常规科目顺序）
-            if profit is not None and not profit.empty:
-                year_data['profit'] = format_statement_data(profit, year, statement_type="profit")
-            
-            # 格式化现金流量表（按经营/投资/筹资顺序）
-            if cash_flow is not None and not cash_flow.empty:
-                year_data['cash_flow'] = format_statement_data(cash_flow, year, statement_type="cash_flow")
+            # 格式化三张报表（利润表按常规科目顺序，现金流量表按经营/投资/筹资顺序）
+            for key in frames:
+                row_data = annual_rows[key].get(year)
+                if row_data is not None:
+                    year_data[key] = format_statement_row(items[key], row_data, statement_type=key)
             
             # 如果至少有一个报表有数据，就添加到结果中
             has_data = False
@@ -288,10 +388,65 @@ def get_financial_statements(symbol, start_year, end_year):
     
     return results
 
+# 每个年份sheet中三张报表的顺序和标题
+STATEMENT_SECTIONS = [
+    ('balance', '【资产负债表】'),
+    ('profit', '【利润表】'),
+    ('cash_flow', '【现金流量表】'),
+]
+
+# 每个年份sheet的列（表头）
+STATEMENT_SHEET_COLUMNS = ('科目', '中文科目', '数值(亿)')
+
+def statement_sheet_rows(year_data) -> List[tuple]:
+    """
+    按顺序拼接某一年三张报表的行：表头、标题行、空行、报表数据，报表之间空两行
+    
+    参数:
+        year_data: 该年份的报表字典 {'balance': DataFrame, 'profit': DataFrame, 'cash_flow': DataFrame}
+    
+    返回:
+        行元组列表（第一行为表头）；三张报表都没有数据时返回空列表
+    """
+    rows = []
+    for key, title in STATEMENT_SECTIONS:
+        statement = year_data[key]
+        if statement is None or statement.empty:
+            continue
+        rows.append((title, '', ''))
+        rows.append(('', '', ''))
+        rows.extend(statement[list(STATEMENT_SHEET_COLUMNS)].itertuples(index=False, name=None))
+        if key != 'cash_flow':
+            rows.extend([('', '', '')] * 2)
+    
+    if rows:
+        rows.insert(0, STATEMENT_SHEET_COLUMNS)
+    return rows
+
+def statement_column_widths(rows: List[tuple]) -> List[int]:
+    """
+    计算自适应列宽（包括表头，中文字符按2个字符宽度计算）
+    
+    参数:
+        rows: 要写入sheet的行（statement_sheet_rows 的结果）
+    
+    返回:
+        各列宽度
+    """
+    widths = []
+    for column in zip(*rows):
+        # 非ASCII字符按2计：总长度的2倍减去ASCII字符数
+        max_length = max(2 * len(text) - len(text.encode("ascii", "ignore")) for text in map(str, column))
+        widths.append(min(max(max_length + 2, 8), 50) if max_length > 0 else 10)
+    return widths
+
 def create_excel_file(results, symbol, company_name, start_year, end_year):
     """
     创建Excel文件，每年一个sheet，每个sheet包含三大报表
     
+    已安装 xlsxwriter 时使用其 constant_memory 模式逐行写入，不再为每个sheet拼接 DataFrame；
+    否则用 pandas + openpyxl 写入
+    
     参数:
         results: 数据字典 {年份: {'balance': DataFrame, 'profit': DataFrame, 'cash_flow': DataFrame}}
         symbol: 股票代码
@@ -304,150 +459,36 @@ def create_excel_file(results, symbol, company_name, start_year, end_year):
     """
     output = io.BytesIO()
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        for year in sorted(results.keys()):
-            year_data = results[year]
-            sheet_name = f"{year}年"
-            
-            # 创建该年份的完整数据框
-            year_rows = []
-            
-            # 1. 资产负债表
-            if year_data['balance'] is not None and not year_data['balance'].empty:
-                # 添加标题行
-                year_rows.append({
-                    '科目': '【资产负债表】',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                # 添加空行
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                # 添加数据
-                for _, row in year_data['balance'].iterrows():
-                    year_rows.append({
-                        '科目': row['科目'],
-                        '中文科目': row['中文科目'],
-                        '数值(亿)': row['数值(亿)']
-                    })
-                # 添加分隔空行
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-            
-            # 2. 利润表
-            if year_data['profit'] is not None and not year_data['profit'].empty:
-                # 添加标题行
-                year_rows.append({
-                    '科目': '【利润表】',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                # 添加空行
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                # 添加数据
-                for _, row in year_data['profit'].iterrows():
-                    year_rows.append({
-                        '科目': row['科目'],
-                        '中文科目': row['中文科目'],
-                        '数值(亿)': row['数值(亿)']
-                    })
-                # 添加分隔空行
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-            
-            # 3. 现金流量表
-            if year_data['cash_flow'] is not None and not year_data['cash_flow'].empty:
-                # 添加标题行
-                year_rows.append({
-                    '科目': '【现金流量表】',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                # 添加空行
-                year_rows.append({
-                    '科目': '',
-                    '中文科目': '',
-                    '数值(亿)': ''
-                })
-                # 添加数据
-                for _, row in year_data['cash_flow'].iterrows():
-                    year_rows.append({
-                        '科目': row['科目'],
-                        '中文科目': row['中文科目'],
-                        '数值(亿)': row['数值(亿)']
-                    })
-            
-            # 创建DataFrame并写入sheet
-            if year_rows:
-                year_df = pd.DataFrame(year_rows)
-                year_df.to_excel(writer, sheet_name=sheet_name, index=False)
+    sheets = {}
+    for year in sorted(results.keys()):
+        rows = statement_sheet_rows(results[year])
+        if rows:
+            sheets[f"{year}年"] = rows
     
-    # 设置列宽自适应
-    try:
-        from openpyxl import load_workbook
-        from openpyxl.utils import get_column_letter
-        
-        output.seek(0)
-        wb = load_workbook(output)
-        
-        # 为每个sheet设置列宽
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            for col_idx, col in enumerate(ws.iter_cols(min_row=1, max_row=ws.max_row, values_only=False), start=1):
-                max_length = 0
-                column_letter = get_column_letter(col_idx)
-                
-                for cell in col:
-                    if cell.value is not None:
-                        try:
-                            cell_value = str(cell.value)
-                            length = 0
-                            for char in cell_value:
-                                if ord(char) > 127:  # 非ASCII字符（包括中文）
-                                    length += 2
-                                else:
-                                    length += 1
-                            if length > max_length:
-                                max_length = length
-                        except:
-                            pass
-                
-                if max_length > 0:
-                    adjusted_width = min(max(max_length + 2, 8), 50)
-                    ws.column_dimensions[column_letter].width = adjusted_width
-                else:
-                    ws.column_dimensions[column_letter].width = 10
-        
-        output.seek(0)
-        output.truncate(0)
-        wb.save(output)
+    if XLSXWRITER_AVAILABLE:
+        wb = xlsxwriter.Workbook(output, {"constant_memory": True, "strings_to_urls": False})
+        # 与 pandas 写入的表头样式相同
+        header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        for sheet_name, rows in sheets.items():
+            ws = wb.add_worksheet(sheet_name)
+            # constant_memory 模式下需要在写入数据之前设置列宽
+            for col_idx, width in enumerate(statement_column_widths(rows)):
+                ws.set_column(col_idx, col_idx, width)
+            ws.write_row(0, 0, rows[0], header_format)
+            for row_idx, row in enumerate(rows[1:], start=1):
+                ws.write_row(row_idx, 0, row)
         wb.close()
-    except Exception as e:
-        # 如果设置列宽失败，不影响返回结果
-        print(f"⚠️ 设置列宽失败: {e}")
+        return output.getvalue()
+    
+    from openpyxl.utils import get_column_letter
+    
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for sheet_name, rows in sheets.items():
+            # 创建DataFrame并写入sheet，同时设置列宽自适应
+            pd.DataFrame(rows[1:], columns=rows[0]).to_excel(writer, sheet_name=sheet_name, index=False)
+            ws = writer.sheets[sheet_name]
+            for col_idx, width in enumerate(statement_column_widths(rows)):
+                ws.column_dimensions[get_column_letter(col_idx + 1)].width = width
     
     output.seek(0)
     return output.getvalue()
@@ -506,7 +547,9 @@ if __name__ == "__main__":
 
     # 主内容区
     if analyze_button:
-        if not symbol or len(symbol.replace('.SZ', '').replace('.SH', '')) != 6:
+        # 去掉交易所后缀的代码，校验和生成文件名时共用
+        symbol_clean = symbol.replace('.SZ', '').replace('.SH', '')
+        if not symbol or len(symbol_clean) != 6:
             st.error("❌ 请输入有效的6位股票代码")
             st.stop()
         
@@ -565,7 +608,6 @@ if __name__ == "__main__":
             
             excel_data = create_excel_file(results, symbol, company_name, start_year, end_year)
             
-            symbol_clean = symbol.replace('.SZ', '').replace('.SH', '')
             filename = f"{company_name}_{symbol_clean}_{start_year}-{end_year}_财务报表.xlsx"
             
             st.download_button(